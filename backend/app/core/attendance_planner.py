@@ -0,0 +1,241 @@
+"""
+"Attend extra, then leave" planner built on VacationRecommendationEngine
+
+For a target vacation window that would drop some subjects below their
+threshold, find the fewest class days to attend before the window so that
+every subject stays safe afterwards.
+
+Model (same assumptions as find_safe_vacations): attending a class day
+attends every lecture scheduled that day; lectures inside the window are
+missed; other future lectures are not simulated.
+
+1. Per subject, the minimal number of extra lectures x is closed form:
+   (A + x) / (T + x + W) >= t  <=>  x >= (t * (T + W) - A) / (1 - t)
+2. Class days before the window with the same lecture pattern are
+   interchangeable, so only how many days of each pattern to attend matters.
+   A DP over patterns with the remaining need per subject as state finds the
+   minimum; a greedy cover is used if more than max_states states are reached.
+"""
+import math
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from app.core.vacation_engine import DayType, VacationRecommendationEngine
+
+DEFAULT_MAX_STATES = 200_000
+
+
+@dataclass
+class AttendancePlan:
+    """Cheapest pre-vacation attendance for one target window"""
+    window_start: datetime
+    window_end: datetime
+    feasible: bool
+    method: str  # "none" (already safe), "dp", "greedy" or "infeasible"
+    days_to_attend: List[datetime] = field(default_factory=list)
+    subjects: Dict[str, Dict] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict:
+        return {
+            "window": {
+                "start_date": self.window_start.strftime("%Y-%m-%d"),
+                "end_date": self.window_end.strftime("%Y-%m-%d")
+            },
+            "feasible": self.feasible,
+            "method": self.method,
+            "extra_days": len(self.days_to_attend),
+            "days_to_attend": [
+                {"date": day.strftime("%Y-%m-%d"), "day_name": day.strftime("%A")}
+                for day in self.days_to_attend
+            ],
+            "subjects": self.subjects
+        }
+
+
+class ExtraAttendancePlanner:
+    def __init__(self, engine: VacationRecommendationEngine, max_states: int = DEFAULT_MAX_STATES):
+        self.engine = engine
+        self.max_states = max_states
+
+    def _threshold(self, subject) -> float:
+        return subject.threshold if subject.threshold > 0 else self.engine.global_threshold
+
+    def required_extra_lectures(self, subject_id: str, missed_lectures: int) -> Optional[int]:
+        """Fewest extra attended lectures that keep the subject safe; None if impossible"""
+        subject = self.engine.subjects[subject_id]
+        threshold = self._threshold(subject)
+
+        def is_safe(extra: int) -> bool:
+            # Same float check as Subject.simulate_absence
+            new_total = subject.total + extra + missed_lectures
+            if new_total == 0:
+                return True
+            return (subject.attended + extra) / new_total * 100 >= threshold
+
+        if is_safe(0):
+            return 0
+        ratio = threshold / 100
+        if ratio >= 1:
+            return None  # Every missed lecture is a permanent deficit at 100%
+
+        extra = max(0, math.ceil((ratio * (subject.total + missed_lectures) - subject.attended) / (1 - ratio)))
+        # Nudge for float rounding so the result agrees with is_safe exactly
+        while not is_safe(extra):
+            extra += 1
+        while extra > 0 and is_safe(extra - 1):
+            extra -= 1
+        return extra
+
+    def plan(self, start_date: datetime, window_start: datetime, window_end: datetime) -> AttendancePlan:
+        """
+        Args:
+            start_date: First day the student can attend (usually today)
+            window_start / window_end: Vacation dates (inclusive)
+        """
+        offset = (window_start.date() - start_date.date()).days
+        size = (window_end.date() - window_start.date()).days + 1
+        if offset < 0 or size < 1:
+            raise ValueError("Vacation window must start on or after start_date and end after it starts")
+
+        matrix = self.engine.build_lecture_matrix(start_date, offset + size)
+        subject_ids = matrix.subject_ids
+        missed = matrix.missed_lectures(offset, size)
+
+        needs = []
+        for subject_id in subject_ids:
+            needs.append(self.required_extra_lectures(subject_id, missed[subject_id]))
+
+        # Class days before the window, grouped by identical lecture pattern
+        days_by_pattern: Dict[Tuple[int, ...], List[int]] = {}
+        for day in range(offset):
+            if matrix.day_types[day] != DayType.WEEKDAY:
+                continue
+            pattern = tuple(prefix[day + 1] - prefix[day] for prefix in matrix.lecture_prefix)
+            if any(pattern):
+                days_by_pattern.setdefault(pattern, []).append(day)
+
+        available = [
+            sum(pattern[i] * len(days) for pattern, days in days_by_pattern.items())
+            for i in range(len(subject_ids))
+        ]
+        feasible = all(need is not None and need <= available[i] for i, need in enumerate(needs))
+
+        if not feasible:
+            counts, method = {}, "infeasible"
+        elif not any(needs):
+            counts, method = {}, "none"
+        else:
+            counts, method = self._choose_pattern_counts(needs, days_by_pattern)
+
+        # Earliest days of each chosen pattern leave later ones as a fallback
+        chosen_days = sorted(
+            day for pattern, count in counts.items() for day in days_by_pattern[pattern][:count]
+        )
+        planned = [0] * len(subject_ids)
+        for pattern, count in counts.items():
+            for i, lectures in enumerate(pattern):
+                planned[i] += lectures * count
+
+        subjects = {}
+        for i, subject_id in enumerate(subject_ids):
+            subject = self.engine.subjects[subject_id]
+            attended = subject.attended + planned[i]
+            total = subject.total + planned[i] + missed[subject_id]
+            subjects[subject_id] = {
+                "subject_name": subject.name,
+                "current_attendance": round(subject.current_percentage, 2),
+                "missed_lectures": missed[subject_id],
+                "required_extra_lectures": needs[i],
+                "available_lectures": available[i],
+                "planned_lectures": planned[i],
+                "projected_attendance": round(attended / total * 100 if total else 100.0, 2),
+                "threshold": self._threshold(subject)
+            }
+
+        return AttendancePlan(
+            window_start=window_start,
+            window_end=window_end,
+            feasible=feasible,
+            method=method,
+            days_to_attend=[start_date + timedelta(days=day) for day in chosen_days],
+            subjects=subjects
+        )
+
+    def _choose_pattern_counts(
+        self,
+        needs: List[int],
+        days_by_pattern: Dict[Tuple[int, ...], List[int]]
+    ) -> Tuple[Dict[Tuple[int, ...], int], str]:
+        """Fewest days (count per pattern) covering every subject's need"""
+        patterns = [p for p in days_by_pattern if any(p[i] and needs[i] for i in range(len(needs)))]
+        # Static bounds on the state space are far above what the pruned DP reaches,
+        # so give up only when it actually grows too large
+        counts = self._dp(needs, patterns, days_by_pattern, self.max_states)
+        if counts is not None:
+            return counts, "dp"
+        return self._greedy(needs, patterns, days_by_pattern), "greedy"
+
+    @classmethod
+    def _dp(cls, needs, patterns, days_by_pattern, max_states=None):
+        """
+        best[state] = (days used, counts per pattern so far); state = remaining need
+        The greedy cover bounds the search and the last pattern's count is solved
+        directly, since it alone has to cover whatever need is left.
+        Returns None if a layer holds more than max_states states
+        """
+        greedy = cls._greedy(needs, patterns, days_by_pattern)
+        upper = sum(greedy.values())
+        *head, last = patterns
+
+        best = {tuple(needs): (0, ())}
+        for pattern in head:
+            limit = len(days_by_pattern[pattern])
+            next_best = {}
+            for state, (used, counts) in best.items():
+                for count in range(min(limit, upper - used) + 1):
+                    remaining = tuple(max(0, r - count * lectures) for r, lectures in zip(state, pattern))
+                    # A day holds at most one lecture per subject, so the largest
+                    # remaining need is a lower bound on the days still required
+                    if used + count + max(remaining) >= upper:
+                        if not any(remaining):
+                            break
+                        continue
+                    current = next_best.get(remaining)
+                    if current is None or used + count < current[0]:
+                        next_best[remaining] = (used + count, counts + (count,))
+                    if not any(r and lectures for r, lectures in zip(remaining, pattern)):
+                        break  # More days of this pattern can't reduce the need further
+                if max_states is not None and len(next_best) > max_states:
+                    return None
+            best = next_best
+
+        limit = len(days_by_pattern[last])
+        best_used, best_counts = upper, None
+        for state, (used, counts) in best.items():
+            if any(r and not lectures for r, lectures in zip(state, last)):
+                continue
+            count = max((-(-r // lectures) for r, lectures in zip(state, last) if r), default=0)
+            if count <= limit and used + count < best_used:
+                best_used, best_counts = used + count, counts + (count,)
+
+        if best_counts is None:
+            return greedy  # Nothing beats the greedy cover, so it is optimal
+        return {pattern: count for pattern, count in zip(patterns, best_counts) if count}
+
+    @staticmethod
+    def _greedy(needs, patterns, days_by_pattern):
+        remaining = list(needs)
+        left = {pattern: len(days_by_pattern[pattern]) for pattern in patterns}
+        counts = {}
+        while any(remaining):
+            gain, pattern = max(
+                (sum(min(r, lectures) for r, lectures in zip(remaining, p)), p)
+                for p in patterns if left[p]
+            )
+            if gain == 0:
+                break
+            counts[pattern] = counts.get(pattern, 0) + 1
+            left[pattern] -= 1
+            remaining = [max(0, r - lectures) for r, lectures in zip(remaining, pattern)]
+        return counts
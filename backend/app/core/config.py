@@ -1,3 +1,4 @@
+import os
 from pydantic_settings import BaseSettings
 from typing import Optional
 
@@ -13,9 +14,99 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30 * 24 * 60  # 30 days
+    # Carry the user id in tokens so id-only routes skip the users lookup
+    JWT_INCLUDE_USER_ID: bool = True
+    
+    # Password hashing (pbkdf2_sha256) runs on a bounded thread pool
+    PASSWORD_HASH_ROUNDS: int = 29000
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_QUEUE: int = 256
+    PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS: float = 10.0  # Waiting longer for a worker gets 503
+    
+    # In-process cache of authenticated users (token subject -> user).
+    # Each worker has its own copy: a profile change made through one worker
+    # can be served stale by the others for up to USER_CACHE_TTL_SECONDS
+    USER_CACHE_SIZE: int = 4096
+    USER_CACHE_TTL_SECONDS: int = 60
     
     # AI
     GROQ_API_KEY: str
+    GROQ_BASE_URL: Optional[str] = None  # Override to point at a proxy or local stub server
+    AI_MAX_CONCURRENCY: int = 4  # In-flight LLM calls per worker
+    AI_REQUEST_TIMEOUT_SECONDS: float = 30.0
+    AI_MAX_RETRIES: int = 2
+    AI_RETRY_BASE_DELAY_SECONDS: float = 0.5
+    
+    # Uploads are spooled to disk in chunks; larger files are rejected with 413
+    UPLOAD_MAX_BYTES: int = 20 * 1024 * 1024
+    UPLOAD_TMP_DIR: Optional[str] = None  # Default: the system temp directory
+    
+    # Calendar OCR / PDF extraction (tesseract is CPU-bound: one process per core)
+    OCR_WORKERS: int = os.cpu_count() or 1
+    OCR_MAX_QUEUE: int = 32  # OCR tasks and accepted background jobs allowed to wait before uploads get 503
+    OCR_JOB_TIMEOUT_SECONDS: float = 120.0
+    PDF_PAGES_PER_TASK: int = 4  # Pages each worker extracts per PDF open
+    PDF_MAX_PAGES: int = 100  # Pages beyond this are ignored
+    PDF_MAX_CHARS: int = 50000  # Stop extracting once this much text is collected
+    PDF_OCR_RESOLUTION: int = 200  # DPI used to OCR pages without a text layer
+    # Image preprocessing before tesseract (phone photos are often 12+ MP)
+    # Off until its accuracy/latency has been measured against tesseract's defaults
+    OCR_PREPROCESS: bool = False
+    OCR_TARGET_DPI: int = 300  # Downscale images scanned above this
+    OCR_MAX_IMAGE_SIDE: int = 2500  # Longest side in pixels after downscaling
+    OCR_CROP_TO_CONTENT: bool = True  # Trim empty margins around the calendar
+    OCR_TESSERACT_PSM: Optional[int] = None  # Page segmentation mode; None = tesseract default, 6 = single uniform block
+    
+    # Rule-based calendar parser tried before the LLM; falls back when too few date lines parse
+    CALENDAR_RULE_PARSER: bool = True
+    CALENDAR_PARSER_MIN_COVERAGE: float = 0.9
+    CALENDAR_PARSER_MIN_EVENTS: int = 2
+    CALENDAR_PARSER_MAX_HOLIDAY_DAYS: int = 28  # Longer "holidays" go to the LLM instead
+    
+    # Cache of LLM responses keyed by prompt hash (memory tier + llm_cache collection)
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_PERSISTENT: bool = True
+    LLM_CACHE_SIZE: int = 256
+    LLM_CACHE_TTL_SECONDS: int = 7 * 24 * 60 * 60  # 7 days
+    
+    # Vacation engine: "python" (reference) or "numpy" (vectorized, needs numpy installed)
+    VACATION_ENGINE_BACKEND: str = "python"
+    # Where the engine runs: "process", "thread" or "inline" (on the event loop)
+    VACATION_ENGINE_EXECUTOR: str = "process"
+    VACATION_ENGINE_WORKERS: int = 2
+    VACATION_ENGINE_MAX_QUEUE: int = 16
+    VACATION_ENGINE_TIMEOUT_SECONDS: float = 15.0
+    
+    # Attendance percentage every subject must stay above in planner recommendations
+    DEFAULT_MIN_ATTENDANCE: float = 75
+    
+    # Bounds for the /planner/recommend search parameters
+    VACATION_MAX_SEARCH_DAYS: int = 180
+    VACATION_MAX_WINDOW_DAYS: int = 31
+    VACATION_PARETO_MAX_RESULTS: int = 20
+    
+    # Batch recommendations: students per engine task, and per request
+    BATCH_RECOMMEND_CHUNK_SIZE: int = 50
+    BATCH_RECOMMEND_MAX_USERS: int = 500
+    
+    # Materialized recommendations (see precompute_recommendations.py)
+    PRECOMPUTE_ENABLED: bool = False  # Run the job inside the API process
+    PRECOMPUTE_HOUR: int = 3  # Local server time of the nightly full run
+    PRECOMPUTE_STALE_INTERVAL_SECONDS: int = 15 * 60  # Refresh stale entries in between; 0 = nightly only
+    PRECOMPUTE_BATCH_SIZE: int = 500
+    
+    # Attend-extra-then-leave planner: exact DP up to this many states, greedy beyond
+    ATTENDANCE_PLANNER_MAX_STATES: int = 200_000
+    
+    # Per-user cache of /planner/recommend results, in-process per worker.
+    # Entries are checked against the recommendation store's invalidation
+    # count, so they are safe to run with several workers
+    RECOMMENDATION_CACHE_SIZE: int = 1024
+    RECOMMENDATION_CACHE_TTL_SECONDS: int = 600
+    
+    # Compiled institution calendars/timetables shared by all their students
+    INSTITUTION_CACHE_SIZE: int = 512
+    INSTITUTION_CACHE_TTL_SECONDS: int = 600
 
     class Config:
         env_file = ".env"
@@ -29,12 +29,29 @@ class Database:
             db = self.get_db()
             # User indexes
             await db["users"].create_index("email", unique=True)
+            await db["users"].create_index("institution_id", sparse=True)
             
             # Performance indexes for user-based queries
             await db["subjects"].create_index("user_id")
             await db["schedules"].create_index("user_id")
             await db["attendance_records"].create_index("user_id")
             await db["attendance_records"].create_index([("user_id", 1), ("date", 1)], unique=True)
+            await db["attendance_counters"].create_index([("user_id", 1), ("subject_id", 1)], unique=True)
+            await db["calendar_days"].create_index([("user_id", 1), ("date", 1)], unique=True)
+            await db["calendar_day_overrides"].create_index([("user_id", 1), ("date", 1)], unique=True)
+            
+            # Shared institution calendars and timetables
+            await db["institution_calendar_days"].create_index([("institution_id", 1), ("date", 1)], unique=True)
+            await db["institution_schedules"].create_index([("institution_id", 1), ("weekday", 1)], unique=True)
+            
+            # Stale materialized recommendations are refreshed between nightly runs
+            await db["recommendations"].create_index("stale")
+            
+            # Cached LLM responses expire at their own expires_at
+            await db["llm_cache"].create_index("expires_at", expireAfterSeconds=0)
+            
+            # Calendar upload jobs are only polled briefly; keep them a day
+            await db["calendar_jobs"].create_index("created_at", expireAfterSeconds=24 * 60 * 60)
             
             logger.info("Database indexes created successfully")
 
@@ -0,0 +1,167 @@
+import asyncio
+import functools
+import logging
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, FrozenSet, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ExecutorBusyError(Exception):
+    """Raised when a job is submitted while the executor's queue is full"""
+
+
+class ExecutorTimeoutError(Exception):
+    """Raised when a job does not finish within the executor's timeout"""
+
+
+# Executors whose reservation the current task is running under
+_active_reservations: ContextVar[FrozenSet[int]] = ContextVar("executor_reservations", default=frozenset())
+
+
+class ExecutorReservation:
+    """
+    A queue slot taken at submit time for work that runs later (e.g. a
+    background job). Use as a context manager around that work: calls to
+    the executor inside it use the reserved slot, are not rejected as busy
+    and wait for a worker without the queue timeout. The slot is freed on exit.
+    """
+
+    def __init__(self, executor: "BoundedExecutor"):
+        self._executor = executor
+        self._released = False
+        self._token = None
+
+    def __enter__(self):
+        self._token = _active_reservations.set(_active_reservations.get() | {id(self._executor)})
+        return self
+
+    def __exit__(self, *exc):
+        _active_reservations.reset(self._token)
+        self.release()
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self._executor._pending -= 1
+
+
+class BoundedExecutor:
+    """
+    Runs blocking/CPU-bound callables off the event loop.
+
+    - mode: "process", "thread" or "inline" (run on the loop, for debugging)
+    - max_workers: jobs allowed to run at once
+    - max_queue: jobs allowed to wait for a worker before ExecutorBusyError
+    - timeout: seconds to wait for a job before ExecutorTimeoutError
+    - queue_timeout: seconds to wait for a free worker before ExecutorBusyError
+      (defaults to timeout; None waits indefinitely)
+
+    A timed-out job keeps its worker slot until it really finishes, so slow
+    jobs cannot pile up behind the concurrency limit.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        mode: str = "thread",
+        max_workers: int = 1,
+        max_queue: int = 0,
+        timeout: Optional[float] = None,
+        queue_timeout: Optional[float] = None
+    ):
+        if mode not in ("process", "thread", "inline"):
+            raise ValueError(f"Unknown executor mode for {name}: {mode}")
+
+        self.name = name
+        self.mode = mode
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self.timeout = timeout
+        self.queue_timeout = queue_timeout if queue_timeout is not None else timeout
+        self._executor: Optional[Executor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._pending = 0
+        self.rejected = 0
+        self.timeouts = 0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.mode == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix=self.name
+                )
+        return self._executor
+
+    def is_full(self) -> bool:
+        return self._pending >= self.max_workers + self.max_queue
+
+    def reserve(self) -> ExecutorReservation:
+        """Hold a queue slot until the reservation is released; raises ExecutorBusyError when full"""
+        if self.is_full():
+            self.rejected += 1
+            raise ExecutorBusyError(f"{self.name} is busy, try again shortly")
+        self._pending += 1
+        return ExecutorReservation(self)
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        reserved = id(self) in _active_reservations.get()
+        if self.is_full() and not reserved:
+            self.rejected += 1
+            raise ExecutorBusyError(f"{self.name} is busy, try again shortly")
+
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+
+        call = functools.partial(fn, *args, **kwargs)
+        pending = 0 if reserved else 1  # Reserved work already holds its slot
+        self._pending += pending
+        try:
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), None if reserved else self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.rejected += 1
+                raise ExecutorBusyError(f"{self.name} is busy, try again shortly")
+            if self.mode == "inline":
+                try:
+                    return call()
+                finally:
+                    self._semaphore.release()
+
+            try:
+                future = asyncio.get_running_loop().run_in_executor(self._get_executor(), call)
+            except Exception:
+                self._semaphore.release()
+                raise
+            future.add_done_callback(lambda _: self._semaphore.release())
+
+            try:
+                return await asyncio.wait_for(asyncio.shield(future), self.timeout)
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                logger.warning(f"{self.name} job timed out after {self.timeout}s")
+                raise ExecutorTimeoutError(f"{self.name} job timed out")
+        finally:
+            self._pending -= pending
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "mode": self.mode,
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "timeout_seconds": self.timeout,
+            "queue_timeout_seconds": self.queue_timeout,
+            "pending": self._pending,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -1,10 +1,22 @@
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
-from typing import List, Dict, Tuple, Optional
+from typing import List, Dict, Tuple, Optional, Iterator
 from enum import Enum
+from bisect import bisect_left
+import heapq
 import json
 
+try:
+    import numpy as np
+except ImportError:  # Vectorized backend is optional; pure Python path always works
+    np = None
+
+
+DEFAULT_SEARCH_DAYS = 60  # Planning horizon from the start date
+DEFAULT_MIN_WINDOW = 2
+DEFAULT_MAX_WINDOW = 7
+
 
 class DayType(Enum):
     WEEKDAY = "weekday"
@@ -41,28 +53,83 @@ class Subject:
         return (self.attended / new_total) * 100
 
 
-@dataclass
+@dataclass(slots=True)
 class VacationWindow:
-    """Represents a potential vacation period"""
+    """
+    Represents a potential vacation period
+    Stores only the day types; dated `days` are built on demand for output
+    """
     start_date: datetime
     end_date: datetime
-    days: List[Tuple[datetime, DayType]]
+    day_types: Tuple[DayType, ...]
     subject_impacts: Dict[str, Dict]  # subject_id -> impact data
     is_safe: bool
     score: float = 0.0
+    leave_days: int = field(init=False)  # Weekdays (actual leave days)
+    holiday_count: int = field(init=False)
+    
+    def __post_init__(self):
+        self.leave_days = sum(1 for day_type in self.day_types if day_type == DayType.WEEKDAY)
+        self.holiday_count = len(self.day_types) - self.leave_days
     
     @property
     def total_days(self) -> int:
-        return len(self.days)
+        return len(self.day_types)
     
     @property
-    def leave_days(self) -> int:
-        """Count only weekdays (actual leave days)"""
-        return sum(1 for _, day_type in self.days if day_type == DayType.WEEKDAY)
+    def days(self) -> List[Tuple[datetime, DayType]]:
+        return [
+            (self.start_date + timedelta(days=i), day_type)
+            for i, day_type in enumerate(self.day_types)
+        ]
+
+
+@dataclass
+class LectureMatrix:
+    """
+    Per-day lecture matrix (days x subjects) over a search horizon
+    Stored as cumulative sums so any window is a constant-time difference
+    """
+    start_date: datetime
+    day_types: List[DayType]
+    subject_ids: List[str]
+    lecture_prefix: List[List[int]]  # subject index -> lectures scheduled in days [0, i)
+    weekday_prefix: List[int]  # class days in days [0, i)
     
     @property
-    def holiday_count(self) -> int:
-        return sum(1 for _, day_type in self.days if day_type in [DayType.WEEKEND, DayType.HOLIDAY])
+    def num_days(self) -> int:
+        return len(self.day_types)
+    
+    def leave_days(self, offset: int, size: int) -> int:
+        """Class days inside the window starting at day `offset`"""
+        return self.weekday_prefix[offset + size] - self.weekday_prefix[offset]
+    
+    def missed_lectures(self, offset: int, size: int) -> Dict[str, int]:
+        """Lectures per subject inside the window starting at day `offset`"""
+        end = offset + size
+        return {
+            subject_id: prefix[end] - prefix[offset]
+            for subject_id, prefix in zip(self.subject_ids, self.lecture_prefix)
+        }
+    
+    def window_day_types(self, offset: int, size: int) -> Tuple[DayType, ...]:
+        return tuple(self.day_types[offset:offset + size])
+    
+    def relabel(self, subject_keys: Dict[str, str]) -> "LectureMatrix":
+        """
+        Same days and lectures under other subject ids, so students sharing a
+        calendar and timetable reuse one matrix
+        subject_keys: new subject_id -> subject id in this matrix (unknown ones get no lectures)
+        """
+        no_lectures = [0] * (self.num_days + 1)
+        prefix_by_id = dict(zip(self.subject_ids, self.lecture_prefix))
+        return LectureMatrix(
+            start_date=self.start_date,
+            day_types=self.day_types,
+            subject_ids=list(subject_keys),
+            lecture_prefix=[prefix_by_id.get(key, no_lectures) for key in subject_keys.values()],
+            weekday_prefix=self.weekday_prefix
+        )
 
 
 class VacationRecommendationEngine:
@@ -109,6 +176,41 @@ class VacationRecommendationEngine:
         day_name = date.strftime("%A")
         return self.weekly_schedule.get(day_name, [])
     
+    def build_lecture_matrix(self, start_date: datetime, search_days: int = 60) -> LectureMatrix:
+        """
+        Precompute day types and per-subject lecture counts for the horizon
+        Each day is classified once; the weekly schedule is resolved once per weekday
+        """
+        subject_ids = list(self.subjects.keys())
+        day_types = []
+        weekday_prefix = [0]
+        lecture_prefix = [[0] for _ in subject_ids]
+        scheduled_by_weekday = {}
+        
+        for day_offset in range(search_days):
+            date = start_date + timedelta(days=day_offset)
+            day_type = self.get_day_type(date)
+            day_types.append(day_type)
+            
+            scheduled = ()
+            if day_type == DayType.WEEKDAY:  # Only count actual class days
+                weekday = date.weekday()
+                if weekday not in scheduled_by_weekday:
+                    scheduled_by_weekday[weekday] = set(self.get_subjects_on_day(date))
+                scheduled = scheduled_by_weekday[weekday]
+            
+            weekday_prefix.append(weekday_prefix[-1] + (day_type == DayType.WEEKDAY))
+            for subject_id, prefix in zip(subject_ids, lecture_prefix):
+                prefix.append(prefix[-1] + (subject_id in scheduled))
+        
+        return LectureMatrix(
+            start_date=start_date,
+            day_types=day_types,
+            subject_ids=subject_ids,
+            lecture_prefix=lecture_prefix,
+            weekday_prefix=weekday_prefix
+        )
+    
     def generate_vacation_windows(
         self,
         start_date: datetime,
@@ -132,22 +234,19 @@ class VacationRecommendationEngine:
                 window_start = start_date + timedelta(days=day_offset)
                 window_end = window_start + timedelta(days=window_size - 1)
                 
-                # Build day-by-day breakdown
-                days = []
-                current = window_start
-                while current <= window_end:
-                    day_type = self.get_day_type(current)
-                    days.append((current, day_type))
-                    current += timedelta(days=1)
+                # Day types only; dated days are materialized on demand
+                day_types = tuple(
+                    self.get_day_type(window_start + timedelta(days=i)) for i in range(window_size)
+                )
                 
                 # Skip windows that are 100% holidays/weekends (no actual leave needed)
-                if all(dt != DayType.WEEKDAY for _, dt in days):
+                if DayType.WEEKDAY not in day_types:
                     continue
                 
                 windows.append(VacationWindow(
                     start_date=window_start,
                     end_date=window_end,
-                    days=days,
+                    day_types=day_types,
                     subject_impacts={},
                     is_safe=False
                 ))
@@ -159,17 +258,45 @@ class VacationRecommendationEngine:
         CORE LOGIC: Simulate attendance impact for a vacation window
         This is deterministic calculation - no AI involved
         """
-        subject_impacts = {}
-        all_subjects_safe = True
-        
-        for subject_id, subject in self.subjects.items():
+        missed_by_subject = {}
+        days = window.days
+        for subject_id in self.subjects:
             # Count how many lectures this subject has during vacation
             missed_lectures = 0
-            for date, day_type in window.days:
+            for date, day_type in days:
                 if day_type == DayType.WEEKDAY:  # Only count actual class days
                     subjects_today = self.get_subjects_on_day(date)
                     if subject_id in subjects_today:
                         missed_lectures += 1
+            missed_by_subject[subject_id] = missed_lectures
+        
+        window.subject_impacts, window.is_safe = self._build_subject_impacts(missed_by_subject)
+        
+        return window
+    
+    def evaluate_window(self, matrix: LectureMatrix, offset: int, size: int) -> VacationWindow:
+        """
+        Same result as simulate_vacation_impact, but missed lectures come
+        from the precomputed matrix instead of walking the window day by day
+        """
+        subject_impacts, is_safe = self._build_subject_impacts(matrix.missed_lectures(offset, size))
+        window_start = matrix.start_date + timedelta(days=offset)
+        
+        return VacationWindow(
+            start_date=window_start,
+            end_date=window_start + timedelta(days=size - 1),
+            day_types=matrix.window_day_types(offset, size),
+            subject_impacts=subject_impacts,
+            is_safe=is_safe
+        )
+    
+    def _build_subject_impacts(self, missed_by_subject: Dict[str, int]) -> Tuple[Dict[str, Dict], bool]:
+        """Project every subject's attendance given missed lectures per subject"""
+        subject_impacts = {}
+        all_subjects_safe = True
+        
+        for subject_id, subject in self.subjects.items():
+            missed_lectures = missed_by_subject[subject_id]
             
             # Calculate projected attendance
             projected_percentage = subject.simulate_absence(missed_lectures)
@@ -190,10 +317,7 @@ class VacationRecommendationEngine:
             if not is_safe:
                 all_subjects_safe = False
         
-        window.subject_impacts = subject_impacts
-        window.is_safe = all_subjects_safe
-        
-        return window
+        return subject_impacts, all_subjects_safe
     
     def rank_vacation_windows(self, windows: List[VacationWindow]) -> List[VacationWindow]:
         """
@@ -217,50 +341,307 @@ class VacationRecommendationEngine:
                 for impact in window.subject_impacts.values()
             )
             
-            # Scoring formula (tuned for student priorities)
-            score = (
-                window.leave_days * 10  # More consecutive leave = better
-                + window.holiday_count * 5  # More holidays in window = better
-                - total_drop * 2  # Less attendance drop = better
-                + min_buffer * 3  # More safety buffer = better
+            window.score = self._window_score(
+                window.leave_days, window.holiday_count, total_drop, min_buffer
             )
-            
-            window.score = score
         
         # Sort by score (highest first)
         return sorted(windows, key=lambda w: w.score, reverse=True)
     
+    @staticmethod
+    def _window_score(leave_days: int, holiday_count: int, total_drop: float, min_buffer: float) -> float:
+        # Scoring formula (tuned for student priorities)
+        return (
+            leave_days * 10  # More consecutive leave = better
+            + holiday_count * 5  # More holidays in window = better
+            - total_drop * 2  # Less attendance drop = better
+            + min_buffer * 3  # More safety buffer = better
+        )
+    
+    def iter_window_metrics(
+        self,
+        matrix: LectureMatrix,
+        min_window: int = DEFAULT_MIN_WINDOW,
+        max_window: int = DEFAULT_MAX_WINDOW
+    ) -> Iterator[Tuple[int, int, int, float, float]]:
+        """
+        Lazily yield (day_offset, window_size, leave_days, min_buffer, total_drop)
+        for every safe window that needs at least one leave day
+        
+        Missing more lectures can only lower attendance, so once a window is
+        unsafe every longer window from the same start is skipped.
+        """
+        subject_stats = [
+            (
+                subject,
+                prefix,
+                subject.threshold if subject.threshold > 0 else self.global_threshold,
+                subject.current_percentage
+            )
+            for subject, prefix in zip(
+                (self.subjects[subject_id] for subject_id in matrix.subject_ids),
+                matrix.lecture_prefix
+            )
+        ]
+        
+        for day_offset in range(matrix.num_days - min_window + 1):
+            longest = min(max_window, matrix.num_days - day_offset)
+            for window_size in range(min_window, longest + 1):
+                window_end = day_offset + window_size
+                
+                all_subjects_safe = True
+                min_buffer = None
+                total_drop = 0
+                for subject, prefix, threshold, current in subject_stats:
+                    projected = subject.simulate_absence(prefix[window_end] - prefix[day_offset])
+                    if projected < threshold:
+                        all_subjects_safe = False
+                        break
+                    buffer = projected - threshold
+                    if min_buffer is None or buffer < min_buffer:
+                        min_buffer = buffer
+                    total_drop += current - projected
+                
+                if not all_subjects_safe:
+                    break  # Longer windows from this start miss at least as much
+                
+                # Skip windows that are 100% holidays/weekends (no actual leave needed)
+                leave_days = matrix.leave_days(day_offset, window_size)
+                if leave_days == 0:
+                    continue
+                
+                yield day_offset, window_size, leave_days, min_buffer or 0.0, total_drop
+    
+    def iter_safe_windows(
+        self,
+        matrix: LectureMatrix,
+        min_window: int = DEFAULT_MIN_WINDOW,
+        max_window: int = DEFAULT_MAX_WINDOW
+    ) -> Iterator[Tuple[float, int, int]]:
+        """Lazily yield (score, day_offset, window_size) for every safe window"""
+        for day_offset, window_size, leave_days, min_buffer, total_drop in self.iter_window_metrics(
+            matrix, min_window, max_window
+        ):
+            score = self._window_score(leave_days, window_size - leave_days, total_drop, min_buffer)
+            yield score, day_offset, window_size
+    
     def find_safe_vacations(
         self,
         start_date: Optional[datetime] = None,
-        top_n: int = 3
+        top_n: int = 3,
+        backend: str = "python",
+        search_days: int = DEFAULT_SEARCH_DAYS,
+        min_window: int = DEFAULT_MIN_WINDOW,
+        max_window: int = DEFAULT_MAX_WINDOW,
+        matrix: Optional[LectureMatrix] = None
     ) -> List[VacationWindow]:
         """
         Main entry point: Find and rank safe vacation windows
         
+        Args:
+            backend: "python" (reference implementation) or "numpy" (vectorized)
+            search_days: Look ahead this many days
+            min_window / max_window: Vacation length bounds (calendar days)
+            matrix: Prebuilt lecture matrix for this start date and horizon
+        
         Returns:
             List of top N safe vacation windows with simulation results
         """
         if start_date is None:
             start_date = datetime.now()
         
-        # Step 1: Generate all possible windows
-        all_windows = self.generate_vacation_windows(start_date)
+        # Step 1: Precompute the day x subject lecture matrix once
+        if matrix is None:
+            matrix = self.build_lecture_matrix(start_date, search_days)
         
-        # Step 2: Simulate impact for each window
-        simulated_windows = [
-            self.simulate_vacation_impact(window) 
-            for window in all_windows
-        ]
+        if backend == "numpy":
+            return self._find_safe_vacations_vectorized(matrix, top_n, min_window, max_window)
+        if backend != "python":
+            raise ValueError(f"Unknown vacation engine backend: {backend}")
+        
+        # Step 2: Stream safe windows through a bounded heap of the best N.
+        # Ties go to shorter windows, then earlier starts (same as a stable sort
+        # over windows generated size by size).
+        best = heapq.nlargest(
+            top_n,
+            self.iter_safe_windows(matrix, min_window, max_window),
+            key=lambda candidate: (candidate[0], -candidate[2], -candidate[1])
+        )
+        
+        # Step 3: Materialize only the returned windows
+        top_windows = []
+        for score, day_offset, window_size in best:
+            window = self.evaluate_window(matrix, day_offset, window_size)
+            window.score = score
+            top_windows.append(window)
+        
+        return top_windows
+    
+    def find_pareto_vacations(
+        self,
+        start_date: Optional[datetime] = None,
+        search_days: int = DEFAULT_SEARCH_DAYS,
+        min_window: int = DEFAULT_MIN_WINDOW,
+        max_window: int = DEFAULT_MAX_WINDOW,
+        limit: Optional[int] = None,
+        matrix: Optional[LectureMatrix] = None
+    ) -> List[VacationWindow]:
+        """
+        Safe windows on the Pareto front of
+        (leave days: max, minimum buffer: max, total attendance drop: min)
+        
+        Windows with identical objectives (e.g. the same leave padded with a
+        weekend) are reported once, preferring the one with more free days,
+        then the earlier start. Sorted by leave days, then buffer, descending.
+        """
+        if start_date is None:
+            start_date = datetime.now()
+        
+        if matrix is None:
+            matrix = self.build_lecture_matrix(start_date, search_days)
+        
+        # Best representative per distinct objective point
+        points = {}
+        for day_offset, window_size, leave_days, min_buffer, total_drop in self.iter_window_metrics(
+            matrix, min_window, max_window
+        ):
+            objective = (leave_days, min_buffer, total_drop)
+            preference = (window_size - leave_days, -day_offset)
+            current = points.get(objective)
+            if current is None or preference > current[0]:
+                points[objective] = (preference, day_offset, window_size)
+        
+        # Sweep from most leave days down. `staircase` holds the accepted
+        # (buffer, drop) front of all longer leaves as parallel lists sorted by
+        # buffer ascending, where drop is then strictly ascending too; a point
+        # is dominated if some accepted point has buffer >= and drop <= its own.
+        stair_buffers: List[float] = []
+        stair_drops: List[float] = []
+        front = []
+        
+        by_leave: Dict[int, List[Tuple[float, float]]] = {}
+        for leave_days, min_buffer, total_drop in points:
+            by_leave.setdefault(leave_days, []).append((min_buffer, total_drop))
+        
+        for leave_days in sorted(by_leave, reverse=True):
+            survivors = []
+            best_drop = None
+            # Within one leave count: 2D front by buffer desc, then drop asc
+            for min_buffer, total_drop in sorted(by_leave[leave_days], key=lambda p: (-p[0], p[1])):
+                if best_drop is not None and total_drop >= best_drop:
+                    continue
+                best_drop = total_drop
+                
+                idx = bisect_left(stair_buffers, min_buffer)
+                if idx < len(stair_buffers) and stair_drops[idx] <= total_drop:
+                    continue  # A longer leave is at least as safe and cheap
+                survivors.append((min_buffer, total_drop))
+            
+            for min_buffer, total_drop in survivors:
+                front.append((leave_days, min_buffer, total_drop))
+                # Drop staircase points the new one dominates, then insert it
+                lo = bisect_left(stair_drops, total_drop)
+                hi = bisect_left(stair_buffers, min_buffer, lo)
+                while hi < len(stair_buffers) and stair_buffers[hi] == min_buffer:
+                    hi += 1
+                del stair_buffers[lo:hi], stair_drops[lo:hi]
+                stair_buffers.insert(lo, min_buffer)
+                stair_drops.insert(lo, total_drop)
+        
+        front.sort(key=lambda p: (-p[0], -p[1], p[2]))
+        if limit is not None:
+            front = front[:limit]
+        
+        pareto_windows = []
+        for objective in front:
+            _, day_offset, window_size = points[objective]
+            leave_days, min_buffer, total_drop = objective
+            window = self.evaluate_window(matrix, day_offset, window_size)
+            window.score = self._window_score(leave_days, window_size - leave_days, total_drop, min_buffer)
+            pareto_windows.append(window)
+        
+        return pareto_windows
+    
+    def _find_safe_vacations_vectorized(
+        self,
+        matrix: LectureMatrix,
+        top_n: int,
+        min_window: int,
+        max_window: int
+    ) -> List[VacationWindow]:
+        """
+        NumPy version of simulate + rank over all windows x subjects at once
+        Only the returned top N windows are materialized as VacationWindow objects
+        """
+        if np is None:
+            raise RuntimeError("numpy is required for the vectorized vacation engine backend")
+        if min_window > max_window:
+            return []  # No window sizes, same as the Python path
+        
+        # Candidate windows in the same order the Python path generates them
+        sizes = np.concatenate([
+            np.full(max(matrix.num_days - size + 1, 0), size, dtype=np.int64)
+            for size in range(min_window, max_window + 1)
+        ])
+        starts = np.concatenate([
+            np.arange(max(matrix.num_days - size + 1, 0), dtype=np.int64)
+            for size in range(min_window, max_window + 1)
+        ])
+        ends = starts + sizes
+        
+        weekday_prefix = np.asarray(matrix.weekday_prefix, dtype=np.int64)
+        leave_days = weekday_prefix[ends] - weekday_prefix[starts]
+        holiday_count = sizes - leave_days
+        
+        subjects = [self.subjects[subject_id] for subject_id in matrix.subject_ids]
+        attended = np.array([s.attended for s in subjects], dtype=np.float64)
+        total = np.array([s.total for s in subjects], dtype=np.int64)
+        threshold = np.array(
+            [s.threshold if s.threshold > 0 else self.global_threshold for s in subjects],
+            dtype=np.float64
+        )
+        current = np.array([s.current_percentage for s in subjects], dtype=np.float64)
+        
+        # windows x subjects
+        lecture_prefix = np.asarray(matrix.lecture_prefix, dtype=np.int64).reshape(len(subjects), matrix.num_days + 1)
+        missed = (lecture_prefix[:, ends] - lecture_prefix[:, starts]).T
+        new_total = total + missed
+        with np.errstate(divide="ignore", invalid="ignore"):
+            projected = np.where(new_total == 0, 100.0, (attended / new_total) * 100)
+        projected_buffer = projected - threshold
+        
+        is_safe = (leave_days > 0) & np.all(projected >= threshold, axis=1)
+        candidates = np.flatnonzero(is_safe)
+        if candidates.size == 0:
+            return []
+        
+        # Same formula and summation order as rank_vacation_windows
+        drop = current - projected[candidates]
+        total_drop = np.zeros(candidates.size)
+        for column in range(drop.shape[1]):
+            total_drop += drop[:, column]
+        if subjects:
+            min_buffer = projected_buffer[candidates].min(axis=1)
+        else:
+            min_buffer = np.zeros(candidates.size)  # Python path: no subjects -> buffer 0.0
+        scores = (
+            leave_days[candidates] * 10
+            + holiday_count[candidates] * 5
+            - total_drop * 2
+            + min_buffer * 3
+        )
         
-        # Step 3: Filter only safe windows
-        safe_windows = [w for w in simulated_windows if w.is_safe]
+        # Stable sort keeps generation order for ties, like sorted() does
+        order = np.argsort(-scores, kind="stable")[:top_n]
         
-        # Step 4: Rank safe windows
-        ranked_windows = self.rank_vacation_windows(safe_windows)
+        top_windows = []
+        for idx in order:
+            window_idx = candidates[idx]
+            window = self.evaluate_window(matrix, int(starts[window_idx]), int(sizes[window_idx]))
+            window.score = float(scores[idx])
+            top_windows.append(window)
         
-        # Return top N
-        return ranked_windows[:top_n]
+        return top_windows
 
 
 class AIReasoningLayer:
@@ -335,6 +716,7 @@ Do NOT make up any numbers - use only the data provided above.
     ) -> Dict:
         """
         Format final output for the frontend/API
+        The only place day-by-day breakdowns are built, for the returned windows
         """
         results = {
             "success": len(vacation_windows) > 0,
@@ -35,6 +35,24 @@ class ScheduleResponse(WeekdaySchedule):
     
     model_config = ConfigDict(populate_by_name=True)
 
+# --- Institution (shared) Models ---
+class InstitutionSlot(BaseModel):
+    start_time: str # "HH:MM"
+    end_time: str # "HH:MM"
+    subject_code: str # Matched to each student's subject by code
+    room: Optional[str] = None
+
+class InstitutionWeekdaySchedule(BaseModel):
+    weekday: int = Field(..., ge=0, le=6) # 0=Monday, 6=Sunday
+    slots: List[InstitutionSlot] = []
+
+class CalendarDayOverride(BaseModel):
+    day_type: str = Field(..., pattern="^(holiday|weekday)$") # weekday = extra class day
+    name: Optional[str] = None
+
+class BatchRecommendRequest(BaseModel):
+    user_ids: Optional[List[str]] = None # Default: everyone in the caller's institution
+
 # --- Attendance Models ---
 class AttendanceEntry(BaseModel):
     subject_id: str
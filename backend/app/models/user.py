@@ -9,6 +9,7 @@ class UserBase(BaseModel):
     branch: Optional[str] = None
     semester: Optional[str] = None
     profile_image: Optional[str] = None
+    institution_id: Optional[str] = None  # Shared calendar/timetable, e.g. "svp-cse-sem5"
 
 class UserCreate(UserBase):
     password: str
@@ -20,6 +21,7 @@ class UserUpdate(BaseModel):
     branch: Optional[str] = None
     semester: Optional[str] = None
     profile_image: Optional[str] = None
+    institution_id: Optional[str] = None
 
 class UserInDB(UserBase):
     id: Optional[str] = Field(default=None, alias="_id")
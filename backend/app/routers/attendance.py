@@ -1,21 +1,29 @@
+import json
 from datetime import date, datetime
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import JSONResponse, StreamingResponse
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from bson import ObjectId
+from pymongo import ReturnDocument
 
 from app.core import database
-from app.routers.auth import get_current_user
-from app.models.user import UserResponse
+from app.routers.auth import get_current_user_id
 from app.models.attendance import (
     SubjectCreate, SubjectResponse, 
     WeekdaySchedule, ScheduleResponse, 
     DailyAttendance, DailyAttendanceResponse, AttendanceStats,
     OverallAttendanceStats
 )
+from app.services.vacation_service import invalidate_recommendations
+from app.services import attendance_counters
+from app.services.attendance_stats import get_attendance_summary
 
 router = APIRouter()
 
+# Fields a history client may project; date is always returned (it is the cursor)
+HISTORY_FIELDS = {"date", "entries", "user_id"}
+
 # --- Helpers ---
 def fix_id(doc):
     if doc and "_id" in doc:
@@ -26,68 +34,71 @@ def fix_id(doc):
 @router.post("/subjects", response_model=SubjectResponse)
 async def create_subject(
     subject: SubjectCreate, 
-    current_user: UserResponse = Depends(get_current_user),
+    user_id: str = Depends(get_current_user_id),
     db: AsyncIOMotorDatabase = Depends(database.get_database)
 ):
     new_subject = subject.model_dump()
-    new_subject["user_id"] = current_user.id
+    new_subject["user_id"] = user_id
     
     result = await db["subjects"].insert_one(new_subject)
+    await invalidate_recommendations(db, user_id)
     created_subject = await db["subjects"].find_one({"_id": result.inserted_id})
     return fix_id(created_subject)
 
 @router.get("/subjects", response_model=List[SubjectResponse])
 async def list_subjects(
-    current_user: UserResponse = Depends(get_current_user),
+    user_id: str = Depends(get_current_user_id),
     db: AsyncIOMotorDatabase = Depends(database.get_database)
 ):
-    subjects = await db["subjects"].find({"user_id": current_user.id}).to_list(100)
+    subjects = await db["subjects"].find({"user_id": user_id}).to_list(100)
     return [fix_id(s) for s in subjects]
 
 @router.delete("/subjects/{subject_id}")
 async def delete_subject(
     subject_id: str,
-    current_user: UserResponse = Depends(get_current_user),
+    user_id: str = Depends(get_current_user_id),
     db: AsyncIOMotorDatabase = Depends(database.get_database)
 ):
-    result = await db["subjects"].delete_one({"_id": ObjectId(subject_id), "user_id": current_user.id})
+    result = await db["subjects"].delete_one({"_id": ObjectId(subject_id), "user_id": user_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Subject not found")
+    await invalidate_recommendations(db, user_id)
     return {"message": "Subject deleted"}
 
 # --- Schedule ---
 @router.post("/schedule", response_model=ScheduleResponse)
 async def update_schedule(
     schedule: WeekdaySchedule,
-    current_user: UserResponse = Depends(get_current_user),
+    user_id: str = Depends(get_current_user_id),
     db: AsyncIOMotorDatabase = Depends(database.get_database)
 ):
     # Upsert schedule for that weekday
     schedule_data = schedule.model_dump()
-    schedule_data["user_id"] = current_user.id
+    schedule_data["user_id"] = user_id
     
     await db["schedules"].replace_one(
-        {"user_id": current_user.id, "weekday": schedule.weekday},
+        {"user_id": user_id, "weekday": schedule.weekday},
         schedule_data,
         upsert=True
     )
+    await invalidate_recommendations(db, user_id)
     
-    saved_schedule = await db["schedules"].find_one({"user_id": current_user.id, "weekday": schedule.weekday})
+    saved_schedule = await db["schedules"].find_one({"user_id": user_id, "weekday": schedule.weekday})
     return fix_id(saved_schedule)
 
 @router.get("/schedule", response_model=List[ScheduleResponse])
 async def get_schedule(
-    current_user: UserResponse = Depends(get_current_user),
+    user_id: str = Depends(get_current_user_id),
     db: AsyncIOMotorDatabase = Depends(database.get_database)
 ):
-    schedules = await db["schedules"].find({"user_id": current_user.id}).to_list(7)
+    schedules = await db["schedules"].find({"user_id": user_id}).to_list(7)
     return [fix_id(s) for s in schedules]
 
 # --- Attendance ---
 @router.post("/", response_model=DailyAttendanceResponse)
 async def mark_attendance(
     attendance: DailyAttendance,
-    current_user: UserResponse = Depends(get_current_user),
+    user_id: str = Depends(get_current_user_id),
     db: AsyncIOMotorDatabase = Depends(database.get_database)
 ):
     # ... (rest of function)
@@ -95,62 +106,91 @@ async def mark_attendance(
     
     att_data = attendance.model_dump()
     att_data["date"] = date_str # Store as string for simpler querying or ISODate
-    att_data["user_id"] = current_user.id
+    att_data["user_id"] = user_id
     
-    await db["attendance_records"].replace_one(
-        {"user_id": current_user.id, "date": date_str},
+    # Counters must be built before the record is written, see attendance_counters
+    await attendance_counters.ensure_counters(db, user_id)
+    previous_record = await db["attendance_records"].find_one_and_replace(
+        {"user_id": user_id, "date": date_str},
         att_data,
-        upsert=True
+        projection={"entries": 1},
+        upsert=True,
+        return_document=ReturnDocument.BEFORE
     )
+    await attendance_counters.apply_attendance_change(
+        db,
+        user_id,
+        old_entries=previous_record.get("entries", []) if previous_record else [],
+        new_entries=att_data["entries"]
+    )
+    await invalidate_recommendations(db, user_id)
     
-    saved_record = await db["attendance_records"].find_one({"user_id": current_user.id, "date": date_str})
+    saved_record = await db["attendance_records"].find_one({"user_id": user_id, "date": date_str})
     return fix_id(saved_record)
 
 @router.get("/history", response_model=List[DailyAttendanceResponse])
 async def get_attendance_history(
-    current_user: UserResponse = Depends(get_current_user),
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    after: Optional[date] = Query(None, description="Cursor: only records after this date"),
+    limit: int = Query(1000, ge=1, le=1000),
+    fields: Optional[str] = Query(None, description="Comma-separated subset of date,entries,user_id"),
+    stream: bool = Query(False, description="Stream records as NDJSON"),
+    user_id: str = Depends(get_current_user_id),
     db: AsyncIOMotorDatabase = Depends(database.get_database)
 ):
-    # Fetch all records for the user. In prod, you'd want pagination or date filters.
-    records = await db["attendance_records"].find({"user_id": current_user.id}).to_list(1000)
-    return [fix_id(r) for r in records]
+    """
+    Attendance records ordered by date, paged with a keyset cursor on (user_id, date).
+    When a page is full, X-Next-Cursor holds the date to pass as `after` for the next page.
+    """
+    query = {"user_id": user_id}
+    date_filter = {}
+    if date_from:
+        date_filter["$gte"] = date_from.isoformat()
+    if after:
+        date_filter["$gt"] = after.isoformat()
+    if date_to:
+        date_filter["$lte"] = date_to.isoformat()
+    if date_filter:
+        query["date"] = date_filter
+
+    projection = None
+    if fields:
+        requested = {f.strip() for f in fields.split(",") if f.strip()}
+        unknown = requested - HISTORY_FIELDS
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+        projection = {f: 1 for f in requested | {"date"}}
+
+    cursor = db["attendance_records"].find(query, projection).sort("date", 1).limit(limit)
+
+    if stream:
+        async def ndjson():
+            async for record in cursor:
+                yield json.dumps(fix_id(record)) + "\n"
+        return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+    records = [fix_id(r) async for r in cursor]
+    headers = {"X-Next-Cursor": records[-1]["date"]} if len(records) == limit else None
+    return JSONResponse(content=records, headers=headers)
 
 @router.get("/stats", response_model=List[AttendanceStats])
 async def get_attendance_stats(
-    current_user: UserResponse = Depends(get_current_user),
+    user_id: str = Depends(get_current_user_id),
     db: AsyncIOMotorDatabase = Depends(database.get_database)
 ):
-    # Aggregate stats using MongoDB Pipeline
-    pipeline = [
-        # 1. Match records for this user
-        {"$match": {"user_id": current_user.id}},
-        # 2. Unwind entries to process individual subject attendance
-        {"$unwind": "$entries"},
-        # 3. Group by subject_id -> calculate totals
-        {"$group": {
-            "_id": "$entries.subject_id",
-            "total": {"$sum": 1},
-            "attended": {
-                "$sum": {
-                    "$cond": [{"$eq": ["$entries.status", "P"]}, 1, 0]
-                }
-            }
-        }}
-    ]
-
-    agg_results = await db["attendance_records"].aggregate(pipeline).to_list(None)
-    agg_map = {doc["_id"]: doc for doc in agg_results}
+    summary = await get_attendance_summary(db, user_id)
 
     # Fetch subjects to ensure we show all subjects, even those with 0 attendance
-    subjects = await db["subjects"].find({"user_id": current_user.id}).to_list(100)
+    subjects = await db["subjects"].find({"user_id": user_id}).to_list(100)
     
     result = []
     for sub in subjects:
         sid = str(sub["_id"])
-        data = agg_map.get(sid, {"total": 0, "attended": 0})
+        data = summary["subjects"].get(sid, {"present": 0, "total": 0})
         
         total = data["total"]
-        attended = data["attended"]
+        attended = data["present"]
         pct = (attended / total * 100) if total > 0 else 0.0
         bunk_rate = (100 - pct) if total > 0 else 0.0
         
@@ -166,24 +206,16 @@ async def get_attendance_stats(
 
 @router.get("/stats/overall", response_model=OverallAttendanceStats)
 async def get_overall_attendance_stats(
-    current_user: UserResponse = Depends(get_current_user),
+    user_id: str = Depends(get_current_user_id),
     db: AsyncIOMotorDatabase = Depends(database.get_database)
 ):
-    attended_classes = 0
-    absent_classes = 0
+    overall = (await get_attendance_summary(db, user_id))["overall"]
     
-    # Count attended and absent from attendance records
-    cursor = db["attendance_records"].find({"user_id": current_user.id})
-    async for record in cursor:
-        for entry in record.get("entries", []):
-            status = entry["status"]
-            if status == "P":
-                attended_classes += 1
-            elif status == "A":
-                absent_classes += 1
+    attended_classes = overall["attended"]
+    absent_classes = overall["missed"]
     
     # Total = Attended + Absent (only tracked lectures)
-    total_classes = attended_classes + absent_classes
+    total_classes = overall["total"]
     
     # Percentage = Attended / Total
     pct = (attended_classes / total_classes * 100) if total_classes > 0 else 0.0
@@ -197,9 +229,11 @@ async def get_overall_attendance_stats(
 
 @router.delete("/clear")
 async def clear_all_attendance(
-    current_user: UserResponse = Depends(get_current_user),
+    user_id: str = Depends(get_current_user_id),
     db: AsyncIOMotorDatabase = Depends(database.get_database)
 ):
     """Delete all attendance records for the current user"""
-    result = await db["attendance_records"].delete_many({"user_id": current_user.id})
+    result = await db["attendance_records"].delete_many({"user_id": user_id})
+    await attendance_counters.reset_counters(db, user_id)
+    await invalidate_recommendations(db, user_id)
     return {"message": f"Deleted {result.deleted_count} attendance records", "deleted_count": result.deleted_count}
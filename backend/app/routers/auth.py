@@ -3,14 +3,33 @@ from typing import Annotated
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from app.core import security, database
+from app.core.cache import TTLCache
+from app.core.executor import ExecutorBusyError
 from app.models.user import UserCreate, UserResponse, Token, UserInDB, UserUpdate
 from app.core.config import settings
+from app.services.vacation_service import invalidate_recommendations
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from bson import ObjectId
 
 router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
 
+# Token subject (email) -> UserResponse, so protected routes skip the users lookup.
+# Per worker; see USER_CACHE_* in config for the cross-worker staleness window
+user_cache = TTLCache(maxsize=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL_SECONDS)
+
+async def _hash_password(password: str) -> str:
+    try:
+        return await security.get_password_hash_async(password)
+    except ExecutorBusyError:
+        raise HTTPException(status_code=503, detail="Server busy, please retry", headers={"Retry-After": "1"})
+
+async def _verify_password(plain_password: str, hashed_password: str) -> bool:
+    try:
+        return await security.verify_password_async(plain_password, hashed_password)
+    except ExecutorBusyError:
+        raise HTTPException(status_code=503, detail="Server busy, please retry", headers={"Retry-After": "1"})
+
 @router.post("/register", response_model=UserResponse)
 async def register(user: UserCreate, db: AsyncIOMotorDatabase = Depends(database.get_database)):
     existing_user = await db["users"].find_one({"email": user.email})
@@ -20,7 +39,7 @@ async def register(user: UserCreate, db: AsyncIOMotorDatabase = Depends(database
             detail="Email already registered",
         )
     
-    hashed_password = security.get_password_hash(user.password)
+    hashed_password = await _hash_password(user.password)
     user_in_db = UserInDB(**user.model_dump(), hashed_password=hashed_password)
     
     new_user = await db["users"].insert_one(user_in_db.model_dump(by_alias=True, exclude={"id"}))
@@ -32,7 +51,7 @@ async def register(user: UserCreate, db: AsyncIOMotorDatabase = Depends(database
 @router.post("/login", response_model=Token)
 async def login(form_data: Annotated[OAuth2PasswordRequestForm, Depends()], db: AsyncIOMotorDatabase = Depends(database.get_database)):
     user = await db["users"].find_one({"email": form_data.username})
-    if not user or not security.verify_password(form_data.password, user["hashed_password"]):
+    if not user or not await _verify_password(form_data.password, user["hashed_password"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -40,12 +59,15 @@ async def login(form_data: Annotated[OAuth2PasswordRequestForm, Depends()], db:
         )
     
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    claims = {"sub": user["email"]}
+    if settings.JWT_INCLUDE_USER_ID:
+        claims["uid"] = str(user["_id"])
     access_token = security.create_access_token(
-        data={"sub": user["email"]}, expires_delta=access_token_expires
+        data=claims, expires_delta=access_token_expires
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
-async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)], db: AsyncIOMotorDatabase = Depends(database.get_database)):
+def _decode_token(token: str) -> dict:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -53,18 +75,38 @@ async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)], db: As
     )
     try:
         payload = security.jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
+        if payload.get("sub") is None:
             raise credentials_exception
     except security.JWTError:
         raise credentials_exception
+    return payload
+
+async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)], db: AsyncIOMotorDatabase = Depends(database.get_database)):
+    email: str = _decode_token(token)["sub"]
+    
+    cached_user = user_cache.get(email)
+    if cached_user is not None:
+        return cached_user
         
     user = await db["users"].find_one({"email": email})
     if user is None:
-        raise credentials_exception
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
         
     user["_id"] = str(user["_id"])
-    return UserResponse(**user)
+    current_user = UserResponse(**user)
+    user_cache.set(email, current_user)
+    return current_user
+
+async def get_current_user_id(token: Annotated[str, Depends(oauth2_scheme)], db: AsyncIOMotorDatabase = Depends(database.get_database)) -> str:
+    """For routes that only need the id: read it from the token when present"""
+    payload = _decode_token(token)
+    if payload.get("uid"):
+        return payload["uid"]
+    return (await get_current_user(token, db)).id
 
 @router.get("/me", response_model=UserResponse)
 async def read_users_me(current_user: UserResponse = Depends(get_current_user)):
@@ -79,10 +121,13 @@ async def update_user(
     update_data = {k: v for k, v in user_update.model_dump().items() if v is not None}
     
     if "password" in update_data:
-        update_data["hashed_password"] = security.get_password_hash(update_data.pop("password"))
+        update_data["hashed_password"] = await _hash_password(update_data.pop("password"))
         
     if update_data:
         await db["users"].update_one({"_id": ObjectId(current_user.id)}, {"$set": update_data})
+        user_cache.pop(current_user.email)
+        if "institution_id" in update_data:
+            await invalidate_recommendations(db, current_user.id)
         
     updated_user = await db["users"].find_one({"_id": ObjectId(current_user.id)})
     updated_user["_id"] = str(updated_user["_id"])
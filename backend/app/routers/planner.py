@@ -1,152 +1,428 @@
-from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Request
+from datetime import datetime, date
+from fastapi import APIRouter, Depends, HTTPException, Request, Query
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from app.core import database
-from app.routers.auth import get_current_user
-from app.models.user import UserResponse
-from app.services.ocr import extract_text_from_file
+from app.routers.auth import get_current_user, get_current_user_id
+from app.services.ocr import ocr_executor
+from app.services import calendar_extractions, calendar_uploads, recommendation_store
+from app.services.uploads import (
+    MalformedUploadError,
+    SpooledUpload,
+    UploadTooLargeError,
+    discard_upload,
+    spool_request_file
+)
+from app.core.config import settings
 from app.services.ai_engine import ai_engine
-from app.models.attendance import SubjectResponse, ScheduleResponse
+from app.services.planner_inputs import load_engine_inputs
+from app.services.batch_recommendations import recommend_for_users
+from app.services.institutions import (
+    is_institution_admin,
+    set_institution_timetable,
+    set_user_day_override,
+    clear_user_day_override,
+    INSTITUTION_SCHEDULES_COLLECTION
+)
+from app.services.attendance_stats import get_attendance_summary, tracked_lectures
+from app.models.attendance import (
+    SubjectResponse,
+    ScheduleResponse,
+    InstitutionWeekdaySchedule,
+    CalendarDayOverride,
+    BatchRecommendRequest
+)
+from app.models.user import UserResponse
+from typing import List, Literal
+from bson import ObjectId
+from app.core.executor import ExecutorBusyError, ExecutorTimeoutError
+from app.core.vacation_engine import DEFAULT_SEARCH_DAYS, DEFAULT_MIN_WINDOW, DEFAULT_MAX_WINDOW
 
-from app.services.vacation_service import generate_vacation_plan
+from app.services.vacation_service import (
+    run_vacation_plan,
+    run_extra_attendance_plan,
+    engine_executor,
+    recommendation_cache,
+    recommendation_cache_key,
+    recommendation_generation,
+    cached_recommendation,
+    cache_recommendation,
+    recommendation_response,
+    invalidate_recommendations,
+    DEFAULT_SEARCH_PARAMS
+)
 
 router = APIRouter(tags=["Planner"])
 
+# Upload routes read the body themselves (see _spool_upload); document the form for /docs
+FILE_UPLOAD_BODY = {"requestBody": {"required": True, "content": {"multipart/form-data": {"schema": {
+    "type": "object",
+    "required": ["file"],
+    "properties": {"file": {"type": "string", "format": "binary"}}
+}}}}}
+
 @router.post("/recommend")
 async def recommend_vacation(
+    search_days: int = Query(DEFAULT_SEARCH_DAYS, ge=7, le=settings.VACATION_MAX_SEARCH_DAYS),
+    min_window: int = Query(DEFAULT_MIN_WINDOW, ge=1, le=settings.VACATION_MAX_WINDOW_DAYS),
+    max_window: int = Query(DEFAULT_MAX_WINDOW, ge=1, le=settings.VACATION_MAX_WINDOW_DAYS),
+    objective: Literal["score", "pareto"] = "score",
     current_user: UserResponse = Depends(get_current_user),
     db: AsyncIOMotorDatabase = Depends(database.get_database)
 ):
-    # 1. Fetch Subjects
-    subjects_docs = await db["subjects"].find({"user_id": current_user.id}).to_list(100)
-    subject_map = {str(s["_id"]): s["name"] for s in subjects_docs} # id -> name
-    
-    # 2. Fetch Attendance Stats
-    stats = {} # subject_id -> {attended: int, total: int}
-    for sid in subject_map.keys():
-        stats[sid] = {"attended": 0, "total": 0}
-        
-    cursor = db["attendance_records"].find({"user_id": current_user.id})
-    async for record in cursor:
-        for entry in record.get("entries", []):
-            sid = entry["subject_id"]
-            if sid in stats and entry["status"] in ["P", "A"]:
-                stats[sid]["total"] += 1
-                if entry["status"] == "P":
-                    stats[sid]["attended"] += 1
-
-    subjects_data = []
-    for sid, data in stats.items():
-        subjects_data.append({
-            "id": sid,
-            "name": subject_map[sid],
-            "attended": data["attended"],
-            "total": data["total"]
-        })
-
-    # 3. Fetch Schedule
-    schedule_docs = await db["schedules"].find({"user_id": current_user.id}).to_list(7)
-    weekly_schedule = {}
-    weekday_map = {0: "Monday", 1: "Tuesday", 2: "Wednesday", 3: "Thursday", 4: "Friday", 5: "Saturday", 6: "Sunday"}
+    """
+    objective=score returns the top 3 windows by weighted score;
+    objective=pareto returns every window on the (leave days, min buffer, total drop) front
+    """
+    if min_window > max_window or max_window > search_days:
+        raise HTTPException(status_code=422, detail="Require min_window <= max_window <= search_days")
     
-    for doc in schedule_docs:
-        day_int = doc["weekday"]
-        day_name = weekday_map.get(day_int)
-        
-        subjects = []
-        if "slots" in doc:
-            for slot in doc["slots"]:
-                if "subject_id" in slot:
-                    subjects.append(slot["subject_id"])
-        
-        if day_name:
-            weekly_schedule[day_name] = subjects
-
-    # 4. Fetch Calendar
-    calendar_doc = await db["academic_calendars"].find_one({"user_id": current_user.id}, sort=[("_id", -1)])
-    academic_calendar = {}
-    from app.core.vacation_engine import DayType
-    
-    if calendar_doc and "parsed_events" in calendar_doc:
-        holidays = calendar_doc["parsed_events"].get("holidays", [])
-        for h in holidays:
-            if isinstance(h, str):
-                academic_calendar[h] = DayType.HOLIDAY
-            elif isinstance(h, dict) and "date" in h:
-                academic_calendar[h["date"]] = DayType.HOLIDAY
-
-    # 5. Call Service
-    result = generate_vacation_plan(
-        subjects_data=subjects_data,
-        weekly_schedule=weekly_schedule,
-        academic_calendar=academic_calendar,
-        min_attendance=75
-    )
+    user_id = current_user.id
+    institution_id = current_user.institution_id
+    min_attendance = settings.DEFAULT_MIN_ATTENDANCE
+    start_date = datetime.combine(date.today(), datetime.min.time())
+    search_params = {
+        "search_days": search_days,
+        "min_window": min_window,
+        "max_window": max_window,
+        "objective": objective
+    }
+    cache_key = recommendation_cache_key(user_id, start_date, min_attendance, **search_params)
+    generation = await recommendation_generation(db, user_id)
+    cached = cached_recommendation(cache_key, generation)
+    if cached is not None:
+        return cached
+
+    # Precomputed overnight, unless the inputs changed since
+    materialize = search_params == DEFAULT_SEARCH_PARAMS
+    if materialize:
+        stored = await recommendation_store.get_fresh(db, user_id, start_date)
+        if stored is not None:
+            cache_recommendation(cache_key, generation, stored)
+            return stored
+    computed_from = datetime.utcnow()
+
+    # 1-4. Subjects with attendance, schedule and calendar
+    engine_inputs = await load_engine_inputs(db, user_id, institution_id, start_date, search_days)
+
+    # 5. Call Service (off the event loop)
+    try:
+        result = await run_vacation_plan(
+            **engine_inputs,
+            min_attendance=min_attendance,
+            start_date=start_date,
+            **search_params
+        )
+    except ExecutorBusyError:
+        raise HTTPException(
+            status_code=503,
+            detail="Vacation planner is busy, please retry shortly",
+            headers={"Retry-After": "2"}
+        )
+    except ExecutorTimeoutError:
+        raise HTTPException(status_code=504, detail="Vacation planning timed out")
 
     # 6. Transform for Frontend
-    windows = []
-    if result["success"]:
-        for opt in result["vacation_options"]:
-            windows.append({
-                "start_date": opt["start_date"],
-                "end_date": opt["end_date"],
-                "reason": f"Safe! Leaves: {opt['leave_days']}, Score: {opt['score']}"
-            })
-
-    return {
-        "windows": windows,
-        "ai_advice": result["ai_advice"],
-        "debug_info": {"subjects_count": len(subjects_data)}
+    response = recommendation_response(
+        result, objective, len(engine_inputs["subjects_data"]), search_params
+    )
+    cache_recommendation(cache_key, generation, response)
+    if materialize:
+        await recommendation_store.store(db, user_id, start_date, response, computed_from)
+    return response
+
+@router.post("/recommend/batch")
+async def recommend_vacation_batch(
+    request: BatchRecommendRequest,
+    search_days: int = Query(DEFAULT_SEARCH_DAYS, ge=7, le=settings.VACATION_MAX_SEARCH_DAYS),
+    min_window: int = Query(DEFAULT_MIN_WINDOW, ge=1, le=settings.VACATION_MAX_WINDOW_DAYS),
+    max_window: int = Query(DEFAULT_MAX_WINDOW, ge=1, le=settings.VACATION_MAX_WINDOW_DAYS),
+    objective: Literal["score", "pareto"] = "score",
+    current_user: UserResponse = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(database.get_database)
+):
+    """
+    /recommend for many students of the caller's institution in one call
+    Institution admins (advisors) only; members are looked up server-side
+    """
+    institution_id = await _require_institution_admin(db, current_user)
+    if min_window > max_window or max_window > search_days:
+        raise HTTPException(status_code=422, detail="Require min_window <= max_window <= search_days")
+    
+    query = {"institution_id": institution_id}
+    requested = None
+    if request.user_ids is not None:
+        if len(request.user_ids) > settings.BATCH_RECOMMEND_MAX_USERS:
+            raise HTTPException(status_code=422, detail=f"At most {settings.BATCH_RECOMMEND_MAX_USERS} users per batch")
+        requested = list(dict.fromkeys(request.user_ids))
+        query["_id"] = {"$in": [ObjectId(uid) for uid in requested if ObjectId.is_valid(uid)]}
+    
+    # One extra row tells whether the institution has more members than one batch holds
+    members = await db["users"].find(query, {"_id": 1}).sort("_id", 1).to_list(settings.BATCH_RECOMMEND_MAX_USERS + 1)
+    truncated = len(members) > settings.BATCH_RECOMMEND_MAX_USERS
+    members = members[:settings.BATCH_RECOMMEND_MAX_USERS]
+    users = [{"id": str(m["_id"]), "institution_id": institution_id} for m in members]
+    
+    search_params = {
+        "search_days": search_days,
+        "min_window": min_window,
+        "max_window": max_window,
+        "objective": objective
     }
+    start_date = datetime.combine(date.today(), datetime.min.time())
+    try:
+        batch = await recommend_for_users(db, users, start_date, settings.DEFAULT_MIN_ATTENDANCE, search_params)
+    except ExecutorBusyError:
+        raise HTTPException(
+            status_code=503,
+            detail="Vacation planner is busy, please retry shortly",
+            headers={"Retry-After": "5"}
+        )
+    except ExecutorTimeoutError:
+        raise HTTPException(status_code=504, detail="Vacation planning timed out")
+    
+    found = {u["id"] for u in users}
+    batch["skipped"] = [uid for uid in requested if uid not in found] if requested else []
+    # Members past the limit were not processed
+    batch["truncated"] = truncated
+    batch["max_users"] = settings.BATCH_RECOMMEND_MAX_USERS
+    return batch
 
+@router.post("/attend-then-leave")
+async def plan_attend_then_leave(
+    start_date: date,
+    end_date: date,
+    current_user: UserResponse = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(database.get_database)
+):
+    """Fewest class days to attend before a vacation so every subject stays above the minimum"""
+    today = date.today()
+    if start_date < today or end_date < start_date:
+        raise HTTPException(status_code=422, detail="Require today <= start_date <= end_date")
+    if (end_date - start_date).days + 1 > settings.VACATION_MAX_WINDOW_DAYS:
+        raise HTTPException(status_code=422, detail=f"Vacation can be at most {settings.VACATION_MAX_WINDOW_DAYS} days")
+    horizon = (end_date - today).days + 1
+    if horizon > settings.VACATION_MAX_SEARCH_DAYS:
+        raise HTTPException(status_code=422, detail=f"Vacation must end within {settings.VACATION_MAX_SEARCH_DAYS} days")
+    
+    min_attendance = settings.DEFAULT_MIN_ATTENDANCE
+    today_start = datetime.combine(today, datetime.min.time())
+    engine_inputs = await load_engine_inputs(db, current_user.id, current_user.institution_id, today_start, horizon)
+    
+    try:
+        return await run_extra_attendance_plan(
+            **engine_inputs,
+            min_attendance=min_attendance,
+            start_date=today_start,
+            window_start=datetime.combine(start_date, datetime.min.time()),
+            window_end=datetime.combine(end_date, datetime.min.time())
+        )
+    except ExecutorBusyError:
+        raise HTTPException(
+            status_code=503,
+            detail="Vacation planner is busy, please retry shortly",
+            headers={"Retry-After": "2"}
+        )
+    except ExecutorTimeoutError:
+        raise HTTPException(status_code=504, detail="Vacation planning timed out")
 
-@router.post("/academic-calendar/upload")
+@router.get("/recommend/cache-stats")
+async def recommendation_cache_stats(user_id: str = Depends(get_current_user_id)):
+    return {**recommendation_cache.stats(), "executor": engine_executor.stats()}
+
+
+@router.post("/academic-calendar/upload", openapi_extra=FILE_UPLOAD_BODY)
 async def upload_academic_calendar(
-    file: UploadFile = File(...),
+    request: Request,
+    user_id: str = Depends(get_current_user_id),
+    db: AsyncIOMotorDatabase = Depends(database.get_database)
+):
+    upload = await _spool_upload(request)
+    try:
+        result, deduplicated = await calendar_uploads.process_calendar_upload(
+            db, user_id, upload, upload.content_type, upload.filename
+        )
+    except calendar_uploads.CalendarUploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    except ExecutorBusyError:
+        raise _ocr_busy()
+    except ExecutorTimeoutError:
+        raise HTTPException(status_code=504, detail="Calendar OCR timed out")
+    finally:
+        discard_upload(upload.path)
+    
+    return {"message": "Calendar processed", "data": result, "deduplicated": deduplicated}
+
+@router.post("/academic-calendar/jobs", status_code=202, openapi_extra=FILE_UPLOAD_BODY)
+async def submit_academic_calendar_job(
+    request: Request,
+    user_id: str = Depends(get_current_user_id),
+    db: AsyncIOMotorDatabase = Depends(database.get_database)
+):
+    """Queue a calendar upload; poll GET /academic-calendar/jobs/{job_id} for the result"""
+    # Cheap early refusal; submit_calendar_job takes the actual queue slot
+    if ocr_executor.is_full():
+        raise _ocr_busy()
+    
+    upload = await _spool_upload(request)
+    try:
+        job_id = await calendar_uploads.submit_calendar_job(
+            db, user_id, upload, upload.content_type, upload.filename
+        )
+    except ExecutorBusyError:
+        discard_upload(upload.path)
+        raise _ocr_busy()
+    except Exception:
+        discard_upload(upload.path)
+        raise
+    return {"job_id": job_id, "status": "queued"}
+
+@router.get("/academic-calendar/jobs/{job_id}")
+async def get_academic_calendar_job(
+    job_id: str,
+    user_id: str = Depends(get_current_user_id),
+    db: AsyncIOMotorDatabase = Depends(database.get_database)
+):
+    job = await calendar_uploads.get_calendar_job(db, user_id, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    job["job_id"] = job.pop("_id")
+    return job
+
+async def _spool_upload(request: Request) -> SpooledUpload:
+    """
+    The multipart "file" field, streamed to disk from the request body.
+    Called after authentication, so anonymous requests never upload anything
+    """
+    try:
+        return await spool_request_file(request)
+    except UploadTooLargeError:
+        raise HTTPException(
+            status_code=413,
+            detail=f"File too large (max {settings.UPLOAD_MAX_BYTES // (1024 * 1024)} MB)"
+        )
+    except MalformedUploadError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+def _ocr_busy() -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="Calendar processing is busy, please retry shortly",
+        headers={"Retry-After": "5"}
+    )
+
+# --- Institution (shared) calendar and timetable ---
+def _require_institution(current_user: UserResponse) -> str:
+    if not current_user.institution_id:
+        raise HTTPException(status_code=400, detail="Set institution_id on your profile first")
+    return current_user.institution_id
+
+async def _require_institution_admin(db: AsyncIOMotorDatabase, current_user: UserResponse) -> str:
+    """Membership is self-assigned; changing shared data needs a server-side admin grant"""
+    institution_id = _require_institution(current_user)
+    if not await is_institution_admin(db, institution_id, current_user.id):
+        raise HTTPException(status_code=403, detail="Only institution admins can do this")
+    return institution_id
+
+@router.post("/institution/calendar/upload", openapi_extra=FILE_UPLOAD_BODY)
+async def upload_institution_calendar(
+    request: Request,
     current_user: UserResponse = Depends(get_current_user),
     db: AsyncIOMotorDatabase = Depends(database.get_database)
 ):
-    # 1. OCR
-    text = await extract_text_from_file(file)
-    if not text:
-        raise HTTPException(status_code=400, detail="Could not extract text from file")
-    
-    # 2. AI Extraction
-    result = ai_engine.extract_calendar_events(text)
-    if not result:
-        raise HTTPException(status_code=500, detail="AI extraction failed")
-        
-    # 3. Save to DB
-    doc = {
-        "user_id": current_user.id,
-        "raw_text": text[:500] + "...",
-        "parsed_events": result,
-        "uploaded_at": str(file.filename)
-    }
-    await db["academic_calendars"].insert_one(doc)
+    """Calendar shared by every student of the uploader's institution (admins only)"""
+    institution_id = await _require_institution_admin(db, current_user)
+    upload = await _spool_upload(request)
+    try:
+        result, deduplicated = await calendar_uploads.process_calendar_upload(
+            db, current_user.id, upload, upload.content_type, upload.filename, institution_id=institution_id
+        )
+    except calendar_uploads.CalendarUploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    except ExecutorBusyError:
+        raise _ocr_busy()
+    except ExecutorTimeoutError:
+        raise HTTPException(status_code=504, detail="Calendar processing timed out")
+    finally:
+        discard_upload(upload.path)
     
-    return {"message": "Calendar processed", "data": result}
+    return {"message": "Institution calendar processed", "institution_id": institution_id, "data": result, "deduplicated": deduplicated}
+
+@router.put("/institution/timetable")
+async def update_institution_timetable(
+    schedules: List[InstitutionWeekdaySchedule],
+    current_user: UserResponse = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(database.get_database)
+):
+    """Admins only"""
+    institution_id = await _require_institution_admin(db, current_user)
+    await set_institution_timetable(db, institution_id, [s.model_dump() for s in schedules])
+    return {"message": "Institution timetable updated", "weekdays": sorted(s.weekday for s in schedules)}
+
+@router.get("/institution/timetable", response_model=List[InstitutionWeekdaySchedule])
+async def get_institution_timetable(
+    current_user: UserResponse = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(database.get_database)
+):
+    institution_id = _require_institution(current_user)
+    docs = await db[INSTITUTION_SCHEDULES_COLLECTION].find({"institution_id": institution_id}).sort("weekday", 1).to_list(7)
+    return [InstitutionWeekdaySchedule(**doc) for doc in docs]
+
+@router.put("/calendar/days/{day}")
+async def override_calendar_day(
+    day: date,
+    override: CalendarDayOverride,
+    user_id: str = Depends(get_current_user_id),
+    db: AsyncIOMotorDatabase = Depends(database.get_database)
+):
+    """Personal override of one day (e.g. an extra class day or a section-only holiday)"""
+    await set_user_day_override(db, user_id, day.isoformat(), override.day_type, override.name)
+    await invalidate_recommendations(db, user_id)
+    return {"date": day.isoformat(), **override.model_dump()}
+
+@router.delete("/calendar/days/{day}")
+async def remove_calendar_day_override(
+    day: date,
+    user_id: str = Depends(get_current_user_id),
+    db: AsyncIOMotorDatabase = Depends(database.get_database)
+):
+    if not await clear_user_day_override(db, user_id, day.isoformat()):
+        raise HTTPException(status_code=404, detail="No override for this day")
+    await invalidate_recommendations(db, user_id)
+    return {"message": "Override removed"}
+
+@router.get("/academic-calendar/dedup-stats")
+async def calendar_dedup_stats(
+    user_id: str = Depends(get_current_user_id),
+    db: AsyncIOMotorDatabase = Depends(database.get_database)
+):
+    return {**await calendar_extractions.dedup_stats(db), "ocr": ocr_executor.stats()}
 
 @router.post("/vacation/generate")
 async def generate_vacation(
     request: Request,
-    current_user: UserResponse = Depends(get_current_user),
+    user_id: str = Depends(get_current_user_id),
     db: AsyncIOMotorDatabase = Depends(database.get_database)
 ):
     # Gather Context
-    subjects = await db["subjects"].find({"user_id": current_user.id}).to_list(100)
-    schedule = await db["schedules"].find({"user_id": current_user.id}).to_list(7)
+    subjects = await db["subjects"].find({"user_id": user_id}).to_list(100)
+    schedule = await db["schedules"].find({"user_id": user_id}).to_list(7)
     
-    # Get attendance stats (simplified inline logic from attendance router)
-    stats = {} # In real app, call the service or common logic
+    # Attendance per subject name, from the shared aggregation service
+    summary = await get_attendance_summary(db, user_id)
+    stats = {}
+    for sub in subjects:
+        counts = tracked_lectures(summary["subjects"].get(str(sub["_id"]), {"present": 0, "absent": 0}))
+        pct = (counts["attended"] / counts["total"] * 100) if counts["total"] > 0 else 0.0
+        stats[sub["name"]] = {**counts, "percentage": round(pct, 2)}
     
-    holidays_doc = await db["academic_calendars"].find_one({"user_id": current_user.id}, sort=[("_id", -1)])
+    holidays_doc = await db["academic_calendars"].find_one({"user_id": user_id}, sort=[("_id", -1)])
     holidays = holidays_doc.get("parsed_events", {}).get("holidays", []) if holidays_doc else []
     
     request_data = await request.json()
     query = request_data.get("query")
     
-    plan = ai_engine.generate_vacation_plan(
-        attendance_summary=stats, # Mocked for now, needs real stats
+    plan = await ai_engine.generate_vacation_plan(
+        attendance_summary=stats,
         schedule=[s for s in schedule if "weekday" in s],
         holidays=holidays,
         query=query
@@ -157,13 +433,13 @@ async def generate_vacation(
 @router.post("/study-plan/generate")
 async def generate_study_plan(
     preferences: dict,
-    current_user: UserResponse = Depends(get_current_user),
+    user_id: str = Depends(get_current_user_id),
     db: AsyncIOMotorDatabase = Depends(database.get_database)
 ):
-    subjects = await db["subjects"].find({"user_id": current_user.id}).to_list(100)
+    subjects = await db["subjects"].find({"user_id": user_id}).to_list(100)
     subject_names = [s["name"] for s in subjects]
     
-    plan = ai_engine.generate_study_plan(
+    plan = await ai_engine.generate_study_plan(
         subjects=subject_names,
         preferences=preferences
     )
@@ -171,7 +447,7 @@ async def generate_study_plan(
     # Save plan
     if plan:
         await db["study_plans"].insert_one({
-            "user_id": current_user.id,
+            "user_id": user_id,
             "plan": plan,
             "created_at": "now"
         })
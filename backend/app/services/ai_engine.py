@@ -1,42 +1,92 @@
 import os
 import json
-from groq import Groq
+import random
+import asyncio
+import httpx
+from groq import AsyncGroq, APIConnectionError, APITimeoutError, RateLimitError, InternalServerError
 from app.core.config import settings
+from app.services.llm_cache import llm_cache, prompt_cache_key
+
+# Worth another attempt: network trouble, timeouts, rate limits and 5xx
+RETRYABLE_ERRORS = (APIConnectionError, APITimeoutError, RateLimitError, InternalServerError, asyncio.TimeoutError)
 
 class AIEngine:
     def __init__(self):
         self.client = None
+        self._semaphore = None
         if settings.GROQ_API_KEY:
-            self.client = Groq(api_key=settings.GROQ_API_KEY)
+            self.client = AsyncGroq(
+                api_key=settings.GROQ_API_KEY,
+                base_url=settings.GROQ_BASE_URL,
+                timeout=settings.AI_REQUEST_TIMEOUT_SECONDS,
+                max_retries=0,  # Retried below with jittered backoff
+                http_client=httpx.AsyncClient(
+                    timeout=settings.AI_REQUEST_TIMEOUT_SECONDS,
+                    limits=httpx.Limits(
+                        max_connections=settings.AI_MAX_CONCURRENCY,
+                        max_keepalive_connections=settings.AI_MAX_CONCURRENCY
+                    )
+                )
+            )
         else:
             print("Groq API Key missing. AI features will fail.")
 
-    def _get_json_response(self, prompt: str, model="llama-3.3-70b-versatile"):
+    async def close(self):
+        if self.client:
+            await self.client.close()
+
+    async def _get_json_response(self, prompt: str, model="llama-3.3-70b-versatile"):
         if not self.client:
             return None
         
-        try:
-            chat_completion = self.client.chat.completions.create(
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a helpful assistant that outputs ONLY valid JSON."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt,
-                    }
-                ],
-                model=model,
-                temperature=0.1,
-                response_format={"type": "json_object"},
-            )
-            return json.loads(chat_completion.choices[0].message.content)
-        except Exception as e:
-            print(f"AI Engine Error: {e}")
-            return None
+        temperature = 0.1
+        cache_key = None
+        if settings.LLM_CACHE_ENABLED:
+            cache_key = prompt_cache_key(model, temperature, prompt)
+            cached = await llm_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(settings.AI_MAX_CONCURRENCY)
+        
+        for attempt in range(settings.AI_MAX_RETRIES + 1):
+            try:
+                async with self._semaphore:
+                    chat_completion = await asyncio.wait_for(
+                        self.client.chat.completions.create(
+                            messages=[
+                                {
+                                    "role": "system",
+                                    "content": "You are a helpful assistant that outputs ONLY valid JSON."
+                                },
+                                {
+                                    "role": "user",
+                                    "content": prompt,
+                                }
+                            ],
+                            model=model,
+                            temperature=temperature,
+                            response_format={"type": "json_object"},
+                        ),
+                        timeout=settings.AI_REQUEST_TIMEOUT_SECONDS
+                    )
+                result = json.loads(chat_completion.choices[0].message.content)
+                if cache_key:
+                    await llm_cache.set(cache_key, result, model)
+                return result
+            except RETRYABLE_ERRORS as e:
+                if attempt == settings.AI_MAX_RETRIES:
+                    print(f"AI Engine Error after {attempt + 1} attempts: {e!r}")
+                    return None
+                # Exponential backoff with full jitter, outside the semaphore
+                delay = settings.AI_RETRY_BASE_DELAY_SECONDS * (2 ** attempt)
+                await asyncio.sleep(random.uniform(0, delay))
+            except Exception as e:
+                print(f"AI Engine Error: {e}")
+                return None
 
-    def extract_calendar_events(self, ocr_text: str):
+    async def extract_calendar_events(self, ocr_text: str):
         prompt = f"""
         Extract academic holidays and exam dates from the following text:
         ---
@@ -48,9 +98,9 @@ class AIEngine:
             "exams": [ {{"subject": "Subject Name", "date": "YYYY-MM-DD"}} ]
         }}
         """
-        return self._get_json_response(prompt)
+        return await self._get_json_response(prompt)
 
-    def generate_vacation_plan(self, attendance_summary, schedule, holidays, target_pct=75, query=None):
+    async def generate_vacation_plan(self, attendance_summary, schedule, holidays, target_pct=75, query=None):
         base_prompt = f"""
         Analyze the student's attendance and propose safe vacation windows.
         Current Attendance: {json.dumps(attendance_summary)}
@@ -87,9 +137,9 @@ class AIEngine:
             "ai_advice": "General advice or direct answer to the user's query"
         }
         """
-        return self._get_json_response(base_prompt)
+        return await self._get_json_response(base_prompt)
 
-    def generate_study_plan(self, subjects, preferences):
+    async def generate_study_plan(self, subjects, preferences):
         prompt = f"""
         Create a 7-day study plan.
         Subjects & Status: {json.dumps(subjects)}
@@ -106,6 +156,6 @@ class AIEngine:
             ]
         }}
         """
-        return self._get_json_response(prompt)
+        return await self._get_json_response(prompt)
 
 ai_engine = AIEngine()
@@ -0,0 +1,213 @@
+"""
+Materialized per-user, per-subject attendance counters.
+
+attendance_counters holds one document per (user_id, subject_id):
+    {"user_id": ..., "subject_id": ..., "present": int, "absent": int, "other": int}
+
+mark_attendance applies the difference between the old and new entries of
+a day with $inc, so reading stats is a single indexed lookup no matter how
+long the attendance history is. rebuild_counters recomputes them from
+attendance_records to repair drift.
+
+Users whose attendance predates the counters get them built on first read
+or write (ensure_counters), so no manual backfill is needed. The build runs
+once per user: attendance_counter_state {"_id": user_id, "state", "updated_at"}
+is claimed ("building") by exactly one request and then marked "built";
+concurrent requests wait for it. Writers call ensure_counters before writing
+their record, so a build never counts a record that is $inc-ed afterwards.
+"""
+import asyncio
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Set
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+from app.core.cache import TTLCache
+
+COUNTERS_COLLECTION = "attendance_counters"
+COUNTER_STATE_COLLECTION = "attendance_counter_state"
+COUNTER_FIELDS = ("present", "absent", "other")
+STATUS_FIELDS = {"P": "present", "A": "absent"}  # Anything else (e.g. "C" cancelled) is "other"
+
+# A "building" claim older than this is assumed abandoned (crashed worker) and taken over
+BUILD_CLAIM_TIMEOUT = timedelta(seconds=60)
+BUILD_POLL_SECONDS = 0.05
+
+# Users known to have built counters in this process (skips the state lookup)
+_built_users = TTLCache(maxsize=10_000, ttl=60 * 60)
+
+
+def tally_entries(entries: Iterable[dict]) -> Dict[str, Dict[str, int]]:
+    """subject_id -> {"present": n, "absent": n, "other": n} for one day's entries"""
+    tally = defaultdict(lambda: dict.fromkeys(COUNTER_FIELDS, 0))
+    for entry in entries:
+        field = STATUS_FIELDS.get(entry.get("status"), "other")
+        tally[entry["subject_id"]][field] += 1
+    return tally
+
+
+def counter_deltas(old_entries: Iterable[dict], new_entries: Iterable[dict]) -> Dict[str, Dict[str, int]]:
+    """subject_id -> non-zero counter changes when a day's entries go from old to new"""
+    old_tally = tally_entries(old_entries)
+    new_tally = tally_entries(new_entries)
+
+    deltas = {}
+    for subject_id in set(old_tally) | set(new_tally):
+        delta = {}
+        for field in COUNTER_FIELDS:
+            change = new_tally.get(subject_id, {}).get(field, 0) - old_tally.get(subject_id, {}).get(field, 0)
+            if change:
+                delta[field] = change
+        if delta:
+            deltas[subject_id] = delta
+    return deltas
+
+
+async def apply_attendance_change(
+    db: AsyncIOMotorDatabase,
+    user_id: str,
+    old_entries: Iterable[dict],
+    new_entries: Iterable[dict]
+):
+    """
+    $inc counters by the difference between a day's old and new entries
+    Call ensure_counters before writing the record and this after
+    """
+    operations = [
+        UpdateOne({"user_id": user_id, "subject_id": subject_id}, {"$inc": delta}, upsert=True)
+        for subject_id, delta in counter_deltas(old_entries, new_entries).items()
+    ]
+    if operations:
+        await db[COUNTERS_COLLECTION].bulk_write(operations, ordered=False)
+
+
+async def ensure_counters(db: AsyncIOMotorDatabase, user_id: str) -> bool:
+    """Build counters for a user whose counters were never built; True if this call built them"""
+    return user_id in await ensure_counters_bulk(db, [user_id])
+
+
+async def ensure_counters_bulk(db: AsyncIOMotorDatabase, user_ids: Iterable[str]) -> Set[str]:
+    """ensure_counters for many users; already-built users cost one query in total"""
+    unknown = [uid for uid in dict.fromkeys(user_ids) if not _built_users.get(uid)]
+    if not unknown:
+        return set()
+
+    built = set(await db[COUNTER_STATE_COLLECTION].distinct("_id", {"_id": {"$in": unknown}, "state": "built"}))
+    pending = [uid for uid in unknown if uid not in built]
+    with_data = set()
+    if pending:
+        # Users with neither records nor counters only need the marker
+        with_data.update(await db["attendance_records"].distinct("user_id", {"user_id": {"$in": pending}}))
+        with_data.update(await db[COUNTERS_COLLECTION].distinct("user_id", {"user_id": {"$in": pending}}))
+
+    rebuilt = set()
+    for uid in pending:
+        if await _build_once(db, uid, count=uid in with_data):
+            rebuilt.add(uid)
+    for uid in unknown:
+        _built_users.set(uid, True)
+    return rebuilt
+
+
+async def _build_once(db: AsyncIOMotorDatabase, user_id: str, count: bool) -> bool:
+    """Claim the user's build and run it, or wait for whoever holds the claim; True if built here"""
+    state = db[COUNTER_STATE_COLLECTION]
+    while True:
+        doc = await state.find_one({"_id": user_id})
+        now = datetime.utcnow()
+        if doc is None:
+            try:
+                await state.insert_one({"_id": user_id, "state": "building", "updated_at": now})
+            except DuplicateKeyError:
+                continue
+        elif doc.get("state") == "built":
+            return False
+        elif doc["updated_at"] < now - BUILD_CLAIM_TIMEOUT:
+            taken = await state.update_one(
+                {"_id": user_id, "state": "building", "updated_at": doc["updated_at"]},
+                {"$set": {"updated_at": now}}
+            )
+            if not taken.modified_count:
+                continue
+        else:
+            await asyncio.sleep(BUILD_POLL_SECONDS)
+            continue
+
+        if count:
+            await rebuild_counters(db, user_id)
+        await state.update_one({"_id": user_id}, {"$set": {"state": "built", "updated_at": datetime.utcnow()}})
+        return True
+
+
+async def reset_counters(db: AsyncIOMotorDatabase, user_id: str):
+    await db[COUNTERS_COLLECTION].delete_many({"user_id": user_id})
+
+
+async def get_counters(db: AsyncIOMotorDatabase, user_id: str) -> Dict[str, Dict[str, int]]:
+    """subject_id -> counters for every subject the user has attendance for"""
+    cursor = db[COUNTERS_COLLECTION].find({"user_id": user_id}, {"_id": 0, "user_id": 0})
+    return {
+        doc["subject_id"]: {field: doc.get(field, 0) for field in COUNTER_FIELDS}
+        async for doc in cursor
+    }
+
+
+async def compute_counters_from_records(db: AsyncIOMotorDatabase, user_id: str) -> Dict[str, Dict[str, int]]:
+    """Recount from attendance_records (slow path, used for rebuild/verify)"""
+    pipeline = [
+        {"$match": {"user_id": user_id}},
+        {"$project": {"_id": 0, "entries.subject_id": 1, "entries.status": 1}},
+        {"$unwind": "$entries"},
+        {"$group": {
+            "_id": "$entries.subject_id",
+            "present": {"$sum": {"$cond": [{"$eq": ["$entries.status", "P"]}, 1, 0]}},
+            "absent": {"$sum": {"$cond": [{"$eq": ["$entries.status", "A"]}, 1, 0]}},
+            "total": {"$sum": 1}
+        }}
+    ]
+    counters = {}
+    async for doc in db["attendance_records"].aggregate(pipeline):
+        counters[doc["_id"]] = {
+            "present": doc["present"],
+            "absent": doc["absent"],
+            "other": doc["total"] - doc["present"] - doc["absent"]
+        }
+    return counters
+
+
+async def verify_counters(db: AsyncIOMotorDatabase, user_id: str) -> List[dict]:
+    """List subjects whose stored counters differ from the attendance records"""
+    expected = await compute_counters_from_records(db, user_id)
+    stored = await get_counters(db, user_id)
+    empty = dict.fromkeys(COUNTER_FIELDS, 0)
+
+    drift = []
+    for subject_id in set(expected) | set(stored):
+        want = expected.get(subject_id, empty)
+        have = stored.get(subject_id, empty)
+        if want != have:
+            drift.append({"subject_id": subject_id, "expected": want, "stored": have})
+    return drift
+
+
+async def rebuild_counters(db: AsyncIOMotorDatabase, user_id: str) -> int:
+    """
+    Overwrite a user's counters with a fresh count; returns number of subjects written
+    Idempotent: each subject is upserted and only subjects with no records are deleted
+    """
+    counters = await compute_counters_from_records(db, user_id)
+    for subject_id, counts in counters.items():
+        await db[COUNTERS_COLLECTION].replace_one(
+            {"user_id": user_id, "subject_id": subject_id},
+            {"user_id": user_id, "subject_id": subject_id, **counts},
+            upsert=True
+        )
+    await db[COUNTERS_COLLECTION].delete_many({"user_id": user_id, "subject_id": {"$nin": list(counters)}})
+    return len(counters)
+
+
+async def all_user_ids(db: AsyncIOMotorDatabase) -> List[str]:
+    records = await db["attendance_records"].distinct("user_id")
+    counters = await db[COUNTERS_COLLECTION].distinct("user_id")
+    return sorted(set(records) | set(counters))
@@ -0,0 +1,69 @@
+"""
+Single source of attendance numbers for every endpoint that needs them.
+
+Everything is computed server-side from attendance_counters in one $facet
+round trip: per-subject counts and the overall totals.
+"""
+from typing import Dict
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from app.services.attendance_counters import COUNTERS_COLLECTION, ensure_counters
+
+
+async def get_attendance_summary(db: AsyncIOMotorDatabase, user_id: str) -> Dict:
+    """
+    Returns:
+        {
+            "subjects": {subject_id: {"present", "absent", "other", "total"}},
+            "overall": {"attended", "missed", "total"}  # P/A only, like the overall stats
+        }
+    """
+    await ensure_counters(db, user_id)
+    pipeline = [
+        {"$match": {"user_id": user_id}},
+        {"$project": {"_id": 0, "subject_id": 1, "present": 1, "absent": 1, "other": 1}},
+        {"$facet": {
+            "subjects": [
+                {"$project": {
+                    "subject_id": 1,
+                    "present": {"$ifNull": ["$present", 0]},
+                    "absent": {"$ifNull": ["$absent", 0]},
+                    "other": {"$ifNull": ["$other", 0]}
+                }}
+            ],
+            "overall": [
+                {"$group": {
+                    "_id": None,
+                    "attended": {"$sum": "$present"},
+                    "missed": {"$sum": "$absent"}
+                }}
+            ]
+        }}
+    ]
+
+    result = await db[COUNTERS_COLLECTION].aggregate(pipeline).to_list(1)
+    facets = result[0] if result else {"subjects": [], "overall": []}
+
+    subjects = {
+        doc["subject_id"]: {
+            "present": doc["present"],
+            "absent": doc["absent"],
+            "other": doc["other"],
+            "total": doc["present"] + doc["absent"] + doc["other"]
+        }
+        for doc in facets["subjects"]
+    }
+
+    overall = facets["overall"][0] if facets["overall"] else {"attended": 0, "missed": 0}
+    return {
+        "subjects": subjects,
+        "overall": {
+            "attended": overall["attended"],
+            "missed": overall["missed"],
+            "total": overall["attended"] + overall["missed"]
+        }
+    }
+
+
+def tracked_lectures(counts: Dict) -> Dict[str, int]:
+    """Attended/total for the vacation engine: only P and A count as held lectures"""
+    return {"attended": counts["present"], "total": counts["present"] + counts["absent"]}
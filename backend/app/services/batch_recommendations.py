@@ -0,0 +1,119 @@
+"""
+Vacation recommendations for many students in one call (advisors, notification jobs).
+
+1. Engine inputs for every student are bulk-loaded with $in queries
+2. Students with the same calendar and timetable (by subject code) form a
+   group whose day/lecture matrix is built once and relabelled per student
+3. Groups run in chunks on the engine process pool
+
+Results are also stored in the per-user recommendation cache, so a
+following /planner/recommend for the same parameters is a cache hit.
+"""
+import asyncio
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Tuple
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from app.core.config import settings
+from app.services import recommendation_store
+from app.services.planner_inputs import load_engine_inputs_bulk
+from app.services.vacation_service import (
+    cache_recommendation,
+    engine_executor,
+    generate_group_vacation_plans,
+    recommendation_cache_key,
+    recommendation_response
+)
+
+
+def _shared_inputs_key(inputs: Dict, user_id: str) -> Tuple[Tuple, Dict[str, str], Dict[str, list]]:
+    """
+    (group key, subject_id -> shared key, weekly schedule in shared keys)
+    Subjects are shared by code; a student with duplicate codes keeps private ids
+    """
+    subjects = inputs["subjects_data"]
+    codes = [s.get("code") for s in subjects]
+    if all(codes) and len(set(codes)) == len(codes):
+        subject_keys = {s["id"]: s["code"] for s in subjects}
+        private = None
+    else:
+        subject_keys = {s["id"]: s["id"] for s in subjects}
+        private = user_id
+
+    schedule = {}
+    for day, subject_ids in inputs["weekly_schedule"].items():
+        keys = sorted({subject_keys[sid] for sid in subject_ids if sid in subject_keys})
+        if keys:
+            schedule[day] = keys
+
+    calendar_key = tuple(sorted((day, day_type.value) for day, day_type in inputs["academic_calendar"].items()))
+    schedule_key = tuple(sorted((day, tuple(keys)) for day, keys in schedule.items()))
+    return (private, calendar_key, schedule_key), subject_keys, schedule
+
+
+async def recommend_for_users(
+    db: AsyncIOMotorDatabase,
+    users: List[Dict],
+    start_date: datetime,
+    min_attendance: float,
+    search_params: Dict
+) -> Dict:
+    """
+    users: [{"id", "institution_id"}]
+    Returns {"results": {user_id: /planner/recommend body}, "groups": n}
+    Raises ExecutorBusyError / ExecutorTimeoutError when the engine pool is overloaded
+    """
+    generations = await recommendation_store.generations(db, [u["id"] for u in users])
+    inputs_by_user = await load_engine_inputs_bulk(db, users, start_date, search_params["search_days"])
+
+    groups = defaultdict(lambda: {"weekly_schedule": None, "academic_calendar": None, "members": []})
+    for user_id, inputs in inputs_by_user.items():
+        key, subject_keys, schedule = _shared_inputs_key(inputs, user_id)
+        group = groups[key]
+        group["weekly_schedule"] = schedule
+        group["academic_calendar"] = inputs["academic_calendar"]
+        group["members"].append({
+            "user_id": user_id,
+            "subjects_data": inputs["subjects_data"],
+            "subject_keys": subject_keys
+        })
+
+    chunk_size = settings.BATCH_RECOMMEND_CHUNK_SIZE
+    tasks = [
+        (group, group["members"][i:i + chunk_size])
+        for group in groups.values()
+        for i in range(0, len(group["members"]), chunk_size)
+    ]
+
+    # At most one wave of tasks per worker in flight, so a large batch can't fill the queue
+    plans = {}
+    wave_size = max(1, settings.VACATION_ENGINE_WORKERS)
+    for i in range(0, len(tasks), wave_size):
+        wave = tasks[i:i + wave_size]
+        for chunk_plans in await asyncio.gather(*(
+            engine_executor.run(
+                generate_group_vacation_plans,
+                weekly_schedule=group["weekly_schedule"],
+                academic_calendar=group["academic_calendar"],
+                members=members,
+                min_attendance=min_attendance,
+                start_date=start_date,
+                **search_params
+            )
+            for group, members in wave
+        )):
+            plans.update(chunk_plans)
+
+    results = {}
+    for user_id, plan in plans.items():
+        response = recommendation_response(
+            plan, search_params["objective"], len(inputs_by_user[user_id]["subjects_data"]), search_params
+        )
+        cache_recommendation(
+            recommendation_cache_key(user_id, start_date, min_attendance, **search_params),
+            generations[user_id],
+            response
+        )
+        results[user_id] = response
+
+    return {"results": results, "groups": len(groups)}
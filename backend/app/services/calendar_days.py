@@ -0,0 +1,118 @@
+"""
+Normalized academic calendar: one document per non-teaching day.
+
+calendar_days holds
+    {"user_id": ..., "date": "YYYY-MM-DD", "day_type": "holiday", "name": ...}
+with a unique (user_id, date) index. Uploaded calendars are expanded into
+it once (multi-day holidays become one row per day), so the planner loads
+just the days of its search horizon with a single indexed range query
+instead of re-parsing the latest parsed_events blob on every request.
+
+Days the user sets by hand live in calendar_day_overrides (same shape and
+index) and win over uploaded days, so a re-upload only replaces what came
+from the previous upload.
+
+academic_calendars documents expanded into calendar_days carry
+"days_expanded": True, so a legacy upload is backfilled at most once even
+when it holds no holidays.
+"""
+import logging
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from app.core.vacation_engine import DayType
+
+logger = logging.getLogger(__name__)
+
+CALENDAR_DAYS_COLLECTION = "calendar_days"
+CALENDAR_OVERRIDES_COLLECTION = "calendar_day_overrides"
+MAX_EVENT_DAYS = 366  # Longer "holidays" are extraction errors, not vacations
+
+
+def _parse_date(value) -> Optional[date]:
+    if not isinstance(value, str):
+        return None
+    try:
+        return date.fromisoformat(value.strip()[:10])
+    except ValueError:
+        return None
+
+
+def expand_calendar_events(parsed_events: Optional[Dict]) -> Dict[str, Dict]:
+    """
+    "YYYY-MM-DD" -> {"day_type", "name"} for every holiday day
+    Accepts bare date strings, {"date": ...} and {"start_date", "end_date"} ranges
+    """
+    days = {}
+    holidays = (parsed_events or {}).get("holidays") or []
+    for holiday in holidays:
+        if isinstance(holiday, str):
+            start, end, name = _parse_date(holiday), None, "Holiday"
+        elif isinstance(holiday, dict):
+            start = _parse_date(holiday.get("start_date") or holiday.get("date"))
+            end = _parse_date(holiday.get("end_date"))
+            name = holiday.get("name") or "Holiday"
+        else:
+            continue
+        if start is None:
+            continue
+        if end is None or end < start or (end - start).days >= MAX_EVENT_DAYS:
+            end = start
+
+        current = start
+        while current <= end:
+            days.setdefault(current.isoformat(), {"day_type": DayType.HOLIDAY.value, "name": name})
+            current += timedelta(days=1)
+    return days
+
+
+async def replace_user_calendar(db: AsyncIOMotorDatabase, user_id: str, parsed_events: Optional[Dict]) -> int:
+    """Replace the user's uploaded calendar days (not their overrides) with a new upload"""
+    days = expand_calendar_events(parsed_events)
+    await db[CALENDAR_DAYS_COLLECTION].delete_many({"user_id": user_id})
+    if days:
+        await db[CALENDAR_DAYS_COLLECTION].insert_many([
+            {"user_id": user_id, "date": day, **info} for day, info in sorted(days.items())
+        ])
+    return len(days)
+
+
+async def _backfill_from_latest_upload(db: AsyncIOMotorDatabase, user_id: str) -> bool:
+    """Calendars uploaded before calendar_days existed only live in academic_calendars"""
+    if await db[CALENDAR_DAYS_COLLECTION].find_one({"user_id": user_id}, {"_id": 1}):
+        return False
+
+    calendar_doc = await db["academic_calendars"].find_one(
+        {"user_id": user_id}, {"parsed_events": 1, "days_expanded": 1}, sort=[("_id", -1)]
+    )
+    if not calendar_doc or calendar_doc.get("days_expanded"):
+        return False
+
+    count = await replace_user_calendar(db, user_id, calendar_doc.get("parsed_events"))
+    await db["academic_calendars"].update_one({"_id": calendar_doc["_id"]}, {"$set": {"days_expanded": True}})
+    logger.info(f"Backfilled {count} calendar days for user {user_id}")
+    return count > 0
+
+
+async def load_calendar_slice(
+    db: AsyncIOMotorDatabase,
+    user_id: str,
+    start_date: datetime,
+    days: int
+) -> Dict[str, DayType]:
+    """Engine academic_calendar for [start_date, start_date + days), overrides applied"""
+    query = {
+        "user_id": user_id,
+        "date": {
+            "$gte": start_date.strftime("%Y-%m-%d"),
+            "$lt": (start_date + timedelta(days=days)).strftime("%Y-%m-%d")
+        }
+    }
+    projection = {"_id": 0, "date": 1, "day_type": 1}
+
+    rows: List[Dict] = await db[CALENDAR_DAYS_COLLECTION].find(query, projection).to_list(None)
+    if not rows and await _backfill_from_latest_upload(db, user_id):
+        rows = await db[CALENDAR_DAYS_COLLECTION].find(query, projection).to_list(None)
+    rows += await db[CALENDAR_OVERRIDES_COLLECTION].find(query, projection).to_list(None)
+
+    return {row["date"]: DayType(row["day_type"]) for row in rows}
@@ -0,0 +1,93 @@
+"""
+Academic calendar extractions shared across users, keyed by file SHA-256.
+
+The same calendar PDF is uploaded by many students of a college; once one
+upload has been through OCR + AI extraction, identical bytes reuse the
+stored text and parsed events. Each document also counts its reuse hits
+and the processing time they saved.
+
+Extractions made by the rule parser record its PARSER_VERSION; ones from an
+older parser are treated as a miss and overwritten by the next upload, so a
+parser fix reaches files that were already processed.
+"""
+from datetime import datetime
+from typing import Dict, Optional
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from app.services.calendar_parser import PARSER_VERSION
+
+EXTRACTIONS_COLLECTION = "calendar_extractions"
+
+
+async def find_extraction(db: AsyncIOMotorDatabase, sha256: str) -> Optional[Dict]:
+    """Stored extraction for these file bytes, recording the dedup hit"""
+    doc = await db[EXTRACTIONS_COLLECTION].find_one({"_id": sha256})
+    if doc is None or is_outdated(doc):
+        return None
+
+    await db[EXTRACTIONS_COLLECTION].update_one(
+        {"_id": sha256},
+        {
+            "$inc": {"hits": 1, "time_saved_ms": doc.get("processing_ms", 0)},
+            "$set": {"last_used_at": datetime.utcnow()}
+        }
+    )
+    return doc
+
+
+def is_outdated(doc: Dict) -> bool:
+    """Rule-parsed by an older parser (LLM extractions do not depend on it)"""
+    return doc.get("method") == "rules" and doc.get("parser_version") != PARSER_VERSION
+
+
+async def save_extraction(
+    db: AsyncIOMotorDatabase,
+    sha256: str,
+    text: str,
+    parsed_events: Dict,
+    processing_ms: int,
+    content_type: Optional[str] = None,
+    method: str = "llm"
+):
+    """Insert, or overwrite an outdated extraction of the same bytes (hit counters are kept)"""
+    now = datetime.utcnow()
+    await db[EXTRACTIONS_COLLECTION].update_one(
+        {"_id": sha256},
+        {
+            "$set": {
+                "text": text,
+                "parsed_events": parsed_events,
+                "processing_ms": processing_ms,
+                "content_type": content_type,
+                "method": method,
+                "parser_version": PARSER_VERSION if method == "rules" else None,
+                "created_at": now,
+                "last_used_at": now
+            },
+            "$setOnInsert": {"hits": 0, "time_saved_ms": 0}
+        },
+        upsert=True
+    )
+
+
+async def dedup_stats(db: AsyncIOMotorDatabase) -> Dict:
+    pipeline = [
+        {"$group": {
+            "_id": None,
+            "unique_files": {"$sum": 1},
+            "dedup_hits": {"$sum": "$hits"},
+            "time_saved_ms": {"$sum": "$time_saved_ms"},
+            "rule_parsed": {"$sum": {"$cond": [{"$eq": ["$method", "rules"]}, 1, 0]}}
+        }}
+    ]
+    result = await db[EXTRACTIONS_COLLECTION].aggregate(pipeline).to_list(1)
+    totals = result[0] if result else {"unique_files": 0, "dedup_hits": 0, "time_saved_ms": 0, "rule_parsed": 0}
+
+    uploads = totals["unique_files"] + totals["dedup_hits"]
+    return {
+        "unique_files": totals["unique_files"],
+        "uploads": uploads,
+        "dedup_hits": totals["dedup_hits"],
+        "dedup_rate": round(totals["dedup_hits"] / uploads, 4) if uploads else 0.0,
+        "time_saved_seconds": round(totals["time_saved_ms"] / 1000, 1),
+        "rule_parsed_files": totals["rule_parsed"]
+    }
@@ -0,0 +1,254 @@
+"""
+Rule-based academic calendar extractor (fast path before the LLM).
+
+Most uploaded calendars are plain tables of dates and event names. This
+parser recognises common date formats and ranges, e.g.
+    "15 Aug", "15th August 2026", "Aug 15, 2026", "12-14 Oct 2026",
+    "12 Oct - 14 Oct", "2026-10-02", "02/10/2026"
+and produces the same schema as AIEngine.extract_calendar_events:
+    {"holidays": [{"name", "start_date", "end_date"}], "exams": [{"subject", "date"}]}
+
+Only lines naming an exam or a holiday/break become events. Other dated
+lines ("Commencement of classes", "Last date for fee payment") are left
+unparsed, since treating them as holidays would erase teaching days.
+
+`coverage` is the share of date-looking lines that were parsed; callers
+fall back to the LLM when it is low, or when a "holiday" spans longer than
+a real break would.
+"""
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+# Stored "rules" extractions from an older version are parsed again; bump on
+# any change that alters the events produced for the same text
+PARSER_VERSION = 2
+
+MONTHS = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+    "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12,
+}
+MONTH = (
+    r"(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?"
+    r"|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)\.?"
+)
+ORDINAL = r"(?:st|nd|rd|th)?"
+YEAR = r"(?:,?\s*(\d{4}))?"
+
+# (pattern, kind) in priority order; earlier matches win overlapping spans
+DATE_PATTERNS = [
+    (re.compile(r"\b(\d{4})-(\d{1,2})-(\d{1,2})\b"), "iso"),
+    (re.compile(r"\b(\d{1,2})[/.](\d{1,2})[/.](\d{4}|\d{2})\b"), "dmy"),
+    (re.compile(rf"\b(\d{{1,2}}){ORDINAL}\s*(?:-|–|—|to)\s*(\d{{1,2}}){ORDINAL}\s+({MONTH}){YEAR}", re.I), "day_range"),
+    (re.compile(rf"\b(\d{{1,2}}){ORDINAL}\s+(?:of\s+)?({MONTH}){YEAR}(?![a-z])", re.I), "day_month"),
+    (re.compile(rf"\b({MONTH})\s+(\d{{1,2}}){ORDINAL}{YEAR}\b", re.I), "month_day"),
+]
+RANGE_JOINER = re.compile(r"^\s*(?:-|–|—|to|till|until)\s*$", re.I)
+DATE_HINT = re.compile(rf"\d{{1,2}}\s*{ORDINAL}\s*{MONTH}|{MONTH}\s*\d|\d{{1,2}}[/.-]\d{{1,2}}", re.I)
+ACADEMIC_YEAR = re.compile(r"\b(20\d{2})\s*[-–/]\s*(?:20)?(\d{2})\b")
+WEEKDAYS = re.compile(
+    r"\b(?:mon|tue|tues|wed|thu|thur|thurs|fri|sat|sun)(?:day|nesday|rsday|urday)?\b\.?", re.I
+)
+EXAM_WORDS = re.compile(
+    r"\b(?:exam|exams|examination|examinations|test|tests|quiz|mid[- ]?sem|midterm|end[- ]?sem|viva|practicals?)\b",
+    re.I,
+)
+HOLIDAY_WORDS = re.compile(
+    r"\b(?:holidays?|vacations?|break|recess|closed|closure|festival|jayanti|diwali|deepavali|holi"
+    r"|dussehra|dasara|durga\s+puja|navratri|ganesh\s+chaturthi|janmashtami|christmas|easter|good\s+friday"
+    r"|eid|id[- ]ul[- ](?:fitr|zuha|adha)|bakri?d|muharram|milad|pongal|sankranti|lohri|onam|ugadi|gudi\s+padwa"
+    r"|baisakhi|vaisakhi|ram\s+navami|maha\s*shivaratri|shivratri|raksha\s+bandhan|guru\s+nanak|buddha\s+purnima"
+    r"|new\s+year|independence\s+day|republic\s+day|labou?r\s+day|may\s+day|thanksgiving)\b",
+    re.I,
+)
+NAME_STRIP = " \t-–—:;,.|()[]*•#"
+ACADEMIC_YEAR_START_MONTH = 7  # Undated months before July belong to the second calendar year
+
+
+@dataclass
+class _DateMention:
+    start: int
+    end: int
+    first: Tuple[int, int, Optional[int]]  # (day, month, year or None)
+    last: Optional[Tuple[int, int, Optional[int]]] = None
+
+
+@dataclass
+class CalendarParseResult:
+    events: Dict[str, List[Dict]] = field(default_factory=lambda: {"holidays": [], "exams": []})
+    candidate_lines: int = 0
+    parsed_lines: int = 0
+    longest_holiday_days: int = 0
+
+    @property
+    def event_count(self) -> int:
+        return len(self.events["holidays"]) + len(self.events["exams"])
+
+    @property
+    def coverage(self) -> float:
+        return self.parsed_lines / self.candidate_lines if self.candidate_lines else 0.0
+
+    def is_confident(self, min_coverage: float, min_events: int = 1, max_holiday_days: Optional[int] = None) -> bool:
+        if max_holiday_days is not None and self.longest_holiday_days > max_holiday_days:
+            return False  # Probably a term or a misread range, not a break
+        return self.event_count >= min_events and self.coverage >= min_coverage
+
+
+def _month_number(token: str) -> int:
+    return MONTHS[token.lower().rstrip(".")[:3]]
+
+
+def _full_year(year: Optional[str]) -> Optional[int]:
+    if not year:
+        return None
+    value = int(year)
+    return value + 2000 if value < 100 else value
+
+
+def _find_mentions(line: str) -> List[_DateMention]:
+    taken: List[Tuple[int, int]] = []
+    mentions = []
+    for pattern, kind in DATE_PATTERNS:
+        for match in pattern.finditer(line):
+            span = match.span()
+            if any(span[0] < end and start < span[1] for start, end in taken):
+                continue
+            groups = match.groups()
+            if kind == "iso":
+                first = (int(groups[2]), int(groups[1]), int(groups[0]))
+                mention = _DateMention(*span, first)
+            elif kind == "dmy":
+                first = (int(groups[0]), int(groups[1]), _full_year(groups[2]))
+                mention = _DateMention(*span, first)
+            elif kind == "day_range":
+                month, year = _month_number(groups[2]), _full_year(groups[3])
+                mention = _DateMention(*span, (int(groups[0]), month, year), (int(groups[1]), month, year))
+            elif kind == "day_month":
+                mention = _DateMention(*span, (int(groups[0]), _month_number(groups[1]), _full_year(groups[2])))
+            else:
+                mention = _DateMention(*span, (int(groups[1]), _month_number(groups[0]), _full_year(groups[2])))
+            taken.append(span)
+            mentions.append(mention)
+
+    mentions.sort(key=lambda m: m.start)
+
+    # "12 Oct - 14 Oct 2026" / "2026-10-12 to 2026-10-14" -> one range
+    joined: List[_DateMention] = []
+    for mention in mentions:
+        previous = joined[-1] if joined else None
+        if (
+            previous is not None
+            and previous.last is None
+            and mention.last is None
+            and RANGE_JOINER.match(line[previous.end:mention.start])
+        ):
+            previous.end = mention.end
+            previous.last = mention.first
+            continue
+        joined.append(mention)
+    return joined
+
+
+def _default_years(text: str, mentions: List[_DateMention]) -> Tuple[int, Optional[int]]:
+    """(fallback year, academic start year if the text names one like '2026-27')"""
+    for match in ACADEMIC_YEAR.finditer(text):
+        start_year = int(match.group(1))
+        if int(match.group(2)) == (start_year + 1) % 100:
+            return start_year, start_year
+
+    years = Counter(
+        part[2]
+        for mention in mentions
+        for part in (mention.first, mention.last)
+        if part and part[2]
+    )
+    if years:
+        return years.most_common(1)[0][0], None
+    return date.today().year, None
+
+
+def _resolve(part: Tuple[int, int, Optional[int]], fallback_year: int, academic_year: Optional[int]) -> date:
+    day, month, year = part
+    if year is None:
+        if academic_year is not None:
+            year = academic_year + 1 if month < ACADEMIC_YEAR_START_MONTH else academic_year
+        else:
+            year = fallback_year
+    return date(year, month, day)
+
+
+def _event_name(line: str, mentions: List[_DateMention], index: int) -> str:
+    """Text after this date up to the next one; falls back to the text before it"""
+    mention = mentions[index]
+    next_start = mentions[index + 1].start if index + 1 < len(mentions) else len(line)
+    previous_end = mentions[index - 1].end if index > 0 else 0
+
+    for segment in (line[mention.end:next_start], line[previous_end:mention.start]):
+        name = WEEKDAYS.sub(" ", segment)
+        name = re.sub(r"^\s*\d+[.)]\s+", " ", name)  # Row numbers like "3." or "3)"
+        name = " ".join(name.split()).strip(NAME_STRIP)
+        if name:
+            return name
+    return ""
+
+
+def _event_kind(name: str, line: str) -> Optional[str]:
+    """"exam", "holiday" or None; the event's own name decides before the rest of the line"""
+    for text in (name, line):
+        if EXAM_WORDS.search(text):
+            return "exam"
+        if HOLIDAY_WORDS.search(text):
+            return "holiday"
+    return None
+
+
+def parse_calendar_text(text: str) -> CalendarParseResult:
+    result = CalendarParseResult()
+    lines = [line for line in text.splitlines() if line.strip()]
+    mentions_by_line = [(line, _find_mentions(line)) for line in lines]
+
+    all_mentions = [m for _, mentions in mentions_by_line for m in mentions]
+    fallback_year, academic_year = _default_years(text, all_mentions)
+
+    for line, mentions in mentions_by_line:
+        if not mentions and not DATE_HINT.search(ACADEMIC_YEAR.sub(" ", line)):
+            continue  # Headers and prose, including "Academic Year 2026-27"
+        result.candidate_lines += 1
+        if not mentions:
+            continue
+
+        line_events = []
+        kinds = []
+        try:
+            for index, mention in enumerate(mentions):
+                start = _resolve(mention.first, fallback_year, academic_year)
+                end = _resolve(mention.last, fallback_year, academic_year) if mention.last else start
+                if end < start:  # "28 Dec - 2 Jan" crosses the new year
+                    end = end.replace(year=end.year + 1)
+                if (end - start) > timedelta(days=366):
+                    raise ValueError("implausible range")
+                name = _event_name(line, mentions, index)
+                line_events.append((start, end, name))
+                kinds.append(_event_kind(name, line))
+        except ValueError:
+            continue  # Not a real date (e.g. 31/02); counts as unparsed
+        if None in kinds:
+            continue  # Dated, but neither an exam nor a break; counts as unparsed
+
+        result.parsed_lines += 1
+        for (start, end, name), kind in zip(line_events, kinds):
+            if kind == "exam":
+                result.events["exams"].append({"subject": name or "Exam", "date": start.isoformat()})
+            else:
+                result.longest_holiday_days = max(result.longest_holiday_days, (end - start).days + 1)
+                result.events["holidays"].append({
+                    "name": name or "Holiday",
+                    "start_date": start.isoformat(),
+                    "end_date": end.isoformat()
+                })
+
+    result.events["holidays"].sort(key=lambda h: h["start_date"])
+    result.events["exams"].sort(key=lambda e: e["date"])
+    return result
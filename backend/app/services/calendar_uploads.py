@@ -0,0 +1,180 @@
+"""
+Academic calendar upload pipeline: dedup lookup -> OCR -> extraction -> save.
+
+Extraction tries the rule-based parser first and only calls the LLM when
+too few of the date-looking lines could be parsed.
+
+Used by the synchronous upload route and by background upload jobs, which
+let a client submit a file, get a job id back and poll for the result
+instead of holding the HTTP connection open for the whole OCR. A job
+reserves an OCR queue slot when it is submitted (or is refused with
+ExecutorBusyError) and keeps it until it finishes, so accepted jobs wait
+for a worker instead of failing on a full queue later.
+"""
+import asyncio
+import logging
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from app.core.config import settings
+from app.core.executor import ExecutorBusyError, ExecutorReservation, ExecutorTimeoutError
+from app.services import calendar_extractions
+from app.services.calendar_days import replace_user_calendar
+from app.services.institutions import replace_institution_calendar
+from app.services.calendar_parser import parse_calendar_text
+from app.services.ai_engine import ai_engine
+from app.services.ocr import extract_text_from_path, ocr_executor
+from app.services.uploads import SpooledUpload, discard_upload
+from app.services.vacation_service import invalidate_recommendations
+
+logger = logging.getLogger(__name__)
+
+JOBS_COLLECTION = "calendar_jobs"
+
+# Strong references so running jobs are not garbage collected
+_running_jobs = set()
+
+
+class CalendarUploadError(Exception):
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+async def process_calendar_upload(
+    db: AsyncIOMotorDatabase,
+    user_id: str,
+    upload: SpooledUpload,
+    content_type: Optional[str],
+    filename: Optional[str],
+    institution_id: Optional[str] = None
+) -> Tuple[Dict, bool]:
+    """
+    Returns (parsed_events, deduplicated)
+    With institution_id the calendar becomes that institution's shared
+    calendar instead of the user's own
+    Raises CalendarUploadError, ExecutorBusyError or ExecutorTimeoutError
+    """
+    file_hash = upload.sha256
+    
+    # Identical bytes were already processed (e.g. by a classmate): skip OCR and AI
+    extraction = await calendar_extractions.find_extraction(db, file_hash)
+    if extraction:
+        text, result = extraction["text"], extraction["parsed_events"]
+    else:
+        started = time.perf_counter()
+        
+        # 1. OCR
+        text = await extract_text_from_path(upload.path, content_type)
+        if not text:
+            raise CalendarUploadError(400, "Could not extract text from file")
+        
+        # 2. Extraction: rules first, AI for anything they can't handle
+        result, method = _extract_with_rules(text), "rules"
+        if result is None:
+            result, method = await ai_engine.extract_calendar_events(text), "llm"
+        if not result:
+            raise CalendarUploadError(500, "AI extraction failed")
+        
+        await calendar_extractions.save_extraction(
+            db,
+            file_hash,
+            text=text,
+            parsed_events=result,
+            processing_ms=int((time.perf_counter() - started) * 1000),
+            content_type=content_type,
+            method=method
+        )
+        
+    # 3. Save to DB
+    if institution_id:
+        await replace_institution_calendar(db, institution_id, result, file_hash)
+        return result, extraction is not None
+    
+    doc = {
+        "user_id": user_id,
+        "raw_text": text[:500] + "...",
+        "parsed_events": result,
+        "file_sha256": file_hash,
+        "uploaded_at": str(filename),
+        "days_expanded": True  # replace_user_calendar below
+    }
+    await db["academic_calendars"].insert_one(doc)
+    await replace_user_calendar(db, user_id, result)
+    await invalidate_recommendations(db, user_id)
+    
+    return result, extraction is not None
+
+
+def _extract_with_rules(text: str) -> Optional[Dict]:
+    if not settings.CALENDAR_RULE_PARSER:
+        return None
+    
+    parsed = parse_calendar_text(text)
+    if not parsed.is_confident(
+        settings.CALENDAR_PARSER_MIN_COVERAGE,
+        settings.CALENDAR_PARSER_MIN_EVENTS,
+        settings.CALENDAR_PARSER_MAX_HOLIDAY_DAYS
+    ):
+        logger.info(f"Rule parser coverage {parsed.coverage:.0%} ({parsed.event_count} events), using AI")
+        return None
+    return parsed.events
+
+
+async def submit_calendar_job(
+    db: AsyncIOMotorDatabase,
+    user_id: str,
+    upload: SpooledUpload,
+    content_type: Optional[str],
+    filename: Optional[str]
+) -> str:
+    """
+    Start processing in the background; the job owns (and removes) the spooled file
+    Raises ExecutorBusyError when no OCR queue slot is free
+    """
+    reservation = ocr_executor.reserve()
+    job_id = uuid.uuid4().hex
+    try:
+        await db[JOBS_COLLECTION].insert_one({
+            "_id": job_id,
+            "user_id": user_id,
+            "filename": filename,
+            "status": "queued",
+            "created_at": datetime.utcnow()
+        })
+    except Exception:
+        reservation.release()
+        raise
+    
+    task = asyncio.create_task(_run_calendar_job(db, job_id, user_id, upload, content_type, filename, reservation))
+    _running_jobs.add(task)
+    task.add_done_callback(_running_jobs.discard)
+    return job_id
+
+
+async def _run_calendar_job(db, job_id, user_id, upload, content_type, filename, reservation: ExecutorReservation):
+    update = {}
+    try:
+        with reservation:
+            await db[JOBS_COLLECTION].update_one({"_id": job_id}, {"$set": {"status": "running"}})
+            result, deduplicated = await process_calendar_upload(db, user_id, upload, content_type, filename)
+        update.update(status="done", result=result, deduplicated=deduplicated)
+    except CalendarUploadError as e:
+        update.update(status="failed", error=e.detail)
+    except ExecutorTimeoutError:
+        update.update(status="failed", error="OCR timed out")
+    except Exception as e:
+        logger.error(f"Calendar job {job_id} failed: {e}")
+        update.update(status="failed", error="Calendar processing failed")
+    finally:
+        reservation.release()  # If the job failed before taking it over
+        discard_upload(upload.path)
+    update["finished_at"] = datetime.utcnow()
+    await db[JOBS_COLLECTION].update_one({"_id": job_id}, {"$set": update})
+
+
+async def get_calendar_job(db: AsyncIOMotorDatabase, user_id: str, job_id: str) -> Optional[Dict]:
+    return await db[JOBS_COLLECTION].find_one({"_id": job_id, "user_id": user_id}, {"user_id": 0})
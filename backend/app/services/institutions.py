@@ -0,0 +1,212 @@
+"""
+Institution (college/section) calendars and timetables shared by students.
+
+A student with `institution_id` set reads the institution's calendar and
+timetable instead of owning a copy. Their own rows are copy-on-write
+overrides on top:
+  - calendar_days rows (own upload) and calendar_day_overrides rows
+    (set by hand) for (user_id, date) replace the institution's day
+  - schedules for a weekday replace the institution's slots for that day
+
+Institution data lives in
+    institution_calendar_days {"institution_id", "date", "day_type", "name"}
+    institution_schedules     {"institution_id", "weekday", "slots": [{"subject_code", ...}]}
+    institutions              {"_id": institution_id, "file_sha256", "updated_at", "admin_user_ids"}
+and the compiled calendar slice / timetable are cached per institution, so
+the load work scales with institutions rather than students.
+
+`institution_id` on a user is self-assigned and only selects what they
+read. Changing shared data (and reading members' recommendations) needs
+a server-side admin grant, see manage_institution_admins.py.
+"""
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.vacation_engine import DayType
+from app.services.calendar_days import CALENDAR_OVERRIDES_COLLECTION, expand_calendar_events, load_calendar_slice
+from app.services import recommendation_store
+from app.services.vacation_service import invalidate_cached_recommendations
+
+INSTITUTIONS_COLLECTION = "institutions"
+INSTITUTION_DAYS_COLLECTION = "institution_calendar_days"
+INSTITUTION_SCHEDULES_COLLECTION = "institution_schedules"
+WEEKDAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+# (institution_id, start_date, days) -> {"YYYY-MM-DD": DayType}
+institution_calendar_cache = TTLCache(
+    maxsize=settings.INSTITUTION_CACHE_SIZE,
+    ttl=settings.INSTITUTION_CACHE_TTL_SECONDS
+)
+# institution_id -> {weekday: [subject_code, ...]}
+institution_timetable_cache = TTLCache(
+    maxsize=settings.INSTITUTION_CACHE_SIZE,
+    ttl=settings.INSTITUTION_CACHE_TTL_SECONDS
+)
+
+
+async def invalidate_institution(db: AsyncIOMotorDatabase, institution_id: str) -> int:
+    """Drop compiled institution data and the cached recommendations of its students"""
+    institution_calendar_cache.invalidate(lambda key: key[0] == institution_id)
+    institution_timetable_cache.pop(institution_id)
+
+    members = await db["users"].find({"institution_id": institution_id}, {"_id": 1}).to_list(None)
+    member_ids = {str(m["_id"]) for m in members}
+    await recommendation_store.mark_stale(db, member_ids)
+    return invalidate_cached_recommendations(member_ids)
+
+
+# --- Administrators ---
+async def is_institution_admin(db: AsyncIOMotorDatabase, institution_id: str, user_id: str) -> bool:
+    return await db[INSTITUTIONS_COLLECTION].count_documents(
+        {"_id": institution_id, "admin_user_ids": user_id}, limit=1
+    ) > 0
+
+
+async def grant_institution_admin(db: AsyncIOMotorDatabase, institution_id: str, user_id: str):
+    await db[INSTITUTIONS_COLLECTION].update_one(
+        {"_id": institution_id}, {"$addToSet": {"admin_user_ids": user_id}}, upsert=True
+    )
+
+
+async def revoke_institution_admin(db: AsyncIOMotorDatabase, institution_id: str, user_id: str) -> bool:
+    result = await db[INSTITUTIONS_COLLECTION].update_one(
+        {"_id": institution_id}, {"$pull": {"admin_user_ids": user_id}}
+    )
+    return result.modified_count > 0
+
+
+async def institution_admins(db: AsyncIOMotorDatabase, institution_id: str) -> List[str]:
+    doc = await db[INSTITUTIONS_COLLECTION].find_one({"_id": institution_id}, {"admin_user_ids": 1})
+    return doc.get("admin_user_ids", []) if doc else []
+
+
+# --- Calendar ---
+async def replace_institution_calendar(
+    db: AsyncIOMotorDatabase,
+    institution_id: str,
+    parsed_events: Optional[Dict],
+    file_sha256: Optional[str] = None
+) -> int:
+    days = expand_calendar_events(parsed_events)
+    await db[INSTITUTION_DAYS_COLLECTION].delete_many({"institution_id": institution_id})
+    if days:
+        await db[INSTITUTION_DAYS_COLLECTION].insert_many([
+            {"institution_id": institution_id, "date": day, **info} for day, info in sorted(days.items())
+        ])
+    await db[INSTITUTIONS_COLLECTION].update_one(
+        {"_id": institution_id},
+        {"$set": {"file_sha256": file_sha256, "updated_at": datetime.utcnow()}},
+        upsert=True
+    )
+    await invalidate_institution(db, institution_id)
+    return len(days)
+
+
+async def load_institution_calendar(
+    db: AsyncIOMotorDatabase,
+    institution_id: str,
+    start_date: datetime,
+    days: int
+) -> Dict[str, DayType]:
+    """Shared calendar slice; the returned dict is cached, do not mutate it"""
+    start = start_date.strftime("%Y-%m-%d")
+    cache_key = (institution_id, start, days)
+    cached = institution_calendar_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    rows = await db[INSTITUTION_DAYS_COLLECTION].find(
+        {
+            "institution_id": institution_id,
+            "date": {"$gte": start, "$lt": (start_date + timedelta(days=days)).strftime("%Y-%m-%d")}
+        },
+        {"_id": 0, "date": 1, "day_type": 1}
+    ).to_list(None)
+
+    calendar = {row["date"]: DayType(row["day_type"]) for row in rows}
+    institution_calendar_cache.set(cache_key, calendar)
+    return calendar
+
+
+async def load_effective_calendar(
+    db: AsyncIOMotorDatabase,
+    user_id: str,
+    institution_id: Optional[str],
+    start_date: datetime,
+    days: int
+) -> Dict[str, DayType]:
+    """Institution calendar with the user's own days applied on top"""
+    user_days = await load_calendar_slice(db, user_id, start_date, days)
+    if not institution_id:
+        return user_days
+
+    calendar = dict(await load_institution_calendar(db, institution_id, start_date, days))
+    calendar.update(user_days)
+    return calendar
+
+
+# --- Timetable ---
+async def set_institution_timetable(db: AsyncIOMotorDatabase, institution_id: str, weekdays: List[Dict]):
+    """Replace the given weekdays' slots; weekdays not listed keep their slots"""
+    for schedule in weekdays:
+        await db[INSTITUTION_SCHEDULES_COLLECTION].replace_one(
+            {"institution_id": institution_id, "weekday": schedule["weekday"]},
+            {**schedule, "institution_id": institution_id},
+            upsert=True
+        )
+    await invalidate_institution(db, institution_id)
+
+
+async def load_institution_timetable(db: AsyncIOMotorDatabase, institution_id: str) -> Dict[int, List[str]]:
+    """weekday -> subject codes in slot order"""
+    cached = institution_timetable_cache.get(institution_id)
+    if cached is not None:
+        return cached
+
+    docs = await db[INSTITUTION_SCHEDULES_COLLECTION].find({"institution_id": institution_id}).to_list(7)
+    timetable = {
+        doc["weekday"]: [slot["subject_code"] for slot in doc.get("slots", []) if slot.get("subject_code")]
+        for doc in docs
+    }
+    institution_timetable_cache.set(institution_id, timetable)
+    return timetable
+
+
+def merge_weekly_schedule(
+    user_schedule_docs: Iterable[Dict],
+    institution_timetable: Optional[Dict[int, List[str]]],
+    subject_ids_by_code: Dict[str, str]
+) -> Dict[str, List[str]]:
+    """
+    Engine weekly_schedule ({"Monday": [subject_id, ...]}) where the user's own
+    weekdays replace the institution's; institution codes map to the user's subjects
+    """
+    weekly_schedule = {}
+    for weekday, codes in (institution_timetable or {}).items():
+        subject_ids = [subject_ids_by_code[code] for code in codes if code in subject_ids_by_code]
+        if 0 <= weekday < len(WEEKDAY_NAMES):
+            weekly_schedule[WEEKDAY_NAMES[weekday]] = subject_ids
+
+    for doc in user_schedule_docs:
+        weekday = doc.get("weekday")
+        if isinstance(weekday, int) and 0 <= weekday < len(WEEKDAY_NAMES):
+            weekly_schedule[WEEKDAY_NAMES[weekday]] = [
+                slot["subject_id"] for slot in doc.get("slots", []) if "subject_id" in slot
+            ]
+    return weekly_schedule
+
+
+# --- Per-user calendar overrides ---
+async def set_user_day_override(db: AsyncIOMotorDatabase, user_id: str, day: str, day_type: str, name: Optional[str]):
+    await db[CALENDAR_OVERRIDES_COLLECTION].replace_one(
+        {"user_id": user_id, "date": day},
+        {"user_id": user_id, "date": day, "day_type": day_type, "name": name or day_type.title()},
+        upsert=True
+    )
+
+
+async def clear_user_day_override(db: AsyncIOMotorDatabase, user_id: str, day: str) -> bool:
+    result = await db[CALENDAR_OVERRIDES_COLLECTION].delete_one({"user_id": user_id, "date": day})
+    return result.deleted_count > 0
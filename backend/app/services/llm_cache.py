@@ -0,0 +1,80 @@
+"""
+Content-addressed cache for LLM JSON responses.
+
+Keys are the SHA-256 of (model, temperature, whitespace-normalized prompt),
+so identical calendar text or study-plan inputs from different users hit
+the same entry. Two tiers: an in-process LRU/TTL cache and the llm_cache
+Mongo collection (expired by a TTL index on expires_at).
+"""
+import hashlib
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Optional
+from app.core import database
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+LLM_CACHE_COLLECTION = "llm_cache"
+
+
+def prompt_cache_key(model: str, temperature: float, prompt: str) -> str:
+    normalized = " ".join(prompt.split())
+    payload = json.dumps([model, temperature, normalized], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    def __init__(self):
+        self.memory = TTLCache(maxsize=settings.LLM_CACHE_SIZE, ttl=settings.LLM_CACHE_TTL_SECONDS)
+
+    def _collection(self):
+        if not settings.LLM_CACHE_PERSISTENT or database.db.client is None:
+            return None
+        return database.db.get_db()[LLM_CACHE_COLLECTION]
+
+    async def get(self, key: str) -> Optional[Any]:
+        value = self.memory.get(key)
+        if value is not None:
+            return value
+
+        collection = self._collection()
+        if collection is None:
+            return None
+        try:
+            doc = await collection.find_one({"_id": key, "expires_at": {"$gt": datetime.utcnow()}})
+        except Exception as e:
+            logger.warning(f"LLM cache lookup failed: {e}")
+            return None
+        if doc is None:
+            return None
+
+        self.memory.set(key, doc["response"])
+        return doc["response"]
+
+    async def set(self, key: str, value: Any, model: str):
+        self.memory.set(key, value)
+
+        collection = self._collection()
+        if collection is None:
+            return
+        now = datetime.utcnow()
+        try:
+            await collection.replace_one(
+                {"_id": key},
+                {
+                    "_id": key,
+                    "model": model,
+                    "response": value,
+                    "created_at": now,
+                    "expires_at": now + timedelta(seconds=settings.LLM_CACHE_TTL_SECONDS)
+                },
+                upsert=True
+            )
+        except Exception as e:
+            logger.warning(f"LLM cache write failed: {e}")
+
+
+llm_cache = LLMResponseCache()
@@ -1,47 +1,182 @@
 import pdfplumber
 import pytesseract
-from PIL import Image
-import io
-from fastapi import UploadFile
+from PIL import Image, ImageOps
+from typing import List
+from app.core.config import settings
+from app.core.executor import BoundedExecutor, ExecutorBusyError, ExecutorTimeoutError
 
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
 
-executor = ThreadPoolExecutor()
+# One process per core; a full queue raises ExecutorBusyError instead of oversubscribing
+ocr_executor = BoundedExecutor(
+    "ocr",
+    mode="process",
+    max_workers=settings.OCR_WORKERS,
+    max_queue=settings.OCR_MAX_QUEUE,
+    timeout=settings.OCR_JOB_TIMEOUT_SECONDS
+)
 
-def _process_pdf(content: bytes) -> str:
-    text = ""
+def shutdown_executors():
+    ocr_executor.shutdown()
+
+def _pdf_page_count(path: str) -> int:
+    with pdfplumber.open(path) as pdf:
+        return len(pdf.pages)
+
+def _extract_pdf_pages(path: str, page_numbers: List[int], ocr_resolution: int) -> List[str]:
+    """
+    Runs in a worker process: text of the given pages, in order.
+    Pages without a text layer (scans) are rendered and OCR'd instead.
+    """
+    texts = []
+    with pdfplumber.open(path) as pdf:
+        for number in page_numbers:
+            page = pdf.pages[number]
+            text = page.extract_text() or ""
+            if not text.strip():
+                try:
+                    image = page.to_image(resolution=ocr_resolution).original
+                    text = _ocr_image(image)
+                except Exception as e:
+                    print(f"OCR of PDF page {number + 1} failed: {e}")
+            texts.append(text)
+    return texts
+
+async def _process_pdf(path: str) -> str:
+    """
+    Extract pages in parallel across the OCR process pool, joined in page order.
+    Works through the document in rounds and stops early once PDF_MAX_CHARS
+    of text has been collected or PDF_MAX_PAGES pages have been read.
+    """
     try:
-        with pdfplumber.open(io.BytesIO(content)) as pdf:
-            for page in pdf.pages:
-                text += page.extract_text() or ""
+        page_count = await ocr_executor.run(_pdf_page_count, path)
+    except (ExecutorBusyError, ExecutorTimeoutError):
+        raise
     except Exception as e:
         print(f"PDF extraction failed: {e}")
-    return text
+        return ""
+    page_count = min(page_count, settings.PDF_MAX_PAGES)
+    
+    per_task = max(1, settings.PDF_PAGES_PER_TASK)
+    round_size = ocr_executor.max_workers * per_task
+    pages: List[str] = []
+    collected = 0
+    
+    for round_start in range(0, page_count, round_size):
+        round_end = min(round_start + round_size, page_count)
+        chunks = [
+            list(range(start, min(start + per_task, round_end)))
+            for start in range(round_start, round_end, per_task)
+        ]
+        try:
+            results = await asyncio.gather(*(
+                ocr_executor.run(_extract_pdf_pages, path, chunk, settings.PDF_OCR_RESOLUTION)
+                for chunk in chunks
+            ))
+        except (ExecutorBusyError, ExecutorTimeoutError):
+            raise
+        except Exception as e:
+            print(f"PDF extraction failed: {e}")
+            break
+        
+        for chunk_texts in results:
+            pages.extend(chunk_texts)
+            collected += sum(len(text) for text in chunk_texts)
+        if collected >= settings.PDF_MAX_CHARS:
+            break
+    
+    return "\n".join(text for text in pages if text)
+
+def _otsu_threshold(image: Image.Image) -> int:
+    """Grey level that best separates ink from paper (Otsu's method)"""
+    histogram = image.histogram()[:256]
+    total = sum(histogram)
+    sum_all = sum(level * count for level, count in enumerate(histogram))
+    sum_background = weight_background = 0
+    best_threshold, best_variance = 127, 0.0
+    for level, count in enumerate(histogram):
+        weight_background += count
+        if weight_background == 0:
+            continue
+        weight_foreground = total - weight_background
+        if weight_foreground == 0:
+            break
+        sum_background += level * count
+        mean_background = sum_background / weight_background
+        mean_foreground = (sum_all - sum_background) / weight_foreground
+        variance = weight_background * weight_foreground * (mean_background - mean_foreground) ** 2
+        if variance > best_variance:
+            best_threshold, best_variance = level, variance
+    return best_threshold
+
+def _preprocess_image(image: Image.Image) -> Image.Image:
+    """
+    Make a photo/scan cheap and clean for tesseract:
+    EXIF rotation, downscale to OCR_TARGET_DPI / OCR_MAX_IMAGE_SIDE,
+    grayscale, Otsu binarization and optional cropping to the content.
+    """
+    image = ImageOps.exif_transpose(image)
+    
+    scale = 1.0
+    dpi = image.info.get("dpi", (0, 0))[0]
+    if dpi and dpi > settings.OCR_TARGET_DPI:
+        scale = settings.OCR_TARGET_DPI / dpi
+    longest_side = max(image.size) * scale
+    if longest_side > settings.OCR_MAX_IMAGE_SIDE:
+        scale *= settings.OCR_MAX_IMAGE_SIDE / longest_side
+    if scale < 1.0:
+        width, height = image.size
+        image = image.resize((max(1, round(width * scale)), max(1, round(height * scale))), Image.LANCZOS)
+    
+    image = ImageOps.autocontrast(ImageOps.grayscale(image))
+    threshold = _otsu_threshold(image)
+    image = image.point(lambda level: 255 if level > threshold else 0)
+    
+    if settings.OCR_CROP_TO_CONTENT:
+        bbox = ImageOps.invert(image).getbbox()  # Box around the dark (ink) pixels
+        if bbox:
+            margin = 10
+            left, top, right, bottom = bbox
+            image = image.crop((
+                max(0, left - margin),
+                max(0, top - margin),
+                min(image.width, right + margin),
+                min(image.height, bottom + margin)
+            ))
+    
+    return image
+
+def _ocr_image(image: Image.Image) -> str:
+    if settings.OCR_PREPROCESS:
+        image = _preprocess_image(image)
+    psm = settings.OCR_TESSERACT_PSM
+    return pytesseract.image_to_string(image, config=f"--psm {psm}" if psm is not None else "")
 
-def _process_image(content: bytes) -> str:
+def _process_image(path: str) -> str:
     try:
-        image = Image.open(io.BytesIO(content))
-        return pytesseract.image_to_string(image)
+        with Image.open(path) as image:
+            return _ocr_image(image)
     except Exception as e:
         print(f"OCR failed: {e}")
         return ""
 
-async def extract_text_from_file(file: UploadFile) -> str:
-    content = await file.read()
+async def extract_text_from_path(path: str, content_type: str) -> str:
+    """
+    Raises ExecutorBusyError when the OCR queue is full and
+    ExecutorTimeoutError when a page or image takes too long
+    """
     text = ""
-    loop = asyncio.get_event_loop()
     
     # Try PDF
-    if file.content_type == "application/pdf":
-        text = await loop.run_in_executor(executor, _process_pdf, content)
+    if content_type == "application/pdf":
+        text = await _process_pdf(path)
         if len(text.strip()) > 50:
             print("PDF text extraction successful.")
             return text
             
     # Fallback to Image OCR (tesseract)
-    if file.content_type != "application/pdf":
-        text = await loop.run_in_executor(executor, _process_image, content)
+    if content_type != "application/pdf":
+        text = await ocr_executor.run(_process_image, path)
         if not text:
             print("OCR/Text extraction returned empty.")
             return ""
@@ -0,0 +1,158 @@
+"""
+Loads everything the vacation engine needs for one student:
+subjects with tracked attendance, the effective weekly schedule and the
+effective academic calendar slice (institution data + personal overrides).
+
+load_engine_inputs_bulk does the same for many students with one $in query
+per collection instead of a round of queries per student.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from app.core.vacation_engine import DayType
+from app.services.attendance_counters import COUNTERS_COLLECTION, ensure_counters_bulk
+from app.services.attendance_stats import get_attendance_summary, tracked_lectures
+from app.services.calendar_days import CALENDAR_DAYS_COLLECTION, CALENDAR_OVERRIDES_COLLECTION, load_calendar_slice
+from app.services.institutions import (
+    load_effective_calendar,
+    load_institution_calendar,
+    load_institution_timetable,
+    merge_weekly_schedule
+)
+
+MAX_SUBJECTS = 100
+
+
+def _assemble_inputs(
+    subjects_docs: List[Dict],
+    counts_by_subject: Dict[str, Dict],
+    schedule_docs: List[Dict],
+    institution_timetable: Optional[Dict[int, List[str]]],
+    academic_calendar: Dict[str, DayType]
+) -> Dict:
+    subjects_data = []
+    for s in subjects_docs:
+        sid = str(s["_id"])
+        stats = tracked_lectures(counts_by_subject[sid]) if sid in counts_by_subject else {"attended": 0, "total": 0}
+        subjects_data.append({
+            "id": sid,
+            "name": s["name"],
+            "code": s.get("code"),
+            "attended": stats["attended"],
+            "total": stats["total"]
+        })
+
+    # Own weekdays override the institution timetable
+    subject_ids_by_code = {s.get("code"): str(s["_id"]) for s in subjects_docs if s.get("code")}
+    weekly_schedule = merge_weekly_schedule(schedule_docs, institution_timetable, subject_ids_by_code)
+
+    return {
+        "subjects_data": subjects_data,
+        "weekly_schedule": weekly_schedule,
+        "academic_calendar": academic_calendar
+    }
+
+
+async def load_engine_inputs(
+    db: AsyncIOMotorDatabase,
+    user_id: str,
+    institution_id: Optional[str],
+    start_date: datetime,
+    search_days: int
+) -> Dict:
+    """Keyword arguments for generate_vacation_plan: subjects_data, weekly_schedule, academic_calendar"""
+    subjects_docs = await db["subjects"].find({"user_id": user_id}).to_list(MAX_SUBJECTS)
+    summary = await get_attendance_summary(db, user_id)
+    schedule_docs = await db["schedules"].find({"user_id": user_id}).to_list(7)
+    institution_timetable = await load_institution_timetable(db, institution_id) if institution_id else None
+
+    # Only the days inside the search horizon
+    academic_calendar = await load_effective_calendar(
+        db, user_id, institution_id, start_date, search_days
+    )
+
+    return _assemble_inputs(
+        subjects_docs, summary["subjects"], schedule_docs, institution_timetable, academic_calendar
+    )
+
+
+async def load_engine_inputs_bulk(
+    db: AsyncIOMotorDatabase,
+    users: List[Dict],
+    start_date: datetime,
+    search_days: int
+) -> Dict[str, Dict]:
+    """
+    users: [{"id", "institution_id"}]
+    Returns user_id -> load_engine_inputs() result
+    """
+    user_ids = [u["id"] for u in users]
+    in_users = {"user_id": {"$in": user_ids}}
+
+    subjects_by_user = defaultdict(list)
+    async for doc in db["subjects"].find(in_users):
+        if len(subjects_by_user[doc["user_id"]]) < MAX_SUBJECTS:
+            subjects_by_user[doc["user_id"]].append(doc)
+
+    await ensure_counters_bulk(db, user_ids)
+    counts_by_user = defaultdict(dict)
+    async for doc in db[COUNTERS_COLLECTION].find(in_users, {"_id": 0}):
+        counts_by_user[doc["user_id"]][doc["subject_id"]] = {
+            "present": doc.get("present", 0),
+            "absent": doc.get("absent", 0)
+        }
+
+    schedules_by_user = defaultdict(list)
+    async for doc in db["schedules"].find(in_users):
+        if len(schedules_by_user[doc["user_id"]]) < 7:
+            schedules_by_user[doc["user_id"]].append(doc)
+
+    # Personal calendar days inside the horizon
+    start, end = start_date.strftime("%Y-%m-%d"), (start_date + timedelta(days=search_days)).strftime("%Y-%m-%d")
+    days_by_user = defaultdict(dict)
+    async for row in db[CALENDAR_DAYS_COLLECTION].find(
+        {**in_users, "date": {"$gte": start, "$lt": end}},
+        {"_id": 0, "user_id": 1, "date": 1, "day_type": 1}
+    ):
+        days_by_user[row["user_id"]][row["date"]] = DayType(row["day_type"])
+
+    # Users whose only calendar predates calendar_days go through the backfill once
+    without_days = [uid for uid in user_ids if uid not in days_by_user]
+    if without_days:
+        with_rows = set(await db[CALENDAR_DAYS_COLLECTION].distinct("user_id", {"user_id": {"$in": without_days}}))
+        legacy = await db["academic_calendars"].distinct(
+            "user_id",
+            {"user_id": {"$in": [uid for uid in without_days if uid not in with_rows]}, "days_expanded": {"$ne": True}}
+        )
+        for uid in legacy:
+            days_by_user[uid] = await load_calendar_slice(db, uid, start_date, search_days)
+
+    # Days set by hand win over uploaded ones
+    async for row in db[CALENDAR_OVERRIDES_COLLECTION].find(
+        {**in_users, "date": {"$gte": start, "$lt": end}},
+        {"_id": 0, "user_id": 1, "date": 1, "day_type": 1}
+    ):
+        days_by_user[row["user_id"]][row["date"]] = DayType(row["day_type"])
+
+    # Shared data once per institution (and cached across requests)
+    institution_ids = {u["institution_id"] for u in users if u.get("institution_id")}
+    timetables, calendars = {}, {}
+    for institution_id in institution_ids:
+        timetables[institution_id] = await load_institution_timetable(db, institution_id)
+        calendars[institution_id] = await load_institution_calendar(db, institution_id, start_date, search_days)
+
+    inputs = {}
+    for user in users:
+        uid, institution_id = user["id"], user.get("institution_id")
+        academic_calendar = days_by_user.get(uid, {})
+        if institution_id:
+            academic_calendar = {**calendars[institution_id], **academic_calendar}
+        inputs[uid] = _assemble_inputs(
+            subjects_by_user[uid],
+            counts_by_user[uid],
+            schedules_by_user[uid],
+            timetables.get(institution_id),
+            academic_calendar
+        )
+    return inputs
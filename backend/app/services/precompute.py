@@ -0,0 +1,82 @@
+"""
+Nightly materialization of /planner/recommend results into `recommendations`.
+
+Runs from precompute_recommendations.py (cron) or, with PRECOMPUTE_ENABLED,
+as a background task in the API process: a full run at PRECOMPUTE_HOUR and
+a refresh of stale entries every PRECOMPUTE_STALE_INTERVAL_SECONDS.
+"""
+import asyncio
+import logging
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from app.core.config import settings
+from app.core.executor import ExecutorBusyError
+from app.services import recommendation_store
+from app.services.batch_recommendations import recommend_for_users
+from app.services.vacation_service import DEFAULT_SEARCH_PARAMS
+
+logger = logging.getLogger(__name__)
+
+
+async def active_user_ids(db: AsyncIOMotorDatabase) -> List[str]:
+    """Users with at least one subject (nothing to recommend otherwise)"""
+    return await db["subjects"].distinct("user_id")
+
+
+async def precompute_recommendations(
+    db: AsyncIOMotorDatabase,
+    stale_only: bool = False,
+    user_ids: Optional[List[str]] = None
+) -> Dict[str, int]:
+    """Compute and store today's default recommendations; returns counts"""
+    start_date = datetime.combine(date.today(), datetime.min.time())
+    if user_ids is None:
+        user_ids = await (
+            recommendation_store.stale_user_ids(db, start_date) if stale_only else active_user_ids(db)
+        )
+
+    totals = {"users": 0, "written": 0, "skipped": 0}
+    batch_size = settings.PRECOMPUTE_BATCH_SIZE
+    for i in range(0, len(user_ids), batch_size):
+        chunk = [uid for uid in user_ids[i:i + batch_size] if ObjectId.is_valid(uid)]
+        docs = await db["users"].find(
+            {"_id": {"$in": [ObjectId(uid) for uid in chunk]}}, {"institution_id": 1}
+        ).to_list(None)
+        users = [{"id": str(doc["_id"]), "institution_id": doc.get("institution_id")} for doc in docs]
+
+        computed_from = datetime.utcnow()
+        batch = await recommend_for_users(db, users, start_date, settings.DEFAULT_MIN_ATTENDANCE, DEFAULT_SEARCH_PARAMS)
+        for user_id, response in batch["results"].items():
+            if await recommendation_store.store(db, user_id, start_date, response, computed_from):
+                totals["written"] += 1
+            else:
+                totals["skipped"] += 1  # Inputs changed while computing; stays stale
+        totals["users"] += len(users)
+
+    return totals
+
+
+def _seconds_until_hour(hour: int) -> float:
+    now = datetime.now()
+    target = now.replace(hour=hour, minute=0, second=0, microsecond=0)
+    if target <= now:
+        target += timedelta(days=1)
+    return (target - now).total_seconds()
+
+
+async def run_precompute_loop(db: AsyncIOMotorDatabase):
+    """Background task: full run nightly, stale refresh in between"""
+    stale_interval = settings.PRECOMPUTE_STALE_INTERVAL_SECONDS
+    while True:
+        until_full = _seconds_until_hour(settings.PRECOMPUTE_HOUR)
+        full_run = not stale_interval or until_full <= stale_interval
+        await asyncio.sleep(until_full if full_run else stale_interval)
+        try:
+            totals = await precompute_recommendations(db, stale_only=not full_run)
+            logger.info(f"Precomputed recommendations ({'full' if full_run else 'stale'}): {totals}")
+        except ExecutorBusyError:
+            logger.warning("Vacation engine busy, precompute run skipped")
+        except Exception as e:
+            logger.error(f"Recommendation precompute failed: {e}")
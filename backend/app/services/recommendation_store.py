@@ -0,0 +1,104 @@
+"""
+Materialized /planner/recommend results (default parameters) per user.
+
+recommendations holds one document per user:
+    {"_id": user_id, "start_date": "YYYY-MM-DD", "response": {...},
+     "computed_at": datetime, "stale": bool, "invalidated_at": datetime,
+     "generation": int}
+
+The precompute job (precompute_recommendations.py or the optional
+background task) fills it ahead of the morning peak. Any change to a
+user's engine inputs marks the entry stale; /planner/recommend serves
+fresh entries for today and computes live otherwise.
+
+`generation` counts invalidations. Every worker's in-memory recommendation
+cache tags entries with it, so an invalidation in one worker also retires
+the cached entries of all the others.
+"""
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+RECOMMENDATIONS_COLLECTION = "recommendations"
+
+
+async def mark_stale(db: AsyncIOMotorDatabase, user_ids: Iterable[str]) -> int:
+    """
+    Upserted, so users without an entry get a stale tombstone too: store()
+    needs invalidated_at to reject results computed from older inputs
+    """
+    now = datetime.utcnow()
+    operations = [
+        UpdateOne(
+            {"_id": user_id},
+            {"$set": {"stale": True, "invalidated_at": now}, "$inc": {"generation": 1}},
+            upsert=True
+        )
+        for user_id in dict.fromkeys(user_ids)
+    ]
+    if not operations:
+        return 0
+    result = await db[RECOMMENDATIONS_COLLECTION].bulk_write(operations, ordered=False)
+    return result.modified_count + result.upserted_count
+
+
+async def generations(db: AsyncIOMotorDatabase, user_ids: Iterable[str]) -> Dict[str, int]:
+    """user_id -> invalidation count (0 if never invalidated)"""
+    user_ids = list(dict.fromkeys(user_ids))
+    cursor = db[RECOMMENDATIONS_COLLECTION].find({"_id": {"$in": user_ids}}, {"generation": 1})
+    found = {doc["_id"]: doc.get("generation", 0) async for doc in cursor}
+    return {user_id: found.get(user_id, 0) for user_id in user_ids}
+
+
+async def get_fresh(db: AsyncIOMotorDatabase, user_id: str, start_date: datetime) -> Optional[Dict]:
+    """Stored response if it was computed for this start date and nothing changed since"""
+    doc = await db[RECOMMENDATIONS_COLLECTION].find_one(
+        {"_id": user_id, "start_date": start_date.strftime("%Y-%m-%d"), "stale": False},
+        {"response": 1}
+    )
+    return doc["response"] if doc else None
+
+
+async def store(
+    db: AsyncIOMotorDatabase,
+    user_id: str,
+    start_date: datetime,
+    response: Dict,
+    computed_from: datetime
+) -> bool:
+    """
+    Save a response computed from inputs read at `computed_from` (UTC).
+    Skipped (False) if the user's inputs were invalidated after that, so a
+    slow precompute can't overwrite a newer invalidation with an old result.
+    """
+    try:
+        await db[RECOMMENDATIONS_COLLECTION].update_one(
+            {
+                "_id": user_id,
+                "$or": [
+                    {"invalidated_at": {"$exists": False}},
+                    {"invalidated_at": {"$lt": computed_from}}
+                ]
+            },
+            {"$set": {
+                "start_date": start_date.strftime("%Y-%m-%d"),
+                "response": response,
+                "computed_at": datetime.utcnow(),
+                "stale": False
+            }},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        return False  # Entry exists but was invalidated after computed_from
+    return True
+
+
+async def stale_user_ids(db: AsyncIOMotorDatabase, start_date: datetime) -> list:
+    """Users whose entry is stale or was computed for an earlier day"""
+    cursor = db[RECOMMENDATIONS_COLLECTION].find(
+        {"$or": [{"stale": True}, {"start_date": {"$ne": start_date.strftime("%Y-%m-%d")}}]},
+        {"_id": 1}
+    )
+    return [doc["_id"] async for doc in cursor]
@@ -0,0 +1,139 @@
+"""
+Spool uploads to disk in chunks instead of reading them into memory.
+
+The size limit is enforced while streaming, and the SHA-256 is computed
+on the way through, so parsers can open the file by path and large or
+malicious uploads never sit in worker memory.
+
+spool_request_file parses the multipart request stream itself, so an
+oversized upload is rejected from its Content-Length (or as soon as too
+many bytes arrive) and the file is written to disk once.
+"""
+import hashlib
+import os
+import tempfile
+from typing import NamedTuple, Optional
+from fastapi import Request
+from app.core.config import settings
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
+
+# Boundaries and part headers on top of the file itself
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+class UploadTooLargeError(Exception):
+    """Raised when an upload exceeds UPLOAD_MAX_BYTES"""
+
+
+class MalformedUploadError(Exception):
+    """Raised when the request is not multipart or has no file in the expected field"""
+
+
+class SpooledUpload(NamedTuple):
+    path: str
+    sha256: str
+    size: int
+    content_type: Optional[str] = None
+    filename: Optional[str] = None
+
+
+async def spool_request_file(request: Request, field: str = "file", max_bytes: int = None) -> SpooledUpload:
+    """
+    Stream the `field` file part of a multipart request to a temp file.
+    Other parts are discarded. The caller removes the file (discard_upload).
+    """
+    max_bytes = max_bytes or settings.UPLOAD_MAX_BYTES
+    max_body = max_bytes + MULTIPART_OVERHEAD_BYTES
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > max_body:
+        raise UploadTooLargeError(f"Upload exceeds {max_bytes} bytes")
+
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or not params.get(b"boundary"):
+        raise MalformedUploadError("Expected a multipart/form-data upload")
+
+    digest = hashlib.sha256()
+    state = {"size": 0, "writing": False, "found": None, "headers": {}, "name": b"", "value": b""}
+
+    fd, path = tempfile.mkstemp(prefix="svp-upload-", dir=settings.UPLOAD_TMP_DIR)
+    out = os.fdopen(fd, "wb")
+
+    def on_part_begin():
+        state["headers"] = {}
+
+    def on_header_field(data, start, end):
+        state["name"] += data[start:end]
+
+    def on_header_value(data, start, end):
+        state["value"] += data[start:end]
+
+    def on_header_end():
+        state["headers"][state["name"].lower()] = state["value"]
+        state["name"] = state["value"] = b""
+
+    def on_headers_finished():
+        _, options = parse_options_header(state["headers"].get(b"content-disposition", b""))
+        state["writing"] = (
+            state["found"] is None and options.get(b"name") == field.encode() and b"filename" in options
+        )
+        if state["writing"]:
+            part_type = state["headers"].get(b"content-type")
+            state["found"] = (
+                part_type.decode("latin-1") if part_type else None,
+                options[b"filename"].decode("utf-8", "replace")
+            )
+
+    def on_part_data(data, start, end):
+        if not state["writing"]:
+            return
+        chunk = data[start:end]
+        state["size"] += len(chunk)
+        if state["size"] > max_bytes:
+            raise UploadTooLargeError(f"Upload exceeds {max_bytes} bytes")
+        digest.update(chunk)
+        out.write(chunk)
+
+    def on_part_end():
+        state["writing"] = False
+
+    parser = MultipartParser(params[b"boundary"], {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end
+    })
+
+    try:
+        received = 0
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > max_body:
+                raise UploadTooLargeError(f"Upload exceeds {max_bytes} bytes")
+            parser.write(chunk)
+        parser.finalize()
+        out.close()
+        if state["found"] is None:
+            raise MalformedUploadError(f"No file in form field '{field}'")
+    except BaseException:
+        out.close()
+        discard_upload(path)
+        raise
+
+    part_type, filename = state["found"]
+    return SpooledUpload(
+        path=path, sha256=digest.hexdigest(), size=state["size"], content_type=part_type, filename=filename
+    )
+
+
+def discard_upload(path: str):
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
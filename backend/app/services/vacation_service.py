@@ -1,17 +1,94 @@
 from datetime import datetime
+from typing import Iterable, Optional
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.executor import BoundedExecutor
+from app.core.attendance_planner import ExtraAttendancePlanner
+from app.services import recommendation_store
+from motor.motor_asyncio import AsyncIOMotorDatabase
 from app.core.vacation_engine import (
     Subject,
     VacationRecommendationEngine,
     AIReasoningLayer,
-    DayType
+    DayType,
+    LectureMatrix,
+    DEFAULT_SEARCH_DAYS,
+    DEFAULT_MIN_WINDOW,
+    DEFAULT_MAX_WINDOW
 )
 
-def generate_vacation_plan(
-    subjects_data,
-    weekly_schedule,
-    academic_calendar,
-    min_attendance
+# Cached /planner/recommend responses keyed by (user_id, start_date, engine params).
+# Values are (generation, response): an entry only counts as a hit while the
+# user's invalidation count in the recommendation store is unchanged, so
+# invalidations by any worker retire the entries cached by every worker
+recommendation_cache = TTLCache(
+    maxsize=settings.RECOMMENDATION_CACHE_SIZE,
+    ttl=settings.RECOMMENDATION_CACHE_TTL_SECONDS
+)
+
+def recommendation_cache_key(
+    user_id: str,
+    start_date: datetime,
+    min_attendance: float,
+    search_days: int = DEFAULT_SEARCH_DAYS,
+    min_window: int = DEFAULT_MIN_WINDOW,
+    max_window: int = DEFAULT_MAX_WINDOW,
+    objective: str = "score"
 ):
+    return (
+        user_id,
+        start_date.strftime("%Y-%m-%d"),
+        min_attendance,
+        settings.VACATION_ENGINE_BACKEND,
+        search_days,
+        min_window,
+        max_window,
+        objective
+    )
+
+# /planner/recommend without query parameters; what the precompute job materializes
+DEFAULT_SEARCH_PARAMS = {
+    "search_days": DEFAULT_SEARCH_DAYS,
+    "min_window": DEFAULT_MIN_WINDOW,
+    "max_window": DEFAULT_MAX_WINDOW,
+    "objective": "score"
+}
+
+# Keeps the CPU-bound window search off the event loop
+engine_executor = BoundedExecutor(
+    "vacation-engine",
+    mode=settings.VACATION_ENGINE_EXECUTOR,
+    max_workers=settings.VACATION_ENGINE_WORKERS,
+    max_queue=settings.VACATION_ENGINE_MAX_QUEUE,
+    timeout=settings.VACATION_ENGINE_TIMEOUT_SECONDS
+)
+
+async def recommendation_generation(db: AsyncIOMotorDatabase, user_id: str) -> int:
+    """Read before loading engine inputs; pass to cached_recommendation and cache_recommendation"""
+    return (await recommendation_store.generations(db, [user_id]))[user_id]
+
+def cached_recommendation(cache_key, generation: int) -> Optional[dict]:
+    """Cached response, unless it was computed before the user's latest invalidation"""
+    entry = recommendation_cache.get(cache_key)
+    if entry is None or entry[0] != generation:
+        return None
+    return entry[1]
+
+def cache_recommendation(cache_key, generation: int, response):
+    """`generation` as read before the inputs were loaded, so a mid-compute invalidation retires it"""
+    recommendation_cache.set(cache_key, (generation, response))
+
+def invalidate_cached_recommendations(user_ids: Iterable[str]) -> int:
+    """Drop this worker's entries right away (other workers retire theirs by generation)"""
+    user_ids = set(user_ids)
+    return recommendation_cache.invalidate(lambda key: key[0] in user_ids)
+
+async def invalidate_recommendations(db: AsyncIOMotorDatabase, user_id: str) -> int:
+    """Drop cached recommendations after any change to the user's engine inputs"""
+    await recommendation_store.mark_stale(db, [user_id])
+    return invalidate_cached_recommendations([user_id])
+
+def _build_engine(subjects_data, weekly_schedule, academic_calendar, min_attendance) -> VacationRecommendationEngine:
     # 1️⃣ Convert subjects to engine objects
     subjects = []
     for s in subjects_data:
@@ -26,18 +103,42 @@ def generate_vacation_plan(
         )
 
     # 2️⃣ Initialize engine
-    engine = VacationRecommendationEngine(
+    return VacationRecommendationEngine(
         subjects=subjects,
         weekly_schedule=weekly_schedule,
         academic_calendar=academic_calendar,
         global_threshold=min_attendance
     )
 
+def _plan_with_engine(
+    engine: VacationRecommendationEngine,
+    start_date: datetime,
+    search_days: int,
+    min_window: int,
+    max_window: int,
+    objective: str,
+    matrix: Optional[LectureMatrix] = None
+):
     # 3️⃣ Run simulation
-    safe_windows = engine.find_safe_vacations(
-        start_date=datetime.now(),
-        top_n=3
-    )
+    if objective == "pareto":
+        safe_windows = engine.find_pareto_vacations(
+            start_date=start_date,
+            search_days=search_days,
+            min_window=min_window,
+            max_window=max_window,
+            limit=settings.VACATION_PARETO_MAX_RESULTS,
+            matrix=matrix
+        )
+    else:
+        safe_windows = engine.find_safe_vacations(
+            start_date=start_date,
+            top_n=3,
+            backend=settings.VACATION_ENGINE_BACKEND,
+            search_days=search_days,
+            min_window=min_window,
+            max_window=max_window,
+            matrix=matrix
+        )
 
     # 4️⃣ Generate AI prompt
     ai_prompt = AIReasoningLayer.generate_ai_prompt(
@@ -53,3 +154,107 @@ def generate_vacation_plan(
         vacation_windows=safe_windows,
         ai_explanation=ai_response
     )
+
+def generate_vacation_plan(
+    subjects_data,
+    weekly_schedule,
+    academic_calendar,
+    min_attendance,
+    start_date: Optional[datetime] = None,
+    search_days: int = DEFAULT_SEARCH_DAYS,
+    min_window: int = DEFAULT_MIN_WINDOW,
+    max_window: int = DEFAULT_MAX_WINDOW,
+    objective: str = "score"
+):
+    # 1️⃣ + 2️⃣ Engine over the student's subjects
+    engine = _build_engine(subjects_data, weekly_schedule, academic_calendar, min_attendance)
+    return _plan_with_engine(
+        engine, start_date or datetime.now(), search_days, min_window, max_window, objective
+    )
+
+def generate_group_vacation_plans(
+    weekly_schedule,
+    academic_calendar,
+    members,
+    min_attendance,
+    start_date: datetime,
+    search_days: int = DEFAULT_SEARCH_DAYS,
+    min_window: int = DEFAULT_MIN_WINDOW,
+    max_window: int = DEFAULT_MAX_WINDOW,
+    objective: str = "score"
+):
+    """
+    generate_vacation_plan for students sharing one calendar and timetable
+    
+    weekly_schedule is in shared subject keys (e.g. codes); each member is
+    {"user_id", "subjects_data", "subject_keys": {subject_id: key}}.
+    The lecture matrix is built once and relabelled per student.
+    Returns user_id -> plan
+    """
+    keys = sorted({key for member in members for key in member["subject_keys"].values()})
+    template = VacationRecommendationEngine(
+        subjects=[Subject(key, key, 0, 0, min_attendance) for key in keys],
+        weekly_schedule=weekly_schedule,
+        academic_calendar=academic_calendar,
+        global_threshold=min_attendance
+    )
+    shared_matrix = template.build_lecture_matrix(start_date, search_days)
+
+    plans = {}
+    for member in members:
+        engine = _build_engine(member["subjects_data"], {}, academic_calendar, min_attendance)
+        plans[member["user_id"]] = _plan_with_engine(
+            engine, start_date, search_days, min_window, max_window, objective,
+            matrix=shared_matrix.relabel(member["subject_keys"])
+        )
+    return plans
+
+def recommendation_response(result, objective: str, subjects_count: int, search_params) -> dict:
+    """/planner/recommend response body from a generate_vacation_plan result"""
+    windows = []
+    if result["success"]:
+        for opt in result["vacation_options"]:
+            window = {
+                "start_date": opt["start_date"],
+                "end_date": opt["end_date"],
+                "reason": f"Safe! Leaves: {opt['leave_days']}, Score: {opt['score']}"
+            }
+            if objective == "pareto":
+                projections = opt["subject_projections"].values()
+                window.update(
+                    leave_days=opt["leave_days"],
+                    min_buffer=round(min((p["projected_buffer"] for p in projections), default=0.0), 2),
+                    total_drop=round(sum(p["current_attendance"] - p["projected_attendance"] for p in projections), 2)
+                )
+            windows.append(window)
+
+    return {
+        "windows": windows,
+        "ai_advice": result["ai_advice"],
+        "debug_info": {"subjects_count": subjects_count, **search_params}
+    }
+
+async def run_vacation_plan(**kwargs):
+    """
+    generate_vacation_plan on the engine executor
+    Raises ExecutorBusyError / ExecutorTimeoutError when overloaded
+    """
+    return await engine_executor.run(generate_vacation_plan, **kwargs)
+
+def plan_extra_attendance(
+    subjects_data,
+    weekly_schedule,
+    academic_calendar,
+    min_attendance,
+    start_date: datetime,
+    window_start: datetime,
+    window_end: datetime
+):
+    """Fewest class days to attend before [window_start, window_end] so it becomes safe"""
+    engine = _build_engine(subjects_data, weekly_schedule, academic_calendar, min_attendance)
+    planner = ExtraAttendancePlanner(engine, max_states=settings.ATTENDANCE_PLANNER_MAX_STATES)
+    return planner.plan(start_date, window_start, window_end).to_dict()
+
+async def run_extra_attendance_plan(**kwargs):
+    """plan_extra_attendance on the engine executor"""
+    return await engine_executor.run(plan_extra_attendance, **kwargs)
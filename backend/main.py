@@ -1,10 +1,13 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import asyncio
 from app.core.config import settings
-from app.core import database
+from app.core import database, security
 from app.core.logging_config import setup_logging
 from app.routers import auth, attendance, planner, subjects
+from app.services import vacation_service, ocr, precompute
+from app.services.ai_engine import ai_engine
 import logging
 
 # Initialize logging
@@ -17,10 +20,19 @@ async def lifespan(app: FastAPI):
     logger.info("Starting up Student Vacation Planner 2.0 API...")
     database.db.connect()
     await database.db.create_indexes()
+    precompute_task = None
+    if settings.PRECOMPUTE_ENABLED:
+        precompute_task = asyncio.create_task(precompute.run_precompute_loop(database.db.get_db()))
     logger.info("Application startup complete")
     yield
     # Shutdown
     logger.info("Shutting down application...")
+    if precompute_task:
+        precompute_task.cancel()
+    vacation_service.engine_executor.shutdown()
+    security.password_executor.shutdown()
+    ocr.shutdown_executors()
+    await ai_engine.close()
     database.db.close()
     logger.info("Application shutdown complete")
 
@@ -43,6 +55,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Routers
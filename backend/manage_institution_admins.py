@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+"""
+Grant or revoke institution admin rights for SVP 2.0
+Admins can replace the shared calendar/timetable and batch-read members' recommendations.
+Usage:
+    python manage_institution_admins.py INSTITUTION_ID --list
+    python manage_institution_admins.py INSTITUTION_ID --grant EMAIL_OR_USER_ID
+    python manage_institution_admins.py INSTITUTION_ID --revoke EMAIL_OR_USER_ID
+"""
+
+import argparse
+import asyncio
+from bson import ObjectId
+from app.core import database
+from app.services import institutions
+
+
+async def resolve_user_id(db, user: str) -> str:
+    query = {"_id": ObjectId(user)} if ObjectId.is_valid(user) else {"email": user}
+    doc = await db["users"].find_one(query, {"_id": 1})
+    if not doc:
+        raise SystemExit(f"No user {user}")
+    return str(doc["_id"])
+
+
+async def main(institution_id: str, grant: str = None, revoke: str = None):
+    database.db.connect()
+    db = database.db.get_db()
+    try:
+        if grant:
+            user_id = await resolve_user_id(db, grant)
+            await institutions.grant_institution_admin(db, institution_id, user_id)
+            print(f"Granted admin on {institution_id} to {user_id}")
+        if revoke:
+            user_id = await resolve_user_id(db, revoke)
+            removed = await institutions.revoke_institution_admin(db, institution_id, user_id)
+            print(f"{'Revoked' if removed else 'Was not an'} admin on {institution_id}: {user_id}")
+
+        admins = await institutions.institution_admins(db, institution_id)
+        print(f"Admins of {institution_id}: {', '.join(admins) or 'none'}")
+    finally:
+        database.db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage institution admins")
+    parser.add_argument("institution_id")
+    action = parser.add_mutually_exclusive_group()
+    action.add_argument("--grant", help="email or user id to make admin")
+    action.add_argument("--revoke", help="email or user id to remove as admin")
+    action.add_argument("--list", action="store_true", help="only list admins (default)")
+    args = parser.parse_args()
+    asyncio.run(main(args.institution_id, grant=args.grant, revoke=args.revoke))
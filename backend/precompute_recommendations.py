@@ -0,0 +1,38 @@
+#!/usr/bin/env python
+"""
+Precompute today's vacation recommendations for SVP 2.0 (run nightly from cron)
+Usage:
+    python precompute_recommendations.py                 # every active user
+    python precompute_recommendations.py --stale-only    # only invalidated or outdated entries
+    python precompute_recommendations.py --user USER_ID  # limit to one user
+"""
+
+import argparse
+import asyncio
+from app.core import database
+from app.services import precompute, vacation_service
+
+
+async def main(stale_only: bool, user_id: str = None):
+    database.db.connect()
+    db = database.db.get_db()
+    try:
+        await database.db.create_indexes()
+        totals = await precompute.precompute_recommendations(
+            db, stale_only=stale_only, user_ids=[user_id] if user_id else None
+        )
+        print(
+            f"Computed {totals['users']} user(s), stored {totals['written']}, "
+            f"skipped {totals['skipped']} invalidated while computing"
+        )
+    finally:
+        vacation_service.engine_executor.shutdown()
+        database.db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Materialize vacation recommendations into the recommendations collection")
+    parser.add_argument("--stale-only", action="store_true", help="only refresh stale or outdated entries")
+    parser.add_argument("--user", help="only process this user id")
+    args = parser.parse_args()
+    asyncio.run(main(stale_only=args.stale_only, user_id=args.user))
@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+"""
+Rebuild or verify the materialized attendance counters for SVP 2.0
+Usage:
+    python rebuild_counters.py                 # rebuild every user
+    python rebuild_counters.py --verify        # only report drift
+    python rebuild_counters.py --user USER_ID  # limit to one user
+"""
+
+import argparse
+import asyncio
+from app.core import database
+from app.services import attendance_counters
+
+
+async def main(verify_only: bool, user_id: str = None):
+    database.db.connect()
+    db = database.db.get_db()
+    try:
+        await database.db.create_indexes()
+        user_ids = [user_id] if user_id else await attendance_counters.all_user_ids(db)
+
+        drifted = 0
+        for uid in user_ids:
+            drift = await attendance_counters.verify_counters(db, uid)
+            if drift:
+                drifted += 1
+                print(f"User {uid}: {len(drift)} subject(s) out of sync")
+                for item in drift:
+                    print(f"  - {item['subject_id']}: stored={item['stored']} expected={item['expected']}")
+                if not verify_only:
+                    written = await attendance_counters.rebuild_counters(db, uid)
+                    print(f"  rebuilt {written} subject counter(s)")
+
+        action = "found" if verify_only else "repaired"
+        print(f"Checked {len(user_ids)} user(s), {action} drift for {drifted}")
+    finally:
+        database.db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild attendance counters from attendance records")
+    parser.add_argument("--verify", action="store_true", help="report drift without writing")
+    parser.add_argument("--user", help="only process this user id")
+    args = parser.parse_args()
+    asyncio.run(main(verify_only=args.verify, user_id=args.user))
@@ -0,0 +1,5 @@
+import os
+
+# Settings requires these; tests never talk to Groq or issue real tokens
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("GROQ_API_KEY", "test-groq-key")
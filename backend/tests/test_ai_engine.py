@@ -0,0 +1,134 @@
+"""
+AIEngine against a local stub of the Groq chat completions endpoint:
+jittered retries on 429/5xx, the in-flight semaphore, and overlap of
+concurrent calls (the benchmark records its timing as a test property).
+"""
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.core.config import settings
+from app.services.ai_engine import AIEngine
+
+
+class StubGroq:
+    """Serves queued status codes, then 200s with a JSON completion"""
+
+    def __init__(self, statuses=(), latency=0.0):
+        self.statuses = list(statuses)
+        self.latency = latency
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                with stub.lock:
+                    stub.requests += 1
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                    status = stub.statuses.pop(0) if stub.statuses else 200
+                time.sleep(stub.latency)
+                with stub.lock:
+                    stub.in_flight -= 1
+
+                if status == 200:
+                    body = {
+                        "id": "stub",
+                        "object": "chat.completion",
+                        "created": 0,
+                        "model": "stub",
+                        "choices": [{
+                            "index": 0,
+                            "message": {"role": "assistant", "content": json.dumps({"ok": True})},
+                            "finish_reason": "stop"
+                        }]
+                    }
+                else:
+                    body = {"error": {"message": f"stub {status}", "type": "stub"}}
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+@pytest.fixture
+def stub_groq(monkeypatch):
+    servers = []
+
+    def start(**kwargs):
+        stub = StubGroq(**kwargs)
+        server = ThreadingHTTPServer(("127.0.0.1", 0), stub.handler())
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        monkeypatch.setattr(settings, "GROQ_BASE_URL", f"http://127.0.0.1:{server.server_port}")
+        return stub
+
+    monkeypatch.setattr(settings, "GROQ_API_KEY", "stub-key")
+    monkeypatch.setattr(settings, "LLM_CACHE_ENABLED", False)
+    monkeypatch.setattr(settings, "AI_RETRY_BASE_DELAY_SECONDS", 0.01)
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+async def call_engine(calls: int = 1):
+    engine = AIEngine()
+    try:
+        return await asyncio.gather(*(engine._get_json_response(f"prompt {i}") for i in range(calls)))
+    finally:
+        await engine.close()
+
+
+def test_retries_rate_limit_and_server_errors(stub_groq, monkeypatch):
+    monkeypatch.setattr(settings, "AI_MAX_RETRIES", 2)
+    stub = stub_groq(statuses=[429, 503])
+
+    assert asyncio.run(call_engine()) == [{"ok": True}]
+    assert stub.requests == 3
+
+
+def test_gives_up_after_max_retries(stub_groq, monkeypatch):
+    monkeypatch.setattr(settings, "AI_MAX_RETRIES", 2)
+    stub = stub_groq(statuses=[500] * 10)
+
+    assert asyncio.run(call_engine()) == [None]
+    assert stub.requests == 3
+
+
+def test_semaphore_caps_in_flight_requests(stub_groq, monkeypatch):
+    monkeypatch.setattr(settings, "AI_MAX_CONCURRENCY", 3)
+    stub = stub_groq(latency=0.05)
+
+    assert asyncio.run(call_engine(calls=12)) == [{"ok": True}] * 12
+    assert stub.max_in_flight == 3
+
+
+def test_concurrent_calls_overlap(stub_groq, monkeypatch, record_property):
+    """Benchmark: 16 calls at 100 ms latency with 4 in flight vs. one at a time"""
+    monkeypatch.setattr(settings, "AI_MAX_CONCURRENCY", 4)
+    stub = stub_groq(latency=0.1)
+
+    started = time.perf_counter()
+    results = asyncio.run(call_engine(calls=16))
+    record_property("seconds_for_16_calls", round(time.perf_counter() - started, 3))
+
+    assert results == [{"ok": True}] * 16
+    assert stub.max_in_flight == 4  # Sequential calls would never overlap
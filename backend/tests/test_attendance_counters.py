@@ -0,0 +1,128 @@
+"""Attendance counter deltas, and the once-per-user counter build"""
+import asyncio
+
+import pytest
+
+from app.services import attendance_counters
+from app.services.attendance_counters import (
+    COUNTERS_COLLECTION,
+    compute_counters_from_records,
+    counter_deltas,
+    ensure_counters,
+    ensure_counters_bulk,
+    get_counters,
+    rebuild_counters,
+    tally_entries
+)
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+
+def entries(*pairs):
+    return [{"subject_id": subject_id, "status": status} for subject_id, status in pairs]
+
+
+def test_tally_entries_counts_statuses_per_subject():
+    tally = tally_entries(entries(("math", "P"), ("math", "A"), ("math", "P"), ("phy", "C"), ("phy", "X")))
+    assert tally == {
+        "math": {"present": 2, "absent": 1, "other": 0},
+        "phy": {"present": 0, "absent": 0, "other": 2}
+    }
+
+
+def test_first_mark_adds_every_entry():
+    assert counter_deltas([], entries(("math", "P"), ("phy", "A"))) == {
+        "math": {"present": 1},
+        "phy": {"absent": 1}
+    }
+
+
+def test_remark_moves_only_changed_entries():
+    old = entries(("math", "P"), ("phy", "P"), ("chem", "A"))
+    new = entries(("math", "P"), ("phy", "A"), ("bio", "C"))
+    assert counter_deltas(old, new) == {
+        "phy": {"present": -1, "absent": 1},
+        "chem": {"absent": -1},
+        "bio": {"other": 1}
+    }
+
+
+def test_identical_remark_changes_nothing():
+    day = entries(("math", "P"), ("phy", "A"))
+    assert counter_deltas(day, list(reversed(day))) == {}
+
+
+@pytest.fixture
+def db():
+    attendance_counters._built_users.clear()
+    yield mongomock_motor.AsyncMongoMockClient()["svp_test"]
+    attendance_counters._built_users.clear()
+
+
+async def insert_records(db, user_id, days):
+    await db["attendance_records"].insert_many([
+        {"user_id": user_id, "date": f"2026-09-{day:02d}", "entries": day_entries}
+        for day, day_entries in enumerate(days, start=1)
+    ])
+
+
+def test_concurrent_ensure_builds_once(db, monkeypatch):
+    builds = []
+    real_rebuild = attendance_counters.rebuild_counters
+
+    async def counting_rebuild(db, user_id):
+        builds.append(user_id)
+        await asyncio.sleep(0.1)  # Keep the claim held while the others arrive
+        return await real_rebuild(db, user_id)
+
+    monkeypatch.setattr(attendance_counters, "rebuild_counters", counting_rebuild)
+
+    async def run():
+        await insert_records(db, "legacy", [entries(("math", "P"), ("phy", "A"))] * 3)
+        results = await asyncio.gather(*(ensure_counters(db, "legacy") for _ in range(4)))
+        return results, await get_counters(db, "legacy")
+
+    results, counters = asyncio.run(run())
+    assert builds == ["legacy"]
+    assert sorted(results) == [False, False, False, True]
+    assert counters == {
+        "math": {"present": 3, "absent": 0, "other": 0},
+        "phy": {"present": 0, "absent": 3, "other": 0}
+    }
+
+
+def test_users_without_data_are_marked_without_counting(db, monkeypatch):
+    async def fail(*args):
+        raise AssertionError("nothing to count")
+
+    monkeypatch.setattr(attendance_counters, "rebuild_counters", fail)
+    assert asyncio.run(ensure_counters_bulk(db, ["new-1", "new-2"])) == {"new-1", "new-2"}
+
+
+def test_writes_after_build_are_counted_once(db):
+    async def run():
+        await insert_records(db, "legacy", [entries(("math", "P"))])
+        # mark_attendance: ensure, write the record, then apply the delta
+        await ensure_counters(db, "legacy")
+        new_day = entries(("math", "A"))
+        await db["attendance_records"].insert_one({"user_id": "legacy", "date": "2026-09-30", "entries": new_day})
+        await db[COUNTERS_COLLECTION].update_one(
+            {"user_id": "legacy", "subject_id": "math"},
+            {"$inc": counter_deltas([], new_day)["math"]},
+            upsert=True
+        )
+        assert not await ensure_counters(db, "legacy")
+        return await get_counters(db, "legacy"), await compute_counters_from_records(db, "legacy")
+
+    stored, expected = asyncio.run(run())
+    assert stored == expected == {"math": {"present": 1, "absent": 1, "other": 0}}
+
+
+def test_rebuild_is_idempotent_and_drops_removed_subjects(db):
+    async def run():
+        await insert_records(db, "u", [entries(("math", "P"))])
+        await db[COUNTERS_COLLECTION].insert_one({"user_id": "u", "subject_id": "gone", "present": 5})
+        await asyncio.gather(rebuild_counters(db, "u"), rebuild_counters(db, "u"))
+        return await get_counters(db, "u")
+
+    assert asyncio.run(run()) == {"math": {"present": 1, "absent": 0, "other": 0}}
@@ -0,0 +1,66 @@
+"""ExtraAttendancePlanner: fewest extra class days before a vacation"""
+import itertools
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.attendance_planner import ExtraAttendancePlanner
+from app.core.vacation_engine import DayType, Subject, VacationRecommendationEngine
+
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
+
+
+def is_safe_plan(engine, start, window_start, window_end, days):
+    matrix = engine.build_lecture_matrix(start, (window_end - start).days + 1)
+    offset, size = (window_start - start).days, (window_end - window_start).days + 1
+    missed = matrix.missed_lectures(offset, size)
+    for subject_id, prefix in zip(matrix.subject_ids, matrix.lecture_prefix):
+        subject = engine.subjects[subject_id]
+        extra = sum(prefix[d + 1] - prefix[d] for d in days)
+        total = subject.total + extra + missed[subject_id]
+        if total and (subject.attended + extra) / total * 100 < 75:
+            return False
+    return True
+
+
+@pytest.mark.parametrize("seed", range(60))
+def test_matches_brute_force_on_small_cases(seed):
+    rng = random.Random(seed)
+    n = rng.randint(1, 5)
+    subjects = [Subject(f"s{i}", f"S{i}", a, a + rng.randint(0, 12), 75.0) for i, a in ((i, rng.randint(3, 40)) for i in range(n))]
+    schedule = {day: rng.sample([f"s{i}" for i in range(n)], rng.randint(0, n)) for day in WEEKDAYS[:5]}
+    engine = VacationRecommendationEngine(subjects, schedule, {})
+    start = datetime(2026, 10, 5)
+    window_start = start + timedelta(days=rng.randint(3, 12))
+    window_end = window_start + timedelta(days=rng.randint(2, 10))
+
+    plan = ExtraAttendancePlanner(engine).plan(start, window_start, window_end)
+
+    matrix = engine.build_lecture_matrix(start, (window_end - start).days + 1)
+    class_days = [d for d in range((window_start - start).days) if matrix.day_types[d] == DayType.WEEKDAY]
+    fewest = next(
+        (k for k in range(len(class_days) + 1)
+         if any(is_safe_plan(engine, start, window_start, window_end, c) for c in itertools.combinations(class_days, k))),
+        None
+    )
+    assert plan.feasible == (fewest is not None)
+    if plan.feasible:
+        assert len(plan.days_to_attend) == fewest
+        assert is_safe_plan(engine, start, window_start, window_end, [(d - start).days for d in plan.days_to_attend])
+
+
+def test_full_semester_uses_exact_dp():
+    """6 subjects, January to April: greedy needs 69 extra days, the optimum is 60"""
+    rng = random.Random(0)
+    subjects = [Subject(f"s{i}", f"S{i}", 30, 45, 75.0) for i in range(6)]
+    schedule = {day: rng.sample([f"s{i}" for i in range(6)], rng.randint(2, 4)) for day in WEEKDAYS}
+    engine = VacationRecommendationEngine(subjects, schedule, {})
+    start, window_start, window_end = datetime(2027, 1, 4), datetime(2027, 4, 19), datetime(2027, 4, 30)
+
+    plan = ExtraAttendancePlanner(engine).plan(start, window_start, window_end)
+    greedy = ExtraAttendancePlanner(engine, max_states=0).plan(start, window_start, window_end)
+
+    assert (plan.method, len(plan.days_to_attend)) == ("dp", 60)
+    assert (greedy.method, len(greedy.days_to_attend)) == ("greedy", 69)
+    assert is_safe_plan(engine, start, window_start, window_end, [(d - start).days for d in plan.days_to_attend])
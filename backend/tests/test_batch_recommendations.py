@@ -0,0 +1,126 @@
+"""
+Batch recommendations: each student's grouped plan must equal their own
+generate_vacation_plan, and the group builds one lecture matrix instead of
+one per student (the benchmark records its timings as test properties).
+"""
+import random
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.vacation_engine import DayType, VacationRecommendationEngine
+from app.services.batch_recommendations import _shared_inputs_key
+from app.services.vacation_service import generate_group_vacation_plans, generate_vacation_plan
+
+START = datetime(2026, 3, 2)
+CODES = ["CS101", "MA201", "PH110", "EE120"]
+TIMETABLE = {
+    "Monday": ["CS101", "MA201"],
+    "Tuesday": ["PH110", "EE120", "CS101"],
+    "Wednesday": ["MA201", "PH110"],
+    "Thursday": ["CS101", "EE120"],
+    "Friday": ["MA201", "CS101", "PH110"]
+}
+CALENDAR = {
+    (START + timedelta(days=offset)).strftime("%Y-%m-%d"): day_type
+    for offset, day_type in [(4, DayType.HOLIDAY), (17, DayType.HOLIDAY), (18, DayType.HOLIDAY), (26, DayType.WEEKEND)]
+}
+
+
+def student(rng: random.Random, user_id: str, codes=CODES):
+    """Inputs as load_engine_inputs builds them: the student's own subject ids, shared codes"""
+    codes = list(codes)
+    rng.shuffle(codes)
+    subjects = []
+    for i, code in enumerate(codes):
+        attended = rng.randint(20, 60)
+        subjects.append({
+            "id": f"{user_id}-{i}",
+            "name": code,
+            "code": code,
+            "attended": attended,
+            "total": attended + rng.randint(0, 12)
+        })
+    ids_by_code = defaultdict(list)
+    for s in subjects:
+        ids_by_code[s["code"]].append(s["id"])
+    schedule = {
+        day: [ids_by_code[code][0] for code in codes_today if code in ids_by_code]
+        for day, codes_today in TIMETABLE.items()
+    }
+    return {"subjects_data": subjects, "weekly_schedule": schedule, "academic_calendar": dict(CALENDAR)}
+
+
+def run_batch(inputs_by_user, **params):
+    """recommend_for_users without the database and executor"""
+    groups = defaultdict(lambda: {"members": []})
+    for user_id, inputs in inputs_by_user.items():
+        key, subject_keys, schedule = _shared_inputs_key(inputs, user_id)
+        groups[key].update(weekly_schedule=schedule, academic_calendar=inputs["academic_calendar"])
+        groups[key]["members"].append({
+            "user_id": user_id, "subjects_data": inputs["subjects_data"], "subject_keys": subject_keys
+        })
+
+    plans = {}
+    for group in groups.values():
+        plans.update(generate_group_vacation_plans(
+            weekly_schedule=group["weekly_schedule"],
+            academic_calendar=group["academic_calendar"],
+            members=group["members"],
+            min_attendance=75,
+            start_date=START,
+            **params
+        ))
+    return plans, len(groups)
+
+
+def run_sequential(inputs_by_user, **params):
+    return {
+        user_id: generate_vacation_plan(min_attendance=75, start_date=START, **inputs, **params)
+        for user_id, inputs in inputs_by_user.items()
+    }
+
+
+@pytest.mark.parametrize("objective", ["score", "pareto"])
+def test_batch_matches_each_students_own_plan(objective):
+    rng = random.Random(11)
+    inputs_by_user = {f"u{i}": student(rng, f"u{i}") for i in range(12)}
+    inputs_by_user["missing"] = student(rng, "missing", codes=CODES[:3])  # No EE120
+    inputs_by_user["extra"] = student(rng, "extra", codes=CODES + ["LAB9"])  # Unscheduled subject
+    inputs_by_user["dupes"] = student(rng, "dupes", codes=CODES + ["CS101"])  # Private group
+
+    params = {"search_days": 45, "min_window": 2, "max_window": 7, "objective": objective}
+    plans, group_count = run_batch(inputs_by_user, **params)
+
+    assert group_count == 3  # Shared timetable (incl. "extra"), "missing", "dupes"
+    assert any(plan["vacation_options"] for plan in plans.values())
+    assert plans == run_sequential(inputs_by_user, **params)
+
+
+def test_batch_builds_one_matrix_per_group(monkeypatch, record_property):
+    """Benchmark: 200 students sharing a timetable, batched vs. one plan at a time"""
+    builds = []
+    build = VacationRecommendationEngine.build_lecture_matrix
+
+    def counting_build(self, *args, **kwargs):
+        builds.append(1)
+        return build(self, *args, **kwargs)
+
+    monkeypatch.setattr(VacationRecommendationEngine, "build_lecture_matrix", counting_build)
+    rng = random.Random(5)
+    inputs_by_user = {f"u{i}": student(rng, f"u{i}") for i in range(200)}
+    params = {"search_days": 90, "min_window": 2, "max_window": 10}
+
+    started = time.perf_counter()
+    sequential = run_sequential(inputs_by_user, **params)
+    record_property("sequential_seconds", round(time.perf_counter() - started, 3))
+    assert len(builds) == 200
+
+    builds.clear()
+    started = time.perf_counter()
+    batched, _ = run_batch(inputs_by_user, **params)
+    record_property("batch_seconds", round(time.perf_counter() - started, 3))
+    assert len(builds) == 1
+    assert batched == sequential
@@ -0,0 +1,98 @@
+"""Expanding parsed calendar events into days, and the one-time legacy backfill"""
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from app.services import calendar_days
+from app.services.calendar_days import MAX_EVENT_DAYS, expand_calendar_events, load_calendar_slice
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+
+def holiday(name):
+    return {"day_type": "holiday", "name": name}
+
+
+def test_range_becomes_one_day_each():
+    days = expand_calendar_events({"holidays": [
+        {"name": "Diwali Break", "start_date": "2026-11-07", "end_date": "2026-11-09"}
+    ]})
+    assert days == {
+        "2026-11-07": holiday("Diwali Break"),
+        "2026-11-08": holiday("Diwali Break"),
+        "2026-11-09": holiday("Diwali Break")
+    }
+
+
+def test_date_dicts_and_bare_strings():
+    days = expand_calendar_events({"holidays": [
+        {"name": "Republic Day", "date": "2026-01-26"},
+        "2026-08-15",
+        "2026-10-02T00:00:00",
+        {"date": "2026-03-04"}
+    ]})
+    assert days == {
+        "2026-01-26": holiday("Republic Day"),
+        "2026-08-15": holiday("Holiday"),
+        "2026-10-02": holiday("Holiday"),
+        "2026-03-04": holiday("Holiday")
+    }
+
+
+def test_overlapping_events_keep_the_first_name():
+    days = expand_calendar_events({"holidays": [
+        {"name": "Winter Vacation", "start_date": "2026-12-24", "end_date": "2026-12-26"},
+        {"name": "Christmas", "date": "2026-12-25"}
+    ]})
+    assert days["2026-12-25"] == holiday("Winter Vacation") and len(days) == 3
+
+
+def test_bad_ranges_collapse_to_their_start():
+    days = expand_calendar_events({"holidays": [
+        {"name": "Reversed", "start_date": "2026-05-10", "end_date": "2026-05-01"},
+        {"name": "Two years", "start_date": "2026-06-01", "end_date": "2028-06-01"},
+        {"name": "No end", "start_date": "2026-07-01", "end_date": "soon"}
+    ]})
+    assert days == {
+        "2026-05-10": holiday("Reversed"),
+        "2026-06-01": holiday("Two years"),
+        "2026-07-01": holiday("No end")
+    }
+
+
+def test_longest_allowed_range_is_kept():
+    days = expand_calendar_events({"holidays": [
+        {"name": "Sabbatical", "start_date": "2026-01-01", "end_date": "2026-12-31"}
+    ]})
+    assert len(days) == 365 < MAX_EVENT_DAYS
+
+
+@pytest.mark.parametrize("parsed_events", [
+    None,
+    {},
+    {"holidays": None},
+    {"holidays": [None, 42, "not a date", {"name": "No date"}, {"date": 20261225}]},
+    {"exams": [{"subject": "Maths", "date": "2026-12-14"}]}
+])
+def test_nothing_to_expand(parsed_events):
+    assert expand_calendar_events(parsed_events) == {}
+
+
+def test_empty_legacy_upload_is_backfilled_once(monkeypatch):
+    db = mongomock_motor.AsyncMongoMockClient()["svp_test"]
+    replaced = []
+    real_replace = calendar_days.replace_user_calendar
+
+    async def counting_replace(db, user_id, parsed_events):
+        replaced.append(user_id)
+        return await real_replace(db, user_id, parsed_events)
+
+    monkeypatch.setattr(calendar_days, "replace_user_calendar", counting_replace)
+
+    async def run():
+        await db["academic_calendars"].insert_one({"user_id": "u", "parsed_events": {"holidays": [], "exams": []}})
+        return [await load_calendar_slice(db, "u", datetime(2026, 3, 2), 60) for _ in range(3)]
+
+    assert asyncio.run(run()) == [{}, {}, {}]
+    assert replaced == ["u"]
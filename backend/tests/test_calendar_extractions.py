@@ -0,0 +1,50 @@
+"""Extraction reuse across parser versions"""
+import asyncio
+
+import pytest
+
+from app.services.calendar_extractions import EXTRACTIONS_COLLECTION, find_extraction, save_extraction
+from app.services.calendar_parser import PARSER_VERSION
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+EVENTS = {"holidays": [{"name": "Diwali", "start_date": "2026-11-08", "end_date": "2026-11-08"}], "exams": []}
+
+
+@pytest.fixture
+def db():
+    return mongomock_motor.AsyncMongoMockClient()["svp_test"]
+
+
+def test_current_rules_extraction_is_reused(db):
+    async def run():
+        await save_extraction(db, "sha", "text", EVENTS, 1200, method="rules")
+        return await find_extraction(db, "sha"), await db[EXTRACTIONS_COLLECTION].find_one({"_id": "sha"})
+
+    found, stored = asyncio.run(run())
+    assert found["parsed_events"] == EVENTS and found["parser_version"] == PARSER_VERSION
+    assert stored["hits"] == 1 and stored["time_saved_ms"] == 1200
+
+
+def test_older_rules_extraction_is_a_miss_and_gets_replaced(db):
+    async def run():
+        await db[EXTRACTIONS_COLLECTION].insert_one({
+            "_id": "sha", "text": "text", "parsed_events": {"holidays": ["term dates"]},
+            "method": "rules", "processing_ms": 900, "hits": 7, "time_saved_ms": 6300
+        })
+        missed = await find_extraction(db, "sha")
+        await save_extraction(db, "sha", "text", EVENTS, 1000, method="rules")
+        return missed, await find_extraction(db, "sha")
+
+    missed, found = asyncio.run(run())
+    assert missed is None
+    assert found["parsed_events"] == EVENTS
+    assert found["hits"] == 7  # Counted before this lookup
+
+
+def test_llm_extractions_do_not_depend_on_the_parser_version(db):
+    async def run():
+        await db[EXTRACTIONS_COLLECTION].insert_one({"_id": "sha", "text": "t", "parsed_events": EVENTS, "method": "llm"})
+        return await find_extraction(db, "sha")
+
+    assert asyncio.run(run())["parsed_events"] == EVENTS
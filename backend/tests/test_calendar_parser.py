@@ -0,0 +1,49 @@
+"""Rule-based calendar parser: what becomes a holiday and when to defer to the LLM"""
+from app.services.calendar_parser import parse_calendar_text
+
+HOLIDAY_LIST = """
+Academic Calendar 2026-27
+1. 15 Aug 2026   Saturday   Independence Day
+2. 02 Oct 2026   Friday     Gandhi Jayanti
+3. 09-11 Nov 2026           Diwali Holidays
+4. 24 Dec 2026 - 02 Jan 2027  Winter Vacation
+5. 14 Dec 2026              End-Sem Examinations begin
+"""
+
+TERM_CALENDAR = """
+Academic Calendar 2026-27
+Commencement of classes: 03 Aug 2026
+Classes: 03 Aug - 27 Nov 2026
+Last date for fee payment: 14 Aug 2026
+15 Aug 2026 Independence Day
+Result declaration: 20 Jan 2027
+"""
+
+
+def test_holiday_list_is_parsed_confidently():
+    result = parse_calendar_text(HOLIDAY_LIST)
+
+    assert result.coverage == 1.0
+    assert result.is_confident(0.9, 2, max_holiday_days=28)
+    assert [h["name"] for h in result.events["holidays"]] == [
+        "Independence Day", "Gandhi Jayanti", "Diwali Holidays", "Winter Vacation"
+    ]
+    assert result.events["holidays"][3]["end_date"] == "2027-01-02"
+    assert result.events["exams"] == [{"subject": "End-Sem Examinations begin", "date": "2026-12-14"}]
+
+
+def test_non_holiday_dates_are_not_holidays():
+    result = parse_calendar_text(TERM_CALENDAR)
+
+    assert [h["name"] for h in result.events["holidays"]] == ["Independence Day"]
+    assert result.parsed_lines == 1 and result.candidate_lines == 5
+    assert not result.is_confident(0.9, 1)
+
+
+def test_long_holiday_is_not_confident():
+    result = parse_calendar_text("Summer vacation: 01 May 2027 - 31 Jul 2027\nHoli holiday 22 Mar 2027")
+
+    assert result.coverage == 1.0
+    assert result.longest_holiday_days == 92
+    assert result.is_confident(0.9, 2)
+    assert not result.is_confident(0.9, 2, max_holiday_days=28)
@@ -0,0 +1,77 @@
+"""BoundedExecutor admission: queue limit, reservations and the queue timeout"""
+import asyncio
+import threading
+
+import pytest
+
+from app.core.executor import BoundedExecutor, ExecutorBusyError
+
+
+def blocking(event: threading.Event):
+    event.wait(5)
+    return "done"
+
+
+def test_reservations_are_counted_at_reserve_time():
+    executor = BoundedExecutor("test", max_workers=1, max_queue=2)
+
+    reservations = [executor.reserve() for _ in range(3)]
+    with pytest.raises(ExecutorBusyError):
+        executor.reserve()
+
+    reservations[0].release()
+    reservations[0].release()  # Idempotent
+    executor.reserve()
+    assert executor.stats()["pending"] == 3 and executor.rejected == 1
+
+
+def test_work_under_a_reservation_is_not_rejected_when_full():
+    executor = BoundedExecutor("test", max_workers=1, max_queue=0)
+
+    async def run():
+        reservation = executor.reserve()
+        with pytest.raises(ExecutorBusyError):
+            await executor.run(sum, [1, 2])
+        with reservation:
+            result = await executor.run(sum, [1, 2])
+        return result, executor.stats()["pending"]
+
+    assert asyncio.run(run()) == (3, 0)
+    executor.shutdown()
+
+
+def test_waiting_for_a_worker_times_out():
+    executor = BoundedExecutor("test", max_workers=1, max_queue=4, timeout=5, queue_timeout=0.05)
+    release = threading.Event()
+
+    async def run():
+        holder = asyncio.ensure_future(executor.run(blocking, release))
+        await asyncio.sleep(0.01)
+        with pytest.raises(ExecutorBusyError):
+            await executor.run(sum, [1])
+        release.set()
+        return await holder, executor.stats()["pending"]
+
+    assert asyncio.run(run()) == ("done", 0)
+    executor.shutdown()
+
+
+def test_reserved_work_waits_for_a_worker_past_the_queue_timeout():
+    executor = BoundedExecutor("test", max_workers=1, max_queue=4, timeout=5, queue_timeout=0.05)
+    release = threading.Event()
+
+    async def reserved_job(reservation):
+        with reservation:
+            return await executor.run(sum, [4, 5])
+
+    async def run():
+        holder = asyncio.ensure_future(executor.run(blocking, release))
+        await asyncio.sleep(0.01)
+        job = asyncio.ensure_future(reserved_job(executor.reserve()))
+        await asyncio.sleep(0.2)
+        assert not job.done()
+        release.set()
+        return await holder, await job
+
+    assert asyncio.run(run()) == ("done", 9)
+    executor.shutdown()
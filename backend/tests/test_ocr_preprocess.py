@@ -0,0 +1,101 @@
+"""
+OCR image preprocessing (pure PIL), plus a tesseract accuracy/latency
+benchmark that runs only where the tesseract binary is installed.
+"""
+import random
+import shutil
+import time
+
+import pytest
+from PIL import Image, ImageDraw, ImageFont
+
+from app.core.config import settings
+from app.services import ocr
+from app.services.ocr import _otsu_threshold, _preprocess_image
+
+CALENDAR_LINES = ["15 Aug 2026 Independence Day", "02 Oct 2026 Gandhi Jayanti", "14 Dec 2026 End Sem Exams"]
+
+
+def noisy_page(size, ink=110, paper=150, noise=12, seed=0, box=None):
+    """Low-contrast grey page with a dark block (the "ink") and gaussian noise"""
+    rng = random.Random(seed)
+    width, height = size
+    left, top, right, bottom = box or (width // 4, height // 4, 3 * width // 4, 3 * height // 4)
+    pixels = [
+        max(0, min(255, round((ink if left <= x < right and top <= y < bottom else paper) + rng.gauss(0, noise))))
+        for y in range(height) for x in range(width)
+    ]
+    image = Image.new("L", size)
+    image.putdata(pixels)
+    return image
+
+
+@pytest.fixture
+def no_crop(monkeypatch):
+    monkeypatch.setattr(settings, "OCR_CROP_TO_CONTENT", False)
+
+
+def test_otsu_threshold_separates_low_contrast_ink_from_paper():
+    threshold = _otsu_threshold(noisy_page((120, 80)))
+    assert 115 <= threshold <= 145
+
+
+def test_otsu_threshold_of_a_flat_image_is_the_default():
+    assert _otsu_threshold(Image.new("L", (10, 10), 200)) == 127
+
+
+def test_preprocess_binarizes_noisy_photo(no_crop):
+    photo = noisy_page((200, 120), noise=6, seed=1).convert("RGB")
+    result = _preprocess_image(photo)
+
+    assert result.mode == "L" and result.size == (200, 120)
+    histogram = result.histogram()
+    assert [level for level, count in enumerate(histogram) if count] == [0, 255]
+    assert result.getpixel((100, 60)) == 0 and result.getpixel((5, 5)) == 255
+    black = histogram[0] / (200 * 120)
+    assert 0.24 <= black <= 0.26  # The ink block covers a quarter of the page
+
+
+def test_preprocess_downscales_to_target_dpi(no_crop):
+    scan = noisy_page((400, 200))
+    scan.info["dpi"] = (settings.OCR_TARGET_DPI * 2, settings.OCR_TARGET_DPI * 2)
+    assert _preprocess_image(scan).size == (200, 100)
+
+
+def test_preprocess_caps_the_longest_side(no_crop, monkeypatch):
+    monkeypatch.setattr(settings, "OCR_MAX_IMAGE_SIDE", 150)
+    assert _preprocess_image(noisy_page((300, 120))).size == (150, 60)
+
+
+def test_preprocess_crops_to_content_with_margin(monkeypatch):
+    monkeypatch.setattr(settings, "OCR_CROP_TO_CONTENT", True)
+    page = noisy_page((300, 200), noise=0, box=(100, 50, 160, 90))
+    assert _preprocess_image(page).size == (60 + 20, 40 + 20)
+
+
+def rendered_calendar():
+    """A phone-photo-like calendar: large, low contrast, slightly noisy"""
+    font = ImageFont.load_default(size=48)
+    image = Image.new("RGB", (2400, 900), (170, 165, 160))
+    draw = ImageDraw.Draw(image)
+    for i, line in enumerate(CALENDAR_LINES):
+        draw.text((120, 150 + i * 200), line, fill=(95, 90, 90), font=font)
+    return image
+
+
+@pytest.mark.skipif(shutil.which("tesseract") is None, reason="tesseract is not installed")
+def test_preprocess_accuracy_and_latency(monkeypatch, record_property):
+    """Benchmark: words recognized and OCR time with and without preprocessing"""
+    image = rendered_calendar()
+    expected = {word for line in CALENDAR_LINES for word in line.split()}
+
+    for preprocess in (False, True):
+        monkeypatch.setattr(settings, "OCR_PREPROCESS", preprocess)
+        started = time.perf_counter()
+        text = ocr._ocr_image(image)
+        elapsed = time.perf_counter() - started
+        recognized = len(expected & set(text.split())) / len(expected)
+        label = "preprocessed" if preprocess else "raw"
+        record_property(f"{label}_seconds", round(elapsed, 3))
+        record_property(f"{label}_word_accuracy", round(recognized, 3))
+        assert recognized >= 0.8
@@ -0,0 +1,87 @@
+"""
+Login bursts: password verification runs on the bounded thread pool, so
+the event loop keeps serving other requests and excess logins are refused
+instead of queueing without limit. Loop lag is recorded as a test property.
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.core import security
+from app.core.executor import BoundedExecutor, ExecutorBusyError
+
+ROUNDS = 20_000
+
+
+def hash_password(password: str) -> str:
+    return security.pwd_context.handler("pbkdf2_sha256").using(rounds=ROUNDS).hash(password)
+
+
+@pytest.fixture
+def login_pool(monkeypatch):
+    """Password executor with 4 workers and room for 12 waiting logins; tracks hashes in flight"""
+    executor = BoundedExecutor("test-passwords", mode="thread", max_workers=4, max_queue=12, queue_timeout=30)
+    stats = {"in_flight": 0, "max_in_flight": 0}
+    lock = threading.Lock()
+    verify = security.verify_password
+
+    def tracking_verify(plain, hashed):
+        with lock:
+            stats["in_flight"] += 1
+            stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+        try:
+            return verify(plain, hashed)
+        finally:
+            with lock:
+                stats["in_flight"] -= 1
+
+    monkeypatch.setattr(security, "password_executor", executor)
+    monkeypatch.setattr(security, "verify_password", tracking_verify)
+    yield stats
+    executor.shutdown()
+
+
+async def burst(logins: int, hashed: str):
+    """Concurrent logins plus a 5 ms ticker standing in for other requests on the loop"""
+    ticks, lags = 0, []
+    done = asyncio.Event()
+
+    async def ticker():
+        nonlocal ticks
+        while not done.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(0.005)
+            lags.append(time.perf_counter() - started - 0.005)
+            ticks += 1
+
+    ticking = asyncio.ensure_future(ticker())
+    await asyncio.sleep(0)
+    results = await asyncio.gather(
+        *(security.verify_password_async("hunter2", hashed) for _ in range(logins)),
+        return_exceptions=True
+    )
+    done.set()
+    await ticking
+    return results, ticks, max(lags, default=0.0)
+
+
+def test_login_burst_keeps_the_loop_responsive(login_pool, record_property):
+    hashed = hash_password("hunter2")
+    started = time.perf_counter()
+    results, ticks, max_lag = asyncio.run(burst(16, hashed))
+    record_property("burst_seconds", round(time.perf_counter() - started, 3))
+    record_property("max_loop_lag_ms", round(max_lag * 1000, 1))
+
+    assert results == [True] * 16
+    assert login_pool["max_in_flight"] == 4
+    assert ticks > 0  # The loop ran other work while passwords were hashed
+
+
+def test_logins_beyond_the_queue_are_refused(login_pool):
+    hashed = hash_password("hunter2")
+    results, _, _ = asyncio.run(burst(20, hashed))
+
+    assert results.count(True) == 16
+    assert sum(isinstance(result, ExecutorBusyError) for result in results) == 4
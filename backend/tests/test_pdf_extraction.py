@@ -0,0 +1,128 @@
+"""
+PDF text extraction: page chunks on the OCR pool, joined in page order,
+with the PDF_MAX_CHARS / PDF_MAX_PAGES limits. The 60-page benchmark
+records sequential vs. pooled timings as test properties.
+"""
+import asyncio
+import os
+import time
+
+import pytest
+
+from app.core.config import settings
+from app.core.executor import BoundedExecutor
+from app.services import ocr
+
+EXTRACT_PAGES = ocr._extract_pdf_pages
+
+
+def make_pdf(pages):
+    """Minimal text-layer PDF; pages: [[line, ...], ...]"""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [{}] /Count {} >>".format(
+            " ".join(f"{4 + 2 * i} 0 R" for i in range(len(pages))), len(pages)
+        ).encode(),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"
+    ]
+    for i, lines in enumerate(pages):
+        stream = "BT /F1 10 Tf 12 TL 50 760 Td " + " ".join(f"({line}) '" for line in lines) + " ET"
+        objects.append((
+            "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>"
+        ).encode())
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream".encode())
+
+    out, offsets = bytearray(b"%PDF-1.4\n"), []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+
+@pytest.fixture
+def calendar_pdf(tmp_path):
+    def build(page_count, lines_per_page=3):
+        path = tmp_path / f"calendar-{page_count}.pdf"
+        path.write_bytes(make_pdf([
+            [f"Page {page} line {line}: 15 Aug 2026 Independence Day" for line in range(lines_per_page)]
+            for page in range(page_count)
+        ]))
+        return str(path)
+    return build
+
+
+@pytest.fixture
+def thread_pool(monkeypatch):
+    """4-worker thread pool recording the page chunks each task extracts"""
+    executor = BoundedExecutor("test-ocr", mode="thread", max_workers=4, max_queue=16)
+    chunks = []
+
+    def recording_extract(path, page_numbers, resolution):
+        chunks.append(list(page_numbers))
+        return EXTRACT_PAGES(path, page_numbers, resolution)
+
+    monkeypatch.setattr(ocr, "ocr_executor", executor)
+    monkeypatch.setattr(ocr, "_extract_pdf_pages", recording_extract)
+    monkeypatch.setattr(settings, "PDF_PAGES_PER_TASK", 4)
+    yield chunks
+    executor.shutdown()
+
+
+def sequential_text(path, page_count):
+    """One open, every page in order (the extraction before it was parallelized)"""
+    return "\n".join(text for text in EXTRACT_PAGES(path, list(range(page_count)), 72) if text)
+
+
+def test_chunks_are_joined_in_page_order(calendar_pdf, thread_pool):
+    path = calendar_pdf(22)
+    text = asyncio.run(ocr._process_pdf(path))
+
+    assert text == sequential_text(path, 22)
+    assert sorted(thread_pool) == [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9, 10, 11], [12, 13, 14, 15],
+                                   [16, 17, 18, 19], [20, 21]]
+
+
+def test_extraction_stops_once_enough_text_is_collected(calendar_pdf, thread_pool, monkeypatch):
+    monkeypatch.setattr(settings, "PDF_MAX_CHARS", 100)
+    path = calendar_pdf(40)
+    text = asyncio.run(ocr._process_pdf(path))
+
+    assert len(thread_pool) == 4  # One round: 4 workers x 4 pages
+    assert text == sequential_text(path, 16)
+
+
+def test_pages_beyond_the_limit_are_ignored(calendar_pdf, thread_pool, monkeypatch):
+    monkeypatch.setattr(settings, "PDF_MAX_PAGES", 6)
+    path = calendar_pdf(30)
+
+    assert asyncio.run(ocr._process_pdf(path)) == sequential_text(path, 6)
+    assert sorted(thread_pool) == [[0, 1, 2, 3], [4, 5]]
+
+
+def test_pooled_extraction_benchmark(calendar_pdf, monkeypatch, record_property):
+    """Benchmark: 60 pages of 20 lines, sequential vs. the OCR process pool"""
+    workers = os.cpu_count() or 1
+    executor = BoundedExecutor("test-ocr", mode="process", max_workers=workers, max_queue=64)
+    monkeypatch.setattr(ocr, "ocr_executor", executor)
+    monkeypatch.setattr(settings, "PDF_MAX_CHARS", 10**7)  # Read the whole document
+    path = calendar_pdf(60, lines_per_page=20)
+    try:
+        started = time.perf_counter()
+        expected = sequential_text(path, 60)
+        sequential_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        text = asyncio.run(ocr._process_pdf(path))
+        pooled_seconds = time.perf_counter() - started
+    finally:
+        executor.shutdown()
+
+    record_property("workers", workers)
+    record_property("sequential_seconds", round(sequential_seconds, 3))
+    record_property("pooled_seconds", round(pooled_seconds, 3))
+    assert text == expected
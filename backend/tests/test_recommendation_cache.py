@@ -0,0 +1,78 @@
+"""Invalidation while a recommendation is being computed, across workers"""
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from app.services import recommendation_store
+from app.services.recommendation_store import RECOMMENDATIONS_COLLECTION
+from app.services.vacation_service import (
+    cache_recommendation,
+    cached_recommendation,
+    invalidate_cached_recommendations,
+    recommendation_cache_key,
+    recommendation_generation
+)
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+
+@pytest.fixture
+def db():
+    return mongomock_motor.AsyncMongoMockClient()["svp_test"]
+
+
+async def invalidate_elsewhere(db, user_id):
+    """What mark_stale does, as seen from a worker other than the one caching"""
+    await db[RECOMMENDATIONS_COLLECTION].update_one(
+        {"_id": user_id},
+        {"$set": {"stale": True, "invalidated_at": datetime.utcnow()}, "$inc": {"generation": 1}},
+        upsert=True
+    )
+
+
+def test_result_computed_before_invalidation_is_not_served(db):
+    key = recommendation_cache_key("race-user", datetime(2026, 3, 2), 75)
+
+    async def run():
+        generation = await recommendation_generation(db, "race-user")
+        await invalidate_elsewhere(db, "race-user")  # e.g. attendance marked mid-compute
+        cache_recommendation(key, generation, {"windows": []})
+        return await recommendation_generation(db, "race-user")
+
+    assert cached_recommendation(key, asyncio.run(run())) is None
+
+
+def test_invalidation_in_another_worker_retires_cached_entry(db):
+    key = recommendation_cache_key("shared-user", datetime(2026, 3, 2), 75)
+
+    async def run():
+        generation = await recommendation_generation(db, "shared-user")
+        cache_recommendation(key, generation, {"windows": []})
+        hit = cached_recommendation(key, await recommendation_generation(db, "shared-user"))
+        await invalidate_elsewhere(db, "shared-user")
+        miss = cached_recommendation(key, await recommendation_generation(db, "shared-user"))
+        return hit, miss
+
+    hit, miss = asyncio.run(run())
+    assert hit == {"windows": []}
+    assert miss is None
+
+
+def test_local_invalidation_drops_entry():
+    key = recommendation_cache_key("local-user", datetime(2026, 3, 2), 75)
+    cache_recommendation(key, 0, {"windows": []})
+    assert cached_recommendation(key, 0) == {"windows": []}
+
+    invalidate_cached_recommendations(["local-user"])
+    assert cached_recommendation(key, 0) is None
+
+
+def test_generations_default_to_zero_and_survive_store(db):
+    async def run():
+        await invalidate_elsewhere(db, "a")
+        await invalidate_elsewhere(db, "a")
+        await recommendation_store.store(db, "a", datetime(2026, 3, 2), {"windows": []}, datetime.utcnow())
+        return await recommendation_store.generations(db, ["a", "b", "a"])
+
+    assert asyncio.run(run()) == {"a": 2, "b": 0}
@@ -0,0 +1,88 @@
+"""spool_request_file: multipart parsing straight from the request stream"""
+import asyncio
+import hashlib
+import os
+
+import pytest
+from starlette.requests import Request
+
+from app.services.uploads import (
+    MULTIPART_OVERHEAD_BYTES,
+    MalformedUploadError,
+    UploadTooLargeError,
+    discard_upload,
+    spool_request_file
+)
+
+BOUNDARY = "svp-test-boundary"
+
+
+def multipart_body(parts):
+    """parts: [(field, filename or None, content_type or None, bytes)]"""
+    body = b""
+    for field, filename, content_type, data in parts:
+        disposition = f'form-data; name="{field}"' + (f'; filename="{filename}"' if filename else "")
+        body += f"--{BOUNDARY}\r\nContent-Disposition: {disposition}\r\n".encode()
+        if content_type:
+            body += f"Content-Type: {content_type}\r\n".encode()
+        body += b"\r\n" + data + b"\r\n"
+    return body + f"--{BOUNDARY}--\r\n".encode()
+
+
+def make_request(body: bytes, content_length=True, chunk_size=1000):
+    """Request whose receive() records how many body bytes were consumed"""
+    chunks = [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)] or [b""]
+    consumed = {"bytes": 0}
+
+    async def receive():
+        chunk = chunks.pop(0)
+        consumed["bytes"] += len(chunk)
+        return {"type": "http.request", "body": chunk, "more_body": bool(chunks)}
+
+    headers = [(b"content-type", f"multipart/form-data; boundary={BOUNDARY}".encode())]
+    if content_length:
+        headers.append((b"content-length", str(len(body)).encode()))
+    scope = {"type": "http", "method": "POST", "path": "/", "headers": headers, "query_string": b""}
+    return Request(scope, receive), consumed
+
+
+def spool(request, **kwargs):
+    return asyncio.run(spool_request_file(request, **kwargs))
+
+
+def test_file_part_is_written_once_with_metadata():
+    data = os.urandom(5000)
+    request, _ = make_request(multipart_body([
+        ("note", None, None, b"ignored"),
+        ("file", "cal.png", "image/png", data)
+    ]))
+    upload = spool(request)
+    try:
+        with open(upload.path, "rb") as f:
+            assert f.read() == data
+        assert upload.size == len(data)
+        assert upload.sha256 == hashlib.sha256(data).hexdigest()
+        assert (upload.content_type, upload.filename) == ("image/png", "cal.png")
+    finally:
+        discard_upload(upload.path)
+
+
+def test_declared_size_over_limit_is_rejected_before_reading():
+    request, consumed = make_request(multipart_body([("file", "big.pdf", "application/pdf", b"x" * 200_000)]))
+    with pytest.raises(UploadTooLargeError):
+        spool(request, max_bytes=1000)
+    assert consumed["bytes"] == 0
+
+
+def test_streamed_size_over_limit_stops_reading():
+    body = multipart_body([("file", "big.pdf", "application/pdf", b"x" * (MULTIPART_OVERHEAD_BYTES * 4))])
+    request, consumed = make_request(body, content_length=False, chunk_size=4096)
+    with pytest.raises(UploadTooLargeError):
+        spool(request, max_bytes=1000)
+    assert consumed["bytes"] < len(body)
+
+
+def test_missing_file_field():
+    request, _ = make_request(multipart_body([("other", "cal.png", "image/png", b"data")]))
+    with pytest.raises(MalformedUploadError):
+        spool(request)
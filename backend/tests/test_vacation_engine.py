@@ -0,0 +1,127 @@
+"""
+Fast vacation engine paths against their straightforward definitions:
+the Pareto staircase vs. an O(n^2) dominance filter, and the streaming
+top-N vs. generating, simulating and ranking every window. Allocation
+checks use tracemalloc and record the measured peaks as test properties.
+"""
+import random
+import tracemalloc
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.vacation_engine import DayType, Subject, VacationRecommendationEngine, VacationWindow
+
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+def random_engine(rng: random.Random):
+    num_subjects = rng.randint(1, 6)
+    subjects = []
+    for i in range(num_subjects):
+        attended = rng.randint(30, 90)
+        subjects.append(Subject(
+            f"s{i}", f"Subject {i}", attended, attended + rng.randint(0, 8), rng.choice([75.0, 60.0, 0.0])
+        ))
+    schedule = {
+        day: [f"s{rng.randrange(num_subjects)}" for _ in range(rng.randint(0, 4))]
+        for day in WEEKDAYS[:5] if rng.random() < 0.9
+    }
+    start = datetime(2026, 1, 1) + timedelta(days=rng.randint(0, 300))
+    calendar = {
+        (start + timedelta(days=rng.randint(0, 60))).strftime("%Y-%m-%d"): rng.choice(list(DayType))
+        for _ in range(rng.randint(0, 8))
+    }
+    return VacationRecommendationEngine(subjects, schedule, calendar), start
+
+
+def brute_force_front(engine, matrix, min_window, max_window):
+    """[(day_offset, window_size)] in find_pareto_vacations order"""
+    points = {}
+    for day_offset, size, leave, buffer, drop in engine.iter_window_metrics(matrix, min_window, max_window):
+        preference = (size - leave, -day_offset)
+        if (leave, buffer, drop) not in points or preference > points[(leave, buffer, drop)][0]:
+            points[(leave, buffer, drop)] = (preference, day_offset, size)
+
+    def dominates(a, b):
+        return a != b and a[0] >= b[0] and a[1] >= b[1] and a[2] <= b[2]
+
+    front = [p for p in points if not any(dominates(q, p) for q in points)]
+    front.sort(key=lambda p: (-p[0], -p[1], p[2]))
+    return [points[p][1:] for p in front]
+
+
+@pytest.mark.parametrize("seed", range(150))
+def test_pareto_front_matches_dominance_filter(seed):
+    rng = random.Random(seed)
+    engine, start = random_engine(rng)
+    search_days, min_window = rng.randint(5, 45), rng.randint(1, 3)
+    max_window = min_window + rng.randint(0, 10)
+    matrix = engine.build_lecture_matrix(start, search_days)
+
+    front = engine.find_pareto_vacations(start, min_window=min_window, max_window=max_window, matrix=matrix)
+
+    assert [((w.start_date - start).days, w.total_days) for w in front] == \
+        brute_force_front(engine, matrix, min_window, max_window)
+
+
+def baseline_top(engine, start, top_n, search_days, min_window, max_window):
+    """The original pipeline: every window, simulated day by day, fully ranked"""
+    windows = engine.generate_vacation_windows(start, search_days, min_window, max_window)
+    safe = [w for w in (engine.simulate_vacation_impact(w) for w in windows) if w.is_safe]
+    return engine.rank_vacation_windows(safe)[:top_n]
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_find_safe_vacations_matches_baseline(seed):
+    engine, start = random_engine(random.Random(seed))
+
+    fast = engine.find_safe_vacations(start, top_n=5, search_days=40, min_window=2, max_window=7)
+    baseline = baseline_top(engine, start, 5, 40, 2, 7)
+
+    assert [(w.start_date, w.end_date, w.subject_impacts) for w in fast] == \
+        [(w.start_date, w.end_date, w.subject_impacts) for w in baseline]
+    assert [w.score for w in fast] == pytest.approx([w.score for w in baseline])
+
+
+def peak_allocated(fn):
+    """(result, peak bytes allocated while fn ran)"""
+    tracemalloc.start()
+    try:
+        result = fn()
+        return result, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def test_ranked_search_streams_instead_of_materializing_windows(record_property):
+    engine, start = random_engine(random.Random(1))
+    params = {"search_days": 90, "min_window": 2, "max_window": 21}
+
+    fast, fast_peak = peak_allocated(lambda: engine.find_safe_vacations(start, top_n=5, **params))
+    baseline, baseline_peak = peak_allocated(lambda: baseline_top(engine, start, 5, **params))
+    record_property("find_safe_vacations_peak_bytes", fast_peak)
+    record_property("baseline_peak_bytes", baseline_peak)
+
+    assert [w.start_date for w in fast] == [w.start_date for w in baseline]
+    assert fast_peak * 20 < baseline_peak
+
+
+def test_windows_store_day_types_not_dated_days(record_property):
+    start = datetime(2026, 3, 2)
+    day_types = tuple([DayType.WEEKDAY] * 5 + [DayType.WEEKEND] * 2)
+
+    windows, slotted_bytes = peak_allocated(
+        lambda: [VacationWindow(start, start, day_types, {}, False) for _ in range(10_000)]
+    )
+    dated, dated_bytes = peak_allocated(lambda: [
+        [(start + timedelta(days=i), day_type) for i, day_type in enumerate(day_types)]
+        for _ in range(10_000)
+    ])
+    record_property("slotted_windows_bytes", slotted_bytes)
+    record_property("dated_day_lists_bytes", dated_bytes)
+
+    assert not hasattr(windows[0], "__dict__")
+    assert (windows[0].leave_days, windows[0].holiday_count) == (5, 2)
+    assert windows[0].days == dated[0]
+    assert slotted_bytes * 3 < dated_bytes
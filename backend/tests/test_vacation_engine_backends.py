@@ -0,0 +1,71 @@
+"""Parity between the Python and NumPy vacation engine backends"""
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.vacation_engine import DayType, Subject, VacationRecommendationEngine
+
+pytest.importorskip("numpy")
+
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+def random_engine(rng: random.Random):
+    num_subjects = rng.randint(1, 8)
+    subjects = []
+    for i in range(num_subjects):
+        attended = rng.randint(0, 60)
+        subjects.append(Subject(
+            f"s{i}", f"Subject {i}", attended, attended + rng.randint(0, 15), rng.choice([75.0, 60.0, 0.0])
+        ))
+    schedule = {
+        day: [f"s{rng.randrange(num_subjects)}" for _ in range(rng.randint(0, 4))]
+        for day in WEEKDAYS if rng.random() < 0.9
+    }
+    start = datetime(2026, 1, 1) + timedelta(days=rng.randint(0, 300))
+    calendar = {
+        (start + timedelta(days=rng.randint(0, 70))).strftime("%Y-%m-%d"): rng.choice(list(DayType))
+        for _ in range(rng.randint(0, 10))
+    }
+    return VacationRecommendationEngine(subjects, schedule, calendar), start
+
+
+def summary(windows):
+    return [
+        (w.start_date, w.end_date, w.score, w.leave_days, w.holiday_count, w.subject_impacts)
+        for w in windows
+    ]
+
+
+def both_backends(engine, start, **kwargs):
+    python = engine.find_safe_vacations(start, backend="python", **kwargs)
+    vectorized = engine.find_safe_vacations(start, backend="numpy", **kwargs)
+    return summary(python), summary(vectorized)
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_random_scenarios_match(seed):
+    engine, start = random_engine(random.Random(seed))
+    python, vectorized = both_backends(engine, start, top_n=5)
+    assert vectorized == python
+
+
+@pytest.mark.parametrize("search_days,min_window,max_window", [(30, 1, 1), (90, 3, 14), (10, 2, 20)])
+def test_search_parameters_match(search_days, min_window, max_window):
+    engine, start = random_engine(random.Random(7))
+    python, vectorized = both_backends(
+        engine, start, search_days=search_days, min_window=min_window, max_window=max_window
+    )
+    assert vectorized == python
+
+
+def test_no_subjects():
+    engine = VacationRecommendationEngine([], {"Monday": []}, {})
+    python, vectorized = both_backends(engine, datetime(2026, 3, 2))
+    assert python and vectorized == python
+
+
+def test_empty_window_range():
+    engine, start = random_engine(random.Random(3))
+    assert both_backends(engine, start, min_window=5, max_window=3) == ([], [])